@@ -0,0 +1,164 @@
+import hashlib
+import json
+import queue
+import re
+import threading
+import time
+
+from candidate_store import get_candidate_store
+from gemini_client import generation_config
+from rate_limit import TokenBucket
+
+EVALUATION_PROMPT_TEMPLATE = (
+    "You are grading a technical interview. For each question and answer below, give a score from "
+    "1 (poor) to 5 (excellent) for technical correctness and depth, and a one-sentence rationale.\n"
+    "Respond with JSON only, in the form "
+    '{{"scores": [{{"id": "Q1", "score": 3, "rationale": "..."}}]}}.\n\n'
+    "{pairs}"
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+
+def idempotency_key(candidate_id, questions, answers):
+    """Hashes the candidate ID with the exact questions and answers being scored."""
+    payload = json.dumps([candidate_id, questions, answers], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def build_evaluation_prompt(questions, answers):
+    pairs = "\n\n".join(
+        f"Q{idx}: {question}\nA{idx}: {answers.get(f'Q{idx}', '').strip() or '(no answer)'}"
+        for idx, question in enumerate(questions, 1)
+    )
+    return EVALUATION_PROMPT_TEMPLATE.format(pairs=pairs)
+
+
+def parse_scores(text, question_count):
+    """Extracts per-question scores from the model's JSON reply; raises ValueError if unusable."""
+    match = _JSON_OBJECT.search(text or "")
+    if not match:
+        raise ValueError("No JSON object in evaluation response.")
+    scores = []
+    for item in json.loads(match.group(0)).get("scores", []):
+        score = int(item["score"])
+        if not 1 <= score <= 5:
+            raise ValueError(f"Score out of range: {score}")
+        scores.append({"id": str(item["id"]), "score": score, "rationale": str(item.get("rationale", ""))})
+    if len(scores) != question_count:
+        raise ValueError(f"Expected {question_count} scores, got {len(scores)}.")
+    return scores
+
+
+class AnswerEvaluator:
+    """Scores submitted answers in background worker threads.
+
+    submit() only enqueues (it never blocks the Streamlit script); workers send
+    one LLM request per candidate covering all of their answers, retry with
+    exponential backoff, respect a shared rate limit and store the rubric
+    scores with store.set_evaluation(), apart from the candidate record, so a
+    concurrent or later save of the record neither races with nor erases them.
+    """
+
+    def __init__(self, store=None, workers=2, max_queue=100, requests_per_second=0.5,
+                 max_attempts=3, retry_backoff=2.0):
+        self.store = store or get_candidate_store()
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.bucket = TokenBucket(requests_per_second, capacity=1)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "skipped": 0, "rejected": 0, "scored": 0, "failed": 0}
+        self._workers = [
+            threading.Thread(target=self._run, name=f"answer-evaluator-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, candidate_id, record):
+        """Queues a candidate for scoring; returns False if it was skipped or the queue is full."""
+        questions = record.get("technical_questions", [])
+        answers = record.get("technical_answers", {})
+        if not questions or not any(a.strip() for a in answers.values()):
+            return False
+        key = idempotency_key(candidate_id, questions, answers)
+        already_scored = (self.store.get_evaluation(candidate_id) or {}).get("idempotency_key") == key
+        with self._lock:
+            if key in self._in_flight or already_scored:
+                self.stats["skipped"] += 1
+                return False
+            try:
+                self._queue.put_nowait((candidate_id, key, questions, answers))
+            except queue.Full:
+                self.stats["rejected"] += 1
+                print(f"⚠️ Evaluation queue full; candidate {candidate_id} not queued.")
+                return False
+            self._in_flight.add(key)
+            self.stats["submitted"] += 1
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._evaluate(*job)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(job[1])
+                self._queue.task_done()
+
+    def _score(self, questions, answers):
+        from chatbot_logic import model_router
+
+        self.bucket.acquire()
+        # Parsing inside the router makes an unusable reply count against that model, not as a success
+        return model_router.generate(
+            build_evaluation_prompt(questions, answers),
+            validate=lambda response: parse_scores(response.text, len(questions)),
+            generation_config=generation_config(temperature=0.0),
+        )
+
+    def _evaluate(self, candidate_id, key, questions, answers):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                scores, model_name = self._score(questions, answers)
+                break
+            except Exception as e:
+                print(f"Evaluation attempt {attempt} for {candidate_id} failed: {e}")
+                if attempt == self.max_attempts:
+                    with self._lock:
+                        self.stats["failed"] += 1
+                    return
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+        self.store.set_evaluation(candidate_id, {
+            "idempotency_key": key,
+            "model": model_name,
+            "scores": scores,
+            "overall": round(sum(s["score"] for s in scores) / len(scores), 2),
+            "evaluated_at": time.time(),
+        })
+        with self._lock:
+            self.stats["scored"] += 1
+
+    def join(self):
+        """Blocks until every queued job has been processed (for scripts and tests)."""
+        self._queue.join()
+
+
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+
+def get_answer_evaluator():
+    """Returns the process-wide evaluator, starting its workers on first use."""
+    global _evaluator
+    with _evaluator_lock:
+        if _evaluator is None:
+            _evaluator = AnswerEvaluator()
+        return _evaluator
@@ -1,246 +1,205 @@
 import streamlit as st
-import os
-import json
-# Import your functions from chatbot_logic. No need for dotenv here directly.
-from chatbot_logic import greet_candidate, generate_technical_questions, end_conversation
-import google.generativeai as genai
-from dotenv import load_dotenv # <--- Import load_dotenv here!
-
-# Load environment variables from .env file FIRST THING in this module
-load_dotenv()
-
-# Configure the API key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-# Check if the API key was successfully loaded
-if not GEMINI_API_KEY:
-    # This warning will now appear if the .env file is missing/incorrect
-    # or if GEMINI_API_KEY isn't set in the environment.
-    print("⚠️ GEMINI_API_KEY environment variable not found. Please ensure it's set in your .env file or system environment.")
-    # For a robust application, you might want to raise an exception here
-    # or provide a more graceful exit. For now, we'll assign a placeholder
-    # which will cause the API calls to fail but prevent the script from crashing immediately.
-    # In a deployed app, you'd want a hard stop if the key isn't present.
-    raise ValueError("GEMINI_API_KEY is not set. Please set it in your .env file.")
-
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-
-
+import threading
+import time
+# Import your functions from chatbot_logic. The Gemini SDK itself is imported lazily by gemini_client.
+from chatbot_logic import (
+    QuestionGenerationError, greet_candidate, stream_technical_questions, end_conversation, model_router,
+)
+from candidate_writer import WriterBusy, get_candidate_writer
+from session_log import new_session_state
+from session_store import StaleSessionError, open_session_log
+from interview_flow import ANSWERS_INTRO, QUESTIONS_ERROR_MESSAGE, QUESTIONS_INTRO, TECH_STACK_MESSAGE, get_flow
+from gemini_client import get_genai, warm_up
+from app_styles import APP_CSS
+from metrics import metrics, start_exporters_from_env
+
+# Script start, for the app_script_run_seconds metric recorded at the end of the run
+run_started = time.perf_counter()
 
 # ---------------- Page Config -------------------
 st.set_page_config(page_title="TalentScout AI Interviewer 🌟", page_icon="🤖", layout="centered")
 
-# ---------------- Custom CSS Styling -------------------
-st.markdown("""
-<style>
-    /* Overall App Styling */
-    .stApp {
-        background: linear-gradient(to bottom right, #e0f7fa, #ffffff); /* Gentle gradient background */
-        color: #333333; /* Darker text for contrast */
-        font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif;
-    }
+# ---------------- Gemini Setup (once per process) -------------------
+@st.cache_resource(show_spinner=False)
+def init_gemini():
+    """Configures the SDK once per process and warms up the preferred model in the background."""
+    get_genai() # Raises ValueError if GEMINI_API_KEY is not set
+    start_exporters_from_env() # METRICS_PORT / METRICS_JSON_PATH, see metrics.py
+    threading.Thread(target=warm_up, args=(model_router,), name="gemini-warm-up", daemon=True).start()
+    return True
 
-    /* Header Styling */
-    h1 {
-        color: #1a237e; /* Deep blue for header */
-        text-align: center;
-        margin-bottom: 30px;
-        font-size: 2.7rem;
-        font-weight: 700;
-        text-shadow: 1px 1px 3px rgba(0,0,0,0.15);
-        padding-top: 15px;
-    }
-
-    /* Chat Message Styling */
-    .stChatMessage {
-        border-radius: 25px; /* More rounded, softer look */
-        padding: 18px 22px;
-        margin-bottom: 15px;
-        font-size: 1.08rem;
-        line-height: 1.65;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1); /* More prominent shadow */
-        transition: transform 0.2s ease-out, box-shadow 0.2s ease-out; /* Smooth transition */
-        animation: fadeIn 0.5s ease-out; /* Fade in animation */
-    }
-
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-
-    /* User Message Styling */
-    .stChatMessage.stChatMessage-user {
-        background-color: #bbdefb; /* Lighter blue, more friendly */
-        border-left: 7px solid #2196f3; /* Stronger blue accent */
-        text-align: left;
-        margin-left: 20%; /* Pushes user messages to the right */
-        border-bottom-left-radius: 5px; /* Square off bottom-left for user */
-    }
+init_gemini()
 
-    /* Assistant Message Styling */
-    .stChatMessage.stChatMessage-assistant {
-        background-color: #dcedc8; /* Soft green, calming */
-        border-left: 7px solid #4caf50; /* Stronger green accent */
-        text-align: left;
-        margin-right: 20%; /* Pushes assistant messages to the left */
-        border-bottom-right-radius: 5px; /* Square off bottom-right for assistant */
-    }
+# ---------------- Custom CSS Styling -------------------
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# ---------------- Session Log & State Initialization -------------------
+# st.session_state is only a per-process copy: the session log (SESSION_BACKEND, see
+# session_store.py) is the source of truth that every worker process can load.
+def load_session_state(session_log):
+    """Replaces the interview state with the one replayed from the session log."""
+    for key, value in session_log.replay().items():
+        st.session_state[key] = value
+    st.session_state.pop("rendered_history", None)
+
+if 'session_log' not in st.session_state:
+    # The session ID lives in the URL so a restarted or different worker can resume the interview
+    session_log = open_session_log(st.query_params.get("sid"))
+    st.query_params["sid"] = session_log.session_id
+    if session_log.exists():
+        load_session_state(session_log)
+    st.session_state.session_log = session_log
+elif st.session_state.session_log.is_stale():
+    # Another worker (e.g. the same interview open in a second tab) has moved it on
+    load_session_state(st.session_state.session_log)
+
+for key, value in new_session_state().items():
+    if key not in st.session_state:
+        st.session_state[key] = value
 
-    /* Chat Input Container */
-    .stChatInputContainer {
-        margin-top: 40px;
-        padding: 25px;
-        border-top: 1px solid #e0e0e0;
-        background-color: #ffffff; /* White background */
-        border-radius: 20px; /* More rounded */
-        box-shadow: 0 -5px 20px rgba(0,0,0,0.08); /* Stronger shadow for "floating" effect */
-        position: sticky; /* Keeps it at the bottom */
-        bottom: 0;
-        z-index: 1000;
-        margin-left: -1rem; /* Adjust for padding on small screens */
-        margin-right: -1rem;
-        width: calc(100% + 2rem); /* Ensure full width */
-    }
-    .stChatInputContainer > div > div > label {
-        font-size: 1.1rem; /* Larger label for input */
-        font-weight: 600;
-        color: #555555;
-    }
+# ---------------- Utility Functions -------------------
+# How long a submit waits for room in a full write queue before giving up
+SAVE_QUEUE_TIMEOUT = 10.0
 
-    /* Streamlit Button Styling */
-    .stButton > button {
-        background-color: #673ab7; /* Deep purple */
-        color: white;
-        border-radius: 12px; /* More rounded buttons */
-        padding: 0.9rem 2rem;
-        font-weight: 600;
-        border: none;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.25); /* More prominent shadow */
-        transition: background-color 0.3s ease, transform 0.2s ease, box-shadow 0.3s ease;
-        letter-spacing: 0.5px;
-    }
-    .stButton > button:hover {
-        background-color: #512da8; /* Darker purple on hover */
-        transform: translateY(-4px); /* Lift effect */
-        box-shadow: 0 8px 20px rgba(0,0,0,0.3);
-    }
-    .stButton > button:active {
-        transform: translateY(0);
-        box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-    }
+def reload_stale_session():
+    """Loads the progress another worker wrote to this session and reruns the script from it."""
+    load_session_state(st.session_state.session_log)
+    st.toast("This interview was continued in another window; showing the latest progress.", icon="🔄")
+    st.rerun()
 
-    /* Primary button for "Start New Conversation" / "Submit" */
-    /* Targeting by data-testid or specific class if type="primary" is used */
-    .stButton[data-testid*="primary"] > button,
-    .stButton.css-1r6dm7b > button { /* Specific class for primary if present */
-        background-color: #007bff; /* Bright blue for primary actions */
-        box-shadow: 0 5px 15px rgba(0,123,255,0.3);
-    }
-    .stButton[data-testid*="primary"] > button:hover,
-    .stButton.css-1r6dm7b > button:hover {
-        background-color: #0056b3;
-        box-shadow: 0 8px 20px rgba(0,123,255,0.4);
-    }
+def log_event(event_type, **fields):
+    """Appends an event (and any staged ones) to the session log in one version-checked write.
 
-    /* Text Area Styling for detailed inputs (Tech Stack, Answers) */
-    .stTextArea > label {
-        font-weight: 600;
-        color: #495057;
-        margin-bottom: 10px;
-        font-size: 1.1rem;
-    }
-    .stTextArea > div > div > textarea {
-        border-radius: 15px; /* More rounded */
-        border: 1px solid #ced4da;
-        padding: 15px;
-        box-shadow: inset 0 2px 5px rgba(0,0,0,0.08); /* Subtle inset shadow */
-        transition: border-color 0.2s ease, box-shadow 0.2s ease;
-        font-size: 1rem;
-        min-height: 120px; /* Ensure sufficient height */
-    }
-    .stTextArea > div > div > textarea:focus {
-        border-color: #80bdff;
-        box-shadow: 0 0 0 0.25rem rgba(0,123,255,.25); /* Focus ring */
-        outline: none;
-    }
+    If another worker wrote to the session first, nothing is logged and the newer state is loaded instead.
+    """
+    try:
+        st.session_state.session_log.append(event_type, **fields)
+    except StaleSessionError:
+        reload_stale_session()
 
-    /* Alerts (Info, Success, Warning, Error) */
-    .stAlert {
-        border-radius: 15px;
-        padding: 1.2rem;
-        margin-bottom: 1.5rem;
-        font-size: 1.05rem;
-        line-height: 1.5;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.1);
-    }
-    .stAlert.stAlert-info { background-color: #e3f2fd; border-left: 6px solid #2196f3; }
-    .stAlert.stAlert-success { background-color: #e8f5e9; border-left: 6px solid #4caf50; }
-    .stAlert.stAlert-warning { background-color: #fff3e0; border-left: 6px solid #ff9800; }
-    .stAlert.stAlert-error { background-color: #ffebee; border-left: 6px solid #f44336; }
-
-    /* Footer / Bottom Section */
-    .bottom-section {
-        margin-top: 40px;
-        padding-top: 20px;
-        border-top: 1px solid #e0e0e0;
-        text-align: center;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# ---------------- State Initialization -------------------
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
-if 'current_step' not in st.session_state:
-    st.session_state.current_step = 'greeting'
-if 'candidate_info' not in st.session_state:
-    st.session_state.candidate_info = {
-        'full_name': '', 'email': '', 'phone': '',
-        'experience': '', 'position': '',
-        'location': '', 'tech_stack': []
-    }
-if 'tech_questions' not in st.session_state:
-    st.session_state.tech_questions = []
-if 'conversation_ended' not in st.session_state:
-    st.session_state.conversation_ended = False
-if 'Youtubes' not in st.session_state: # Renamed from 'Youtubes' for clarity
-    st.session_state.Youtubes = {}
+def set_save_status(status):
+    """Records the save status in the session log, so a resumed session knows whether to save again."""
+    st.session_state.save_status = status
+    log_event("save", status=status)
+    st.session_state.session_log.sync()
 
-# ---------------- Utility Functions -------------------
 def save_candidate_data():
-    """Saves candidate data to a JSON file."""
-    data_dir = "candidate_data"
-    os.makedirs(data_dir, exist_ok=True)
-
-    candidate_name = st.session_state.candidate_info.get('full_name', 'unknown_candidate').replace(' ', '_').replace('/', '').replace('\\', '')
-    candidate_email_prefix = st.session_state.candidate_info.get('email', 'noemail').split('@')[0]
-    filename = f"{data_dir}/{candidate_name}_{candidate_email_prefix}.json"
+    """Queues candidate data for the background writer (see candidate_writer.py).
+
+    The candidate does not wait for the disk: the write ticket is kept in the
+    session and show_save_status() reports when the data is safely stored. The
+    queue is in memory only, so "pending" is logged first: a session resumed
+    after a restart queues the same record (rebuilt from its state) again.
+    """
+    record = {
+        'candidate_info': st.session_state.candidate_info,
+        'technical_questions': st.session_state.tech_questions,
+        'technical_answers': st.session_state.Youtubes, # Using 'Youtubes'
+        'conversation_history': st.session_state.messages
+    }
 
+    set_save_status("pending")
+    st.session_state.pop("save_ticket", None)
+    st.session_state.pop("save_error", None)
     try:
-        with open(filename, 'w') as f:
-            json.dump({
-                'candidate_info': st.session_state.candidate_info,
-                'technical_questions': st.session_state.tech_questions,
-                'technical_answers': st.session_state.Youtubes, # Using 'Youtubes'
-                'conversation_history': st.session_state.messages
-            }, f, indent=4)
-        st.success(f"✅ Your data has been successfully saved as `{filename}`!")
+        st.session_state.save_ticket = get_candidate_writer().submit(record, timeout=SAVE_QUEUE_TIMEOUT)
+    except WriterBusy:
+        st.session_state.save_error = "we're saving a lot of interviews right now."
     except Exception as e:
-        st.error(f"⚠️ Oh no! There was an error saving your data: {e}")
+        st.session_state.save_error = str(e)
+
+def show_save_status():
+    """Shows the outcome of the write ticket from save_candidate_data, polling only while it is pending.
+
+    A failed save offers a retry; a save left pending by a restarted or different worker is queued again.
+    """
+    if (st.session_state.save_status == "pending" and "save_ticket" not in st.session_state
+            and "save_error" not in st.session_state):
+        save_candidate_data()
+    ticket = st.session_state.get("save_ticket")
+    if ticket is not None and not ticket.done():
+        poll_save_status()
+        return
+    if ticket is not None and ticket.status == "saved":
+        if st.session_state.save_status != "saved":
+            set_save_status("saved")
+        st.success(f"✅ Your data has been successfully saved (candidate ID `{ticket.candidate_id}`)!")
+        return
+    error = ticket.error if ticket is not None else st.session_state.get("save_error")
+    if error is None:
+        return
+    st.error(f"⚠️ Oh no! Your data has not been saved yet: {error}")
+    if st.button("Retry Saving 💾", type="primary"):
+        save_candidate_data()
+        st.rerun()
+
+@st.fragment(run_every=1.0)
+def poll_save_status():
+    """Reruns every second until the pending write resolves, then reruns the page once to stop polling."""
+    if st.session_state.save_ticket.done():
+        st.rerun()
+    st.info("💾 Saving your data...")
+
+def add_message(role, content):
+    """Appends a chat message to the history; it is logged with the next set_step() or log append."""
+    st.session_state.messages.append({"role": role, "content": content})
+    st.session_state.session_log.stage("message", role=role, content=content)
+
+def set_step(step):
+    """Moves the interview to `step`, logging the transition and how long the previous step took.
+
+    The step's staged messages and fields are logged in the same version-checked write. If
+    another worker advanced the session first, none of them are, its state is loaded instead
+    and the script reruns.
+    """
+    session_log = st.session_state.session_log
+    previous_step = st.session_state.current_step
+    try:
+        session_log.transition(step)
+        st.session_state.current_step = step
+        if session_log.needs_compaction():
+            session_log.compact({key: st.session_state[key] for key in new_session_state()})
+    except StaleSessionError:
+        reload_stale_session()
+    now = time.time()
+    step_started_at = st.session_state.get("step_started_at")
+    if step_started_at is not None:
+        metrics.observe("app_step_seconds", now - step_started_at, step=previous_step)
+    st.session_state.step_started_at = now
+
+def set_candidate_field(field, value):
+    """Records one candidate_info field in the session state; it is logged with the next set_step()."""
+    st.session_state.candidate_info[field] = value
+    st.session_state.session_log.stage("info", field=field, value=value)
+
+def set_tech_questions(questions):
+    """Stores the generated questions and resets the answers to match."""
+    st.session_state.tech_questions = questions
+    st.session_state.Youtubes = {f"Q{i}": "" for i in range(1, len(questions) + 1)} # Using 'Youtubes'
+    st.session_state.session_log.stage("questions", questions=questions)
+
+def set_answer(key, value):
+    """Records an answer edit, logging it only when the text changed."""
+    if st.session_state.Youtubes.get(key) != value: # Using 'Youtubes'
+        st.session_state.Youtubes[key] = value
+        log_event("answer", key=key, value=value)
+
+def mark_conversation_ended():
+    """Flags the conversation as ended and forces the session log to disk."""
+    st.session_state.conversation_ended = True
+    log_event("ended")
+    st.session_state.session_log.sync()
 
 def reset_conversation():
     """Resets all session state variables to start a new conversation."""
-    st.session_state.messages = []
-    st.session_state.current_step = 'greeting'
-    st.session_state.candidate_info = {
-        'full_name': '', 'email': '', 'phone': '',
-        'experience': '', 'position': '',
-        'location': '', 'tech_stack': []
-    }
-    st.session_state.tech_questions = []
-    st.session_state.conversation_ended = False
-    st.session_state.Youtubes = {} # Using 'Youtubes'
+    st.session_state.session_log.close()
+    st.session_state.session_log = open_session_log()
+    st.query_params["sid"] = st.session_state.session_log.session_id
+    for key, value in new_session_state().items():
+        st.session_state[key] = value
+    st.session_state.pop("step_started_at", None)
+    st.session_state.pop("save_ticket", None)
+    st.session_state.pop("save_error", None)
     st.rerun()
 
 # ---------------- Header -------------------
@@ -248,212 +207,166 @@ st.title("TalentScout AI Interviewer 🌟")
 st.markdown("---")
 
 # ---------------- Message Display Area -------------------
-# Display chat messages from history on app rerun
+# Only the latest messages get their own chat bubble; older ones are folded into a single
+# Markdown block that is built incrementally, so each rerun emits a constant number of elements.
+RECENT_MESSAGES_SHOWN = 6
+
+def _message_markdown(message):
+    speaker = "🧑 **You**" if message["role"] == "user" else "🤖 **TalentScout**"
+    return f"{speaker}\n\n{message['content']}"
+
+def earlier_history_markdown(messages):
+    """Returns Markdown for all but the most recent messages, rendering only messages not seen before."""
+    cutoff = max(0, len(messages) - RECENT_MESSAGES_SHOWN)
+    rendered_count, rendered = st.session_state.get('rendered_history', (0, ""))
+    if rendered_count > cutoff: # The conversation was reset or replaced
+        rendered_count, rendered = 0, ""
+    for message in messages[rendered_count:cutoff]:
+        rendered += ("\n\n---\n\n" if rendered else "") + _message_markdown(message)
+    st.session_state.rendered_history = (cutoff, rendered)
+    return rendered
+
 chat_placeholder = st.container() # Create a container for messages
 with chat_placeholder:
-    for message in st.session_state.messages:
+    earlier_history = earlier_history_markdown(st.session_state.messages)
+    if earlier_history:
+        earlier_count = len(st.session_state.messages) - RECENT_MESSAGES_SHOWN
+        with st.expander(f"Earlier conversation ({earlier_count} messages)"):
+            st.markdown(earlier_history)
+    for message in st.session_state.messages[-RECENT_MESSAGES_SHOWN:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
 # ---------------- Main Conversation Logic -------------------
 # Use a single chat input at the bottom, dynamic based on step
 user_input_key = "chat_input_general"
-current_step = st.session_state.current_step
 
-if st.session_state.conversation_ended:
-    st.info("🎉 **Conversation Completed!** Thank you for your time with TalentScout. We'll be in touch soon!")
-    if st.button("Start New Conversation 🔄", type="primary"):
-        reset_conversation()
-else:
-    # --- Initial Greeting and Info Collection ---
-    if current_step == 'greeting':
-        if not st.session_state.messages:
-            greeting_msg = greet_candidate()
+# --- Initial Greeting ---
+def handle_greeting_step(step):
+    if not st.session_state.messages:
+        add_message("assistant", greet_candidate())
+        set_step(step.next_step)
+        st.rerun() # Rerun to display the greeting
+
+# --- Info Collection (one chat answer per step) ---
+def handle_chat_step(step):
+    if user_response := st.chat_input(step.prompt, key=user_input_key):
+        if step.validate(user_response):
+            add_message("user", user_response)
+            set_candidate_field(step.field, user_response.strip())
+            add_message("assistant", step.acknowledge(user_response))
+            set_step(step.next_step)
+            st.rerun()
+        else:
+            st.toast(step.error_message, icon="⚠️")
+
+# --- Tech Stack Input (multi-line) ---
+def handle_tech_stack_step(step):
+    # Prompt for tech stack will be directly in the chat message
+    if st.session_state.messages[-1]["content"] != step.prompt: # Avoid repeating prompt
+        with st.chat_message("assistant"):
+            st.markdown(step.prompt)
+        add_message("assistant", step.prompt)
+
+    # Use a text area for tech stack input, displayed explicitly
+    st.markdown("<div style='margin-top: 20px; padding: 15px; border-radius: 10px; background-color: #f0f0f0;'>", unsafe_allow_html=True)
+    tech_stack_input = st.text_area("Your Tech Stack", key="tech_input_area", height=120, placeholder="Example: Python, Django, React, Kubernetes")
+    if st.button("Submit Tech Stack ✅", key="submit_tech_stack_btn", type="primary"):
+        if tech_stack_input.strip():
+            techs = [t.strip() for t in tech_stack_input.split(',') if t.strip()]
+            set_candidate_field(step.field, techs)
+            user_msg = TECH_STACK_MESSAGE.format(value=", ".join(techs))
+            with st.chat_message("user"):
+                st.markdown(user_msg)
+            add_message("user", user_msg)
+
+            # Stream questions into the chat bubble and the answers preview as each one arrives
+            question_msg = QUESTIONS_INTRO
+            questions = []
             with st.chat_message("assistant"):
-                st.markdown(greeting_msg)
-            st.session_state.messages.append({"role": "assistant", "content": greeting_msg})
-            st.session_state.current_step = 'ask_name'
-            st.rerun() # Rerun to display the greeting
-
-    elif current_step == 'ask_name':
-        prompt_text = "👤 What's your full name?"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if len(user_response.strip()) > 1:
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['full_name'] = user_response.strip()
-                ai_response = f"Nice to meet you, **{user_response.strip()}**! 👋"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_email'
-                st.rerun()
-            else:
-                st.toast("Please enter a valid full name. 🤔", icon="⚠️")
-
-    elif current_step == 'ask_email':
-        prompt_text = "📧 Could you please share your email address?"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if '@' in user_response and '.' in user_response:
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['email'] = user_response.strip()
-                ai_response = "Got it! Your email has been recorded. 📧"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_phone'
-                st.rerun()
+                question_placeholder = st.empty()
+                question_placeholder.markdown("✨ Generating tailored technical questions... This might take a moment!")
+            answers_preview = st.container()
+            try:
+                for q in stream_technical_questions(techs, st.session_state.candidate_info.get('position')):
+                    questions.append(q)
+                    question_msg += f"\n\n**Q{len(questions)}.** {q}"
+                    question_placeholder.markdown(question_msg + " ▌")
+                    with answers_preview:
+                        st.text_area(f"**Question {len(questions)}:** {q}", key=f"ans_preview_{len(questions)}", height=80, disabled=True)
+            except QuestionGenerationError as e:
+                error_msg = QUESTIONS_ERROR_MESSAGE.format(value=e)
+                question_placeholder.markdown(error_msg)
+                add_message("assistant", error_msg)
             else:
-                st.toast("Please enter a valid email address. ❌", icon="⚠️")
-
-    elif current_step == 'ask_phone':
-        prompt_text = "📞 What's your phone number?"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if len(user_response.strip()) >= 8 and user_response.strip().replace(' ', '').replace('-', '').isdigit():
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['phone'] = user_response.strip()
-                ai_response = "Thanks for your phone number! 📞"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_experience'
+                question_placeholder.markdown(question_msg)
+                set_tech_questions(questions)
+                add_message("assistant", question_msg)
+                set_step(step.next_step)
                 st.rerun()
-            else:
-                st.toast("Please enter a valid phone number (at least 8 digits, numbers only). 🔢", icon="⚠️")
-
-    elif current_step == 'ask_experience':
-        prompt_text = "💼 How many years of professional experience do you have? (e.g., 5)"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if user_response.strip().isdigit():
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['experience'] = user_response.strip()
-                ai_response = f"Okay, **{user_response.strip()} years** of experience. That's helpful! 👍"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_position'
+        else:
+            st.toast(step.error_message, icon="⚠️")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# --- Technical Questions & Answers ---
+def handle_technical_questions_step(step):
+    # Display questions and text areas dynamically
+    st.markdown("### 📝 Your Technical Answers:", unsafe_allow_html=True)
+    st.info("💡 Please provide detailed answers for each question below. You can edit them before submitting.")
+
+    with st.form("technical_answers_form", clear_on_submit=False):
+        for idx, q in enumerate(st.session_state.tech_questions, 1):
+            default_answer = st.session_state.Youtubes.get(f"Q{idx}", "") # Using 'Youtubes'
+            answer = st.text_area(f"**Question {idx}:** {q}", key=f"ans_{idx}", value=default_answer, height=180)
+            set_answer(f"Q{idx}", answer) # Update state as user types
+
+        submitted = st.form_submit_button("Submit All Answers ✨", type="primary")
+        if submitted:
+            if all(st.session_state.Youtubes[q_key].strip() for q_key in st.session_state.Youtubes): # Using 'Youtubes'
+                final_user_response = ANSWERS_INTRO
+                for idx, q in enumerate(st.session_state.tech_questions, 1):
+                    answer = st.session_state.Youtubes[f"Q{idx}"] # Using 'Youtubes'
+                    final_user_response += f"**Q{idx}:** {q}\n**A:** {answer}\n\n"
+
+                add_message("user", final_user_response)
+
+                end_msg = end_conversation()
+                add_message("assistant", end_msg)
+                mark_conversation_ended()
+                save_candidate_data()
                 st.rerun()
             else:
-                st.toast("Please enter a number for years of experience. 🧐", icon="⚠️")
-
-    elif current_step == 'ask_position':
-        prompt_text = "🎯 What kind of position(s) are you interested in? (e.g., Software Engineer, Data Scientist)"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if len(user_response.strip()) > 2:
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['position'] = user_response.strip()
-                ai_response = f"Understood, you're interested in **{user_response.strip()}** roles. 🚀"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_location'
-                st.rerun()
-            else:
-                st.toast("Please tell me about the positions you're interested in. 📝", icon="⚠️")
-
-    elif current_step == 'ask_location':
-        prompt_text = "🌍 What's your current or preferred work location? (e.g., Bengaluru, Remote)"
-        if user_response := st.chat_input(prompt_text, key=user_input_key):
-            if len(user_response.strip()) > 2:
-                with st.chat_message("user"):
-                    st.markdown(user_response)
-                st.session_state.messages.append({"role": "user", "content": user_response})
-                st.session_state.candidate_info['location'] = user_response.strip()
-                ai_response = f"Great! Your location is **{user_response.strip()}**. 📍 Now, let's talk tech!"
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                st.session_state.current_step = 'ask_tech_stack'
-                st.rerun()
-            else:
-                st.toast("Please provide your location. 🌎", icon="⚠️")
-
-    # --- Tech Stack Input (multi-line) ---
-    elif current_step == 'ask_tech_stack':
-        # Prompt for tech stack will be directly in the chat message
-        if not st.session_state.messages[-1]["content"].startswith("🛠️ Tell me about your primary tech stack"): # Avoid repeating prompt
-             tech_stack_prompt = "🛠️ Tell me about your primary tech stack or key skills, separated by commas (e.g., Python, React, AWS, SQL). This helps me tailor questions for you!"
-             with st.chat_message("assistant"):
-                 st.markdown(tech_stack_prompt)
-             st.session_state.messages.append({"role": "assistant", "content": tech_stack_prompt})
-
-        # Use a text area for tech stack input, displayed explicitly
-        st.markdown("<div style='margin-top: 20px; padding: 15px; border-radius: 10px; background-color: #f0f0f0;'>", unsafe_allow_html=True)
-        tech_stack_input = st.text_area("Your Tech Stack", key="tech_input_area", height=120, placeholder="Example: Python, Django, React, Kubernetes")
-        if st.button("Submit Tech Stack ✅", key="submit_tech_stack_btn", type="primary"):
-            if tech_stack_input.strip():
-                techs = [t.strip() for t in tech_stack_input.split(',') if t.strip()]
-                st.session_state.candidate_info['tech_stack'] = techs
-                user_msg = f"My tech stack includes: {', '.join(techs)}"
-                with st.chat_message("user"):
-                    st.markdown(user_msg)
-                st.session_state.messages.append({"role": "user", "content": user_msg})
-
-                with st.spinner("✨ Generating tailored technical questions... This might take a moment!"):
-                    questions = generate_technical_questions(techs)
-                    if questions and "Error:" not in questions[0]:
-                        st.session_state.tech_questions = questions
-                        question_msg = "Excellent! Here are a few technical questions for you. Please answer them in detail. Take your time! 👇"
-                        for idx, q in enumerate(questions, 1):
-                            question_msg += f"\n\n**Q{idx}.** {q}"
-                        with st.chat_message("assistant"):
-                            st.markdown(question_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": question_msg})
-                        st.session_state.Youtubes = {f"Q{i}": "" for i in range(1, len(questions) + 1)} # Using 'Youtubes'
-                        st.session_state.current_step = 'technical_questions'
-                        st.rerun()
-                    else:
-                        error_msg = f"⚠️ I encountered an issue generating questions for your tech stack. Please try again or simplify your tech stack. {questions[0]}"
-                        with st.chat_message("assistant"):
-                            st.markdown(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
-            else:
-                st.toast("Please list your tech stack before submitting. 🤔", icon="⚠️")
-        st.markdown("</div>", unsafe_allow_html=True)
-
+                st.toast(step.error_message, icon="⚠️")
+
+STEP_HANDLERS = {
+    'greeting': handle_greeting_step,
+    'chat': handle_chat_step,
+    'tech_stack': handle_tech_stack_step,
+    'technical_questions': handle_technical_questions_step,
+}
+
+# The flow can be chosen per job opening with ?flow=<name>. It is pinned when the session starts
+# (logged with the greeting), so a later change to the URL cannot switch flows mid-interview.
+if st.session_state.flow is None:
+    st.session_state.flow = get_flow(st.query_params.get("flow")).name
+    st.session_state.session_log.stage("flow", flow=st.session_state.flow)
+interview_flow = get_flow(st.session_state.flow)
+current_step = st.session_state.current_step
 
-    # --- Technical Questions & Answers ---
-    elif current_step == 'technical_questions':
-        # Display questions and text areas dynamically
-        st.markdown("### 📝 Your Technical Answers:", unsafe_allow_html=True)
-        st.info("💡 Please provide detailed answers for each question below. You can edit them before submitting.")
-
-        with st.form("technical_answers_form", clear_on_submit=False):
-            for idx, q in enumerate(st.session_state.tech_questions, 1):
-                default_answer = st.session_state.Youtubes.get(f"Q{idx}", "") # Using 'Youtubes'
-                answer = st.text_area(f"**Question {idx}:** {q}", key=f"ans_{idx}", value=default_answer, height=180)
-                st.session_state.Youtubes[f"Q{idx}"] = answer # Update state as user types # Using 'Youtubes'
-
-            submitted = st.form_submit_button("Submit All Answers ✨", type="primary")
-            if submitted:
-                if all(st.session_state.Youtubes[q_key].strip() for q_key in st.session_state.Youtubes): # Using 'Youtubes'
-                    final_user_response = "Here are my answers to the technical questions: \n\n"
-                    for idx, q in enumerate(st.session_state.tech_questions, 1):
-                        answer = st.session_state.Youtubes[f"Q{idx}"] # Using 'Youtubes'
-                        final_user_response += f"**Q{idx}:** {q}\n**A:** {answer}\n\n"
-
-                    with st.chat_message("user"):
-                        st.markdown(final_user_response)
-                    st.session_state.messages.append({"role": "user", "content": final_user_response})
-
-                    end_msg = end_conversation()
-                    with st.chat_message("assistant"):
-                        st.markdown(end_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": end_msg})
-                    st.session_state.conversation_ended = True
-                    save_candidate_data()
-                    st.rerun()
-                else:
-                    st.toast("Please answer all the technical questions before submitting. 🙏", icon="⚠️")
+if st.session_state.conversation_ended:
+    st.info("🎉 **Conversation Completed!** Thank you for your time with TalentScout. We'll be in touch soon!")
+    show_save_status()
+    if st.button("Start New Conversation 🔄", type="primary"):
+        reset_conversation()
+else:
+    step = interview_flow.get(current_step)
+    if step is None:
+        # A session logged before flows were pinned, or whose flow has since been redefined:
+        # resume at the first step of this flow that still has no answer
+        set_step(interview_flow.first_unfinished_step(st.session_state.candidate_info,
+                                                      bool(st.session_state.messages)))
+        st.rerun()
+    STEP_HANDLERS[step.kind](step)
 
     # --- End Conversation Button (always visible unless conversation completed or at greeting) ---
     if not st.session_state.conversation_ended and current_step != 'greeting':
@@ -461,10 +374,11 @@ else:
         st.markdown("<div class='bottom-section'>", unsafe_allow_html=True)
         if st.button("End Conversation Early 👋", help="Click here to end the conversation and save your progress so far."):
             end_msg = end_conversation()
-            with st.chat_message("assistant"):
-                st.markdown(end_msg)
-            st.session_state.messages.append({"role": "assistant", "content": end_msg})
-            st.session_state.conversation_ended = True
+            add_message("assistant", end_msg)
+            mark_conversation_ended()
             save_candidate_data()
             st.rerun()
-        st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown("</div>", unsafe_allow_html=True)
+
+# Runs that end in st.rerun() stop early and are not recorded here
+metrics.observe("app_script_run_seconds", time.perf_counter() - run_started, step=current_step)
@@ -0,0 +1,157 @@
+# Custom CSS for app.py. Kept in a module so the literal is built once per process, not on every rerun.
+APP_CSS = """
+<style>
+    /* Overall App Styling */
+    .stApp {
+        background: linear-gradient(to bottom right, #e0f7fa, #ffffff); /* Gentle gradient background */
+        color: #333333; /* Darker text for contrast */
+        font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif;
+    }
+
+    /* Header Styling */
+    h1 {
+        color: #1a237e; /* Deep blue for header */
+        text-align: center;
+        margin-bottom: 30px;
+        font-size: 2.7rem;
+        font-weight: 700;
+        text-shadow: 1px 1px 3px rgba(0,0,0,0.15);
+        padding-top: 15px;
+    }
+
+    /* Chat Message Styling */
+    .stChatMessage {
+        border-radius: 25px; /* More rounded, softer look */
+        padding: 18px 22px;
+        margin-bottom: 15px;
+        font-size: 1.08rem;
+        line-height: 1.65;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.1); /* More prominent shadow */
+        transition: transform 0.2s ease-out, box-shadow 0.2s ease-out; /* Smooth transition */
+        animation: fadeIn 0.5s ease-out; /* Fade in animation */
+    }
+
+    @keyframes fadeIn {
+        from { opacity: 0; transform: translateY(10px); }
+        to { opacity: 1; transform: translateY(0); }
+    }
+
+    /* User Message Styling */
+    .stChatMessage.stChatMessage-user {
+        background-color: #bbdefb; /* Lighter blue, more friendly */
+        border-left: 7px solid #2196f3; /* Stronger blue accent */
+        text-align: left;
+        margin-left: 20%; /* Pushes user messages to the right */
+        border-bottom-left-radius: 5px; /* Square off bottom-left for user */
+    }
+
+    /* Assistant Message Styling */
+    .stChatMessage.stChatMessage-assistant {
+        background-color: #dcedc8; /* Soft green, calming */
+        border-left: 7px solid #4caf50; /* Stronger green accent */
+        text-align: left;
+        margin-right: 20%; /* Pushes assistant messages to the left */
+        border-bottom-right-radius: 5px; /* Square off bottom-right for assistant */
+    }
+
+    /* Chat Input Container */
+    .stChatInputContainer {
+        margin-top: 40px;
+        padding: 25px;
+        border-top: 1px solid #e0e0e0;
+        background-color: #ffffff; /* White background */
+        border-radius: 20px; /* More rounded */
+        box-shadow: 0 -5px 20px rgba(0,0,0,0.08); /* Stronger shadow for "floating" effect */
+        position: sticky; /* Keeps it at the bottom */
+        bottom: 0;
+        z-index: 1000;
+        margin-left: -1rem; /* Adjust for padding on small screens */
+        margin-right: -1rem;
+        width: calc(100% + 2rem); /* Ensure full width */
+    }
+    .stChatInputContainer > div > div > label {
+        font-size: 1.1rem; /* Larger label for input */
+        font-weight: 600;
+        color: #555555;
+    }
+
+    /* Streamlit Button Styling */
+    .stButton > button {
+        background-color: #673ab7; /* Deep purple */
+        color: white;
+        border-radius: 12px; /* More rounded buttons */
+        padding: 0.9rem 2rem;
+        font-weight: 600;
+        border: none;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.25); /* More prominent shadow */
+        transition: background-color 0.3s ease, transform 0.2s ease, box-shadow 0.3s ease;
+        letter-spacing: 0.5px;
+    }
+    .stButton > button:hover {
+        background-color: #512da8; /* Darker purple on hover */
+        transform: translateY(-4px); /* Lift effect */
+        box-shadow: 0 8px 20px rgba(0,0,0,0.3);
+    }
+    .stButton > button:active {
+        transform: translateY(0);
+        box-shadow: 0 2px 5px rgba(0,0,0,0.2);
+    }
+
+    /* Primary button for "Start New Conversation" / "Submit" */
+    /* Targeting by data-testid or specific class if type="primary" is used */
+    .stButton[data-testid*="primary"] > button,
+    .stButton.css-1r6dm7b > button { /* Specific class for primary if present */
+        background-color: #007bff; /* Bright blue for primary actions */
+        box-shadow: 0 5px 15px rgba(0,123,255,0.3);
+    }
+    .stButton[data-testid*="primary"] > button:hover,
+    .stButton.css-1r6dm7b > button:hover {
+        background-color: #0056b3;
+        box-shadow: 0 8px 20px rgba(0,123,255,0.4);
+    }
+
+    /* Text Area Styling for detailed inputs (Tech Stack, Answers) */
+    .stTextArea > label {
+        font-weight: 600;
+        color: #495057;
+        margin-bottom: 10px;
+        font-size: 1.1rem;
+    }
+    .stTextArea > div > div > textarea {
+        border-radius: 15px; /* More rounded */
+        border: 1px solid #ced4da;
+        padding: 15px;
+        box-shadow: inset 0 2px 5px rgba(0,0,0,0.08); /* Subtle inset shadow */
+        transition: border-color 0.2s ease, box-shadow 0.2s ease;
+        font-size: 1rem;
+        min-height: 120px; /* Ensure sufficient height */
+    }
+    .stTextArea > div > div > textarea:focus {
+        border-color: #80bdff;
+        box-shadow: 0 0 0 0.25rem rgba(0,123,255,.25); /* Focus ring */
+        outline: none;
+    }
+
+    /* Alerts (Info, Success, Warning, Error) */
+    .stAlert {
+        border-radius: 15px;
+        padding: 1.2rem;
+        margin-bottom: 1.5rem;
+        font-size: 1.05rem;
+        line-height: 1.5;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.1);
+    }
+    .stAlert.stAlert-info { background-color: #e3f2fd; border-left: 6px solid #2196f3; }
+    .stAlert.stAlert-success { background-color: #e8f5e9; border-left: 6px solid #4caf50; }
+    .stAlert.stAlert-warning { background-color: #fff3e0; border-left: 6px solid #ff9800; }
+    .stAlert.stAlert-error { background-color: #ffebee; border-left: 6px solid #f44336; }
+
+    /* Footer / Bottom Section */
+    .bottom-section {
+        margin-top: 40px;
+        padding-top: 20px;
+        border-top: 1px solid #e0e0e0;
+        text-align: center;
+    }
+</style>
+"""
@@ -0,0 +1,156 @@
+"""Headless batch runner for generate_technical_questions.
+
+Each input line is a JSON object with a "tech_stack" (list or comma-separated
+string) and optional "id" and "position"; a bare JSON list or string is also accepted.
+Results are written as JSONL in input order. Re-running with the same output
+file resumes after the last completed line:
+
+    python batch_generate.py stacks.jsonl questions.jsonl --concurrency 4 --rps 2
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_client import get_genai
+from metrics import metrics, start_exporters_from_env
+from rate_limit import TokenBucket
+
+
+def parse_stack(record):
+    """Returns (record_id, tech_stack) from one input record.
+
+    Raises ValueError if the record has no usable tech stack: generation would
+    otherwise return the UI's "please tell me your skills" prompt as questions.
+    """
+    record_id = None
+    if isinstance(record, dict):
+        record_id = record.get("id")
+        record = record.get("tech_stack", [])
+    if isinstance(record, str):
+        record = record.split(",")
+    if not isinstance(record, list):
+        raise ValueError(f"tech_stack must be a list or a comma-separated string, not {type(record).__name__}")
+    tech_stack = [t.strip() for t in record if isinstance(t, str) and t.strip()]
+    if not tech_stack:
+        raise ValueError("tech_stack is empty")
+    return record_id, tech_stack
+
+
+def iter_input(path, skip=0):
+    """Streams (line_number, record) pairs, skipping the first `skip` non-blank lines."""
+    with open(path, encoding="utf-8") as f:
+        seen = 0
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            seen += 1
+            if seen <= skip:
+                continue
+            yield line_number, line
+
+
+def completed_lines(output_path):
+    """Counts complete result lines in an existing output file, dropping a torn last line."""
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    return data.count(b"\n")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_one(line_number, line, bucket):
+    from chatbot_logic import generate_technical_questions
+
+    start = time.perf_counter()
+    record_id, tech_stack, questions, error = None, [], [], None
+    try:
+        record = json.loads(line)
+        if isinstance(record, dict):
+            record_id = record.get("id")  # Kept on the error row if the stack is unusable
+        record_id, tech_stack = parse_stack(record)
+        position = record.get("position") if isinstance(record, dict) else None
+        bucket.acquire()
+        questions = generate_technical_questions(tech_stack, position)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    result = {"line": line_number, "id": record_id, "tech_stack": tech_stack,
+              "questions": [] if error else questions, "error": error}
+    return result, time.perf_counter() - start
+
+
+def run_batch(input_path, output_path, concurrency=4, requests_per_second=2.0):
+    """Generates questions for every input line with bounded concurrency; returns a stats dict."""
+    done = completed_lines(output_path)
+    if done:
+        print(f"Resuming after {done} completed records.")
+    bucket = TokenBucket(requests_per_second, capacity=concurrency)
+    latencies, failures, processed = [], 0, 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            open(output_path, "a", encoding="utf-8") as out:
+        window = deque()  # futures in input order; at most 2x concurrency outstanding
+
+        def drain(block_until_size):
+            nonlocal failures, processed
+            while window and (len(window) > block_until_size or window[0].done()):
+                result, latency = window.popleft().result()
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()  # every written line is a durable checkpoint
+                latencies.append(latency)
+                processed += 1
+                failures += bool(result["error"])
+
+        for line_number, line in iter_input(input_path, skip=done):
+            window.append(executor.submit(run_one, line_number, line, bucket))
+            drain(2 * concurrency)
+        drain(0)
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "processed": processed,
+        "failures": failures,
+        "seconds": elapsed,
+        "requests_per_second": processed / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate technical questions for a JSONL file of tech stacks.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=2.0, help="Maximum generation calls per second.")
+    args = parser.parse_args(argv)
+
+    get_genai()
+    start_exporters_from_env()
+
+    stats = run_batch(args.input, args.output, args.concurrency, args.rps)
+    if os.getenv("METRICS_JSON_PATH"):
+        metrics.dump_json(os.getenv("METRICS_JSON_PATH"))
+    print(f"\nProcessed {stats['processed']} records in {stats['seconds']:.1f}s "
+          f"({stats['requests_per_second']:.2f} req/s), {stats['failures']} failures")
+    print(f"Latency p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms, "
+          f"p99 {stats['p99'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Load test against a local fake Gemini client, compared with a stored baseline.
+
+Scenarios (all by default):
+
+- generate: generate_technical_questions from `--concurrency` threads
+- storage:  one unbatched candidate save (store upsert + search index); see
+            bench_writes.py for the group-commit writer that save_candidate_data uses
+- app:      the full app.py interview flow in headless Streamlit AppTest sessions,
+            `--concurrency` worker processes running them side by side
+
+Each reports throughput, p50/p95/p99 latency and, for app sessions, the
+growth in peak RSS per session. Results are compared with benchmarks/baseline.json:
+
+    python benchmarks/bench_load.py --concurrency 8 --requests 200 --latency lognormal:0.3,0.5
+    python benchmarks/bench_load.py --scenarios generate storage --quota-rate 0.1 --save-baseline
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+SKILL_POOL = ["Python", "Django", "React", "Go", "Kubernetes", "AWS", "PostgreSQL", "Java",
+              "Spring", "TypeScript", "Node.js", "Docker", "Rust", "Kafka", "Redis", "GraphQL"]
+# For each metric: True if higher is better
+METRIC_DIRECTION = {"throughput": True, "p50": False, "p95": False, "p99": False,
+                    "rerun_p50": False, "rerun_p95": False, "rerun_p99": False, "kb_per_session": False}
+
+
+def random_stack(rng):
+    return rng.sample(SKILL_POOL, rng.randint(1, 4))
+
+
+def summarize(latencies, elapsed, errors):
+    from batch_generate import percentile
+
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def run_concurrently(task, requests, concurrency):
+    """Runs task(i) `requests` times on `concurrency` threads; returns (latencies, elapsed, errors)."""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            task(i)
+        except Exception as e:
+            with lock:
+                errors += 1
+            print(f"  request {i} failed: {type(e).__name__}: {e}")
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(requests)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def bench_generate(args, config):
+    import chatbot_logic
+    from question_cache import QuestionCache
+
+    if not args.cache:
+        # Never serve a stored variant, so every request exercises the model path
+        chatbot_logic.question_cache = QuestionCache(max_variants=sys.maxsize)
+    rng = random.Random(args.seed)
+    stacks = [random_stack(rng) for _ in range(args.requests)]
+    return summarize(*run_concurrently(
+        lambda i: chatbot_logic.generate_technical_questions(stacks[i]), args.requests, args.concurrency))
+
+
+def make_record(i, rng):
+    stack = random_stack(rng)
+    messages = [{"role": "assistant" if j % 2 == 0 else "user", "content": f"Message {j} " * 20}
+                for j in range(20)]
+    return {
+        "candidate_info": {
+            "full_name": f"Candidate {i}", "email": f"candidate{i}@example.com", "phone": "555 0100 200",
+            "experience": str(rng.randint(0, 15)), "position": "Backend Engineer",
+            "location": rng.choice(["Remote", "Bengaluru", "Berlin"]), "tech_stack": stack,
+        },
+        "technical_questions": [f"Question {q} about {stack[0]}?" for q in range(5)],
+        "technical_answers": {f"Q{q}": "An answer. " * 30 for q in range(1, 6)},
+        "conversation_history": messages,
+    }
+
+
+def bench_storage(args, config):
+    from candidate_search import get_candidate_index, index_candidate
+    from candidate_store import get_candidate_store
+
+    store = get_candidate_store()
+    get_candidate_index()  # Built up front so index_candidate updates it, as in a warm app process
+    rng = random.Random(args.seed)
+    records = [make_record(i, rng) for i in range(args.requests)]
+
+    def save(i):
+        # A save committed on its own, as CandidateWriter does for a batch of one
+        candidate_id = store.upsert(records[i])
+        index_candidate(candidate_id, records[i])
+
+    return summarize(*run_concurrently(save, args.requests, args.concurrency))
+
+
+def run_interview(i, rerun_latencies, lock):
+    """Drives one candidate through the default flow, recording each script run; returns the AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    def run(at):
+        start = time.perf_counter()
+        at.run()
+        with lock:
+            rerun_latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    run(at)
+    for answer in (f"Candidate {i}", f"candidate{i}@example.com", "555 0100 200", "5",
+                   "Backend Engineer", "Remote"):
+        at.chat_input[0].set_value(answer)
+        run(at)
+    at.text_area(key="tech_input_area").set_value(", ".join(random_stack(random.Random(i))))
+    at.button(key="submit_tech_stack_btn").click()
+    run(at)
+    for idx in range(1, len(at.session_state.tech_questions) + 1):
+        at.text_area(key=f"ans_{idx}").set_value(f"Answer {idx} from candidate {i}. " * 10)
+    next(b for b in at.button if b.label.startswith("Submit All Answers")).click()
+    run(at)
+    if not at.session_state.conversation_ended:
+        raise RuntimeError(f"Interview {i} did not finish (step {at.session_state.current_step}).")
+    if not at.session_state.save_ticket.wait(30):
+        raise RuntimeError(f"Interview {i} was not saved: {at.session_state.save_ticket.error}")
+    return at
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == "darwin" else peak  # macOS reports bytes, Linux KiB
+
+
+def app_worker(config, indices):
+    """Runs the interviews in `indices` one after another in this process.
+
+    Streamlit's test runtime is a per-process singleton, so concurrent sessions
+    run in separate worker processes. One untimed warm-up interview pays for
+    imports first. Returns session and rerun latencies and the growth in peak
+    RSS per finished session (tracemalloc would be exact but slows Streamlit ~10x).
+    """
+    from fake_genai import install
+
+    install(config)
+    run_interview(-1 - indices[0], [], threading.Lock())
+    session_latencies, rerun_latencies, finished = [], [], []
+    lock = threading.Lock()
+    before = peak_rss_kb()
+    for i in indices:
+        start = time.perf_counter()
+        finished.append(run_interview(i, rerun_latencies, lock))  # Kept alive so their memory is counted
+        session_latencies.append(time.perf_counter() - start)
+    return session_latencies, rerun_latencies, (peak_rss_kb() - before) / max(1, len(finished))
+
+
+def bench_app(args, config):
+    workers = min(args.concurrency, args.sessions)
+    chunks = [list(range(args.sessions))[w::workers] for w in range(workers)]
+    session_latencies, rerun_latencies, kb_per_session, errors = [], [], [], 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(app_worker, config, chunk) for chunk in chunks]:
+            try:
+                sessions, reruns, kb = future.result()
+            except Exception as e:
+                errors += 1
+                print(f"  worker failed: {type(e).__name__}: {e}")
+                continue
+            session_latencies += sessions
+            rerun_latencies += reruns
+            kb_per_session.append(kb)
+    elapsed = time.perf_counter() - start
+
+    result = summarize(session_latencies, elapsed, errors)
+    reruns = summarize(rerun_latencies, elapsed, 0)
+    result.update({
+        "rerun_p50": reruns["p50"], "rerun_p95": reruns["p95"], "rerun_p99": reruns["p99"],
+        "kb_per_session": statistics.fmean(kb_per_session) if kb_per_session else 0.0,
+    })
+    return result
+
+
+SCENARIOS = {"generate": bench_generate, "storage": bench_storage, "app": bench_app}
+
+
+def compare(results, baseline, tolerance, min_delta=0.001):
+    """Prints each metric next to its baseline; returns the list of regressions beyond `tolerance`.
+
+    Latency changes smaller than `min_delta` seconds are never flagged, so
+    sub-millisecond noise in fast scenarios does not count as a regression.
+    """
+    regressions = []
+    print(f"\n{'scenario':<10} {'metric':<15} {'current':>12} {'baseline':>12} {'change':>9}")
+    for scenario, metrics in results.items():
+        base = baseline.get("results", {}).get(scenario, {})
+        for metric, higher_is_better in METRIC_DIRECTION.items():
+            if metric not in metrics:
+                continue
+            current, previous = metrics[metric], base.get(metric)
+            if not previous:
+                print(f"{scenario:<10} {metric:<15} {current:>12.4f} {'-':>12} {'-':>9}")
+                continue
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            is_latency = metric.startswith(("p", "rerun_p"))
+            significant = not is_latency or abs(current - previous) >= min_delta
+            flag = "  REGRESSION" if worse > tolerance and significant else ""
+            print(f"{scenario:<10} {metric:<15} {current:>12.4f} {previous:>12.4f} {change:>+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{scenario}.{metric}")
+    return regressions
+
+
+def main(argv=None):
+    from fake_genai import FakeConfig
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Calls per generate/storage scenario.")
+    parser.add_argument("--sessions", type=int, default=16, help="Interviews in the app scenario.")
+    parser.add_argument("--latency", default=FakeConfig.latency, help="e.g. fixed:0.5, uniform:0.2,1.5, "
+                        "lognormal:0.8,0.4 (median, sigma), exp:0.6")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="Fraction of calls failing with 429.")
+    parser.add_argument("--chunk-delay", type=float, default=FakeConfig.chunk_delay)
+    parser.add_argument("--cache", action="store_true", help="Let the question cache serve repeat stacks.")
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%).")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Keep stores, caches and session logs out of the real candidate_data/
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    os.chdir(workdir)
+    os.environ.update({"QUESTION_CACHE_DB": "", "QUESTION_BANK_PATH": os.path.join(workdir, "no_bank.json.gz"),
+                       "CANDIDATE_DB": os.path.join(workdir, "candidates.sqlite"),
+                       "GEMINI_API_KEY": "benchmark-placeholder"})
+    sys.path.insert(0, ROOT)
+
+    from fake_genai import install
+
+    config = FakeConfig(latency=args.latency, error_rate=args.error_rate, quota_rate=args.quota_rate,
+                        chunk_delay=args.chunk_delay, seed=args.seed)
+    fake = install(config)
+
+    results = {}
+    for name in args.scenarios:
+        print(f"Running {name}...")
+        results[name] = SCENARIOS[name](args, config)
+        r = results[name]
+        print(f"  {r['count']} done, {r['errors']} errors, {r['throughput']:.2f}/s, p50 {r['p50'] * 1000:.1f} ms, "
+              f"p95 {r['p95'] * 1000:.1f} ms, p99 {r['p99'] * 1000:.1f} ms")
+        if "kb_per_session" in r:
+            print(f"  script runs p50 {r['rerun_p50'] * 1000:.1f} ms, p95 {r['rerun_p95'] * 1000:.1f} ms, "
+                  f"p99 {r['rerun_p99'] * 1000:.1f} ms; {r['kb_per_session']:.0f} KiB per session")
+    if fake.calls:  # App sessions use their own fake in each worker process
+        print(f"Fake Gemini (this process): {fake.calls} calls, {fake.injected_errors} injected failures")
+
+    run_info = {"fake": asdict(config), "concurrency": args.concurrency, "requests": args.requests,
+                "sessions": args.sessions, "cache": args.cache}
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("run") != run_info:
+            print("Note: baseline was recorded with different settings:", baseline.get("run"))
+        regressions = compare(results, baseline, args.tolerance)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"run": run_info, "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    if regressions and args.fail_on_regression:
+        sys.exit(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measures app.py rerun time against conversation length.
+
+Runs the script headlessly with Streamlit's AppTest, pre-loading a conversation
+of N messages, and reports the median rerun time for each N:
+
+    python benchmarks/bench_render.py --lengths 10 50 200 1000 --runs 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_messages(n):
+    messages = []
+    for i in range(n):
+        role = "assistant" if i % 2 == 0 else "user"
+        messages.append({"role": role, "content": f"Message **{i}** with some `markdown` and text. " * 5})
+    return messages
+
+
+def time_reruns(n_messages, runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.session_state.messages = make_messages(n_messages)
+    at.session_state.current_step = "ask_email"
+    at.run()  # First run builds any memoized state
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+    # Keep session logs and stores out of the real candidate_data/
+    os.chdir(tempfile.mkdtemp(prefix="bench_render_"))
+    sys.path.insert(0, ROOT)
+
+    print(f"{'messages':>10} {'median rerun (ms)':>18}")
+    for n in args.lengths:
+        print(f"{n:>10} {time_reruns(n, args.runs) * 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
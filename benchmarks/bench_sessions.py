@@ -0,0 +1,146 @@
+"""Measures how many interview sessions one node's session backend can sustain.
+
+Worker processes replay the session-log traffic of a complete interview (the
+same events app.py writes, with an is_stale() check per script run) against
+the chosen SESSION_BACKEND. With --contention, a fraction of sessions get a
+second writer racing the step transitions, to exercise optimistic concurrency:
+
+    python benchmarks/bench_sessions.py --backend sqlite --processes 4 --sessions 400
+    python benchmarks/bench_sessions.py --backend file --processes 1 --sessions 400
+
+"Sessions per node" is the completed-interview rate multiplied by
+--interview-minutes: the number of candidates that could be mid-interview at
+once before session storage becomes the bottleneck.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_STEPS = [("ask_name", "full_name", "Candidate"), ("ask_email", "email", "c@example.com"),
+              ("ask_phone", "phone", "555 0100 200"), ("ask_experience", "experience", "5"),
+              ("ask_position", "position", "Backend Engineer"), ("ask_location", "location", "Remote")]
+
+
+def interview(session_log, transition_latencies):
+    """Writes one interview's events; returns (events written, stale writes)."""
+    from session_store import StaleSessionError
+
+    events = conflicts = 0
+
+    def transition(step):
+        nonlocal events, conflicts
+        start = time.perf_counter()
+        try:
+            session_log.transition(step)
+        except StaleSessionError:
+            conflicts += 1
+            session_log.replay()  # What app.py does: reload, then carry on from the newer state
+        transition_latencies.append(time.perf_counter() - start)
+        events += 1
+
+    def append(event_type, **fields):
+        nonlocal events, conflicts
+        if session_log.is_stale():  # app.py checks once per script run
+            session_log.replay()
+        try:
+            session_log.append(event_type, **fields)
+        except StaleSessionError:
+            conflicts += 1
+            session_log.replay()
+        events += 1
+
+    def stage(event_type, **fields):
+        # app.py stages a step's messages and fields; they are written with its transition
+        nonlocal events
+        session_log.stage(event_type, **fields)
+        events += 1
+
+    stage("message", role="assistant", content="Hello! " * 20)
+    transition("ask_name")
+    for (step, field, value), next_step in zip(CHAT_STEPS, [s for s, _, _ in CHAT_STEPS[1:]] + ["ask_tech_stack"]):
+        stage("message", role="user", content=value)
+        stage("info", field=field, value=value)
+        stage("message", role="assistant", content=f"Thanks! {value}. " * 5)
+        transition(next_step)
+    stage("info", field="tech_stack", value=["Python", "Go"])
+    stage("message", role="user", content="My tech stack includes: Python, Go")
+    stage("questions", questions=[f"Question {i} about Python and Go?" for i in range(5)])
+    stage("message", role="assistant", content="Here are your questions. " * 10)
+    transition("technical_questions")
+    for revision in range(3):
+        for i in range(1, 6):
+            append("answer", key=f"Q{i}", value=f"Answer {i}, revision {revision}. " * 20)
+    stage("message", role="user", content="My answers. " * 50)
+    append("ended")
+    session_log.sync()
+    return events, conflicts
+
+
+def worker(backend, n_sessions, contention, seed):
+    os.environ["SESSION_BACKEND"] = backend
+    sys.path.insert(0, ROOT)
+    from session_store import open_session_log
+
+    transition_latencies, events, conflicts = [], 0, 0
+    start = time.perf_counter()
+    for i in range(n_sessions):
+        session_log = open_session_log(f"{seed:08x}{i:024x}")  # Session IDs are 32 hex digits
+        if contention and (i * 7919 + seed) % 1000 < contention * 1000:
+            # A second worker holding the same session at the same version races the first transition
+            rival = open_session_log(session_log.session_id)
+            rival.replay()
+            rival.stage("message", role="assistant", content="Hello!")
+            rival.transition("ask_name")
+        written, stale = interview(session_log, transition_latencies)
+        events += written
+        conflicts += stale
+        session_log.close()
+    return time.perf_counter() - start, events, transition_latencies, conflicts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "file"], default="sqlite")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--sessions", type=int, default=200, help="Interviews in total, across processes.")
+    parser.add_argument("--contention", type=float, default=0.0,
+                        help="Fraction of sessions with a second, racing writer (sqlite only).")
+    parser.add_argument("--interview-minutes", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_sessions_"))
+    sys.path.insert(0, ROOT)
+    from batch_generate import percentile
+
+    per_process = [args.sessions // args.processes + (p < args.sessions % args.processes)
+                   for p in range(args.processes)]
+    contention = args.contention if args.backend == "sqlite" else 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        results = list(executor.map(worker, [args.backend] * args.processes, per_process,
+                                    [contention] * args.processes, range(args.processes)))
+    elapsed = time.perf_counter() - start
+
+    events = sum(r[1] for r in results)
+    latencies = sorted(latency for r in results for latency in r[2])
+    conflicts = sum(r[3] for r in results)
+    rate = args.sessions / elapsed
+    print(f"backend {args.backend}, {args.processes} processes, {args.sessions} interviews in {elapsed:.2f}s")
+    print(f"  {rate:.1f} interviews/s, {events / elapsed:.0f} events/s")
+    print(f"  step transition p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"mean {statistics.fmean(latencies) * 1000:.2f} ms")
+    if contention:
+        print(f"  {conflicts} stale writes detected and reloaded")
+    print(f"  ~{rate * args.interview_minutes * 60:,.0f} concurrent sessions per node "
+          f"at {args.interview_minutes:g} minutes per interview (session storage only)")
+
+
+if __name__ == "__main__":
+    main()
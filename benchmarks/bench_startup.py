@@ -0,0 +1,113 @@
+"""Measures cold-start and per-rerun script time of app.py before and after lazy SDK loading.
+
+Two trees are compared: the baseline, exported from a git revision (by
+default the merge-base of HEAD and the main branch, i.e. the code before this
+branch's changes), and the patched tree (a revision, or by default the
+working tree). For each one, in a fresh interpreter whose working directory
+is a temporary folder (so nothing is written under the repository's
+candidate_data/), it times:
+
+- `import chatbot_logic`
+- the first headless script run of app.py (Streamlit's AppTest)
+- the median rerun of app.py in the same AppTest session
+
+AppTest compiles the script afresh on every run, while a Streamlit server
+compiles it once and keeps the bytecode in a process-wide ScriptCache; the
+reruns here share one ScriptCache too, so they time the script itself.
+
+    python benchmarks/bench_startup.py --runs 5 [--baseline REV] [--patched REV]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import chatbot_logic; print(time.perf_counter() - t)"
+
+APP_SNIPPET = """
+import json, os, statistics, sys, time
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+script_cache = ScriptCache()
+# One cache for every run, as in the server
+app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+at = AppTest.from_file(os.path.join(sys.argv[1], "app.py"), default_timeout=60)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({"first": first, "rerun": statistics.median(reruns), "errors": len(at.exception)}))
+"""
+
+
+def merge_base(branch):
+    """The commit where HEAD left `branch`; raises SystemExit if git cannot find it."""
+    out = subprocess.run(["git", "-C", ROOT, "merge-base", "HEAD", branch], capture_output=True, text=True)
+    if out.returncode:
+        raise SystemExit(f"No merge-base with {branch!r} ({out.stderr.strip()}); pass --baseline REV.")
+    return out.stdout.strip()[:12]
+
+
+def export_tree(rev, dest):
+    """Extracts the files of git revision `rev` into `dest`."""
+    archive = subprocess.run(["git", "-C", ROOT, "archive", "--format=tar", rev],
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return dest
+
+
+def run_python(tree, args):
+    """Runs Python with `tree` first on the path, in a fresh temporary working directory."""
+    env = dict(os.environ, PYTHONPATH=tree)
+    with tempfile.TemporaryDirectory(prefix="bench_startup_cwd_") as cwd:
+        out = subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"{' '.join(args[:2])} failed in {tree}:\n{out.stderr[-2000:]}")
+    return out.stdout.strip().splitlines()[-1]
+
+
+def measure(tree, runs):
+    imports = [float(run_python(tree, ["-c", IMPORT_SNIPPET])) for _ in range(runs)]
+    app = json.loads(run_python(tree, ["-c", APP_SNIPPET, tree, str(runs)]))
+    return {"import": statistics.median(imports), **app}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="Git revision to measure as the baseline "
+                                           "(default: the merge-base with --main-branch).")
+    parser.add_argument("--main-branch", default="main")
+    parser.add_argument("--patched", help="Git revision to measure as the patched tree (default: working tree).")
+    args = parser.parse_args(argv)
+
+    args.baseline = args.baseline or merge_base(args.main_branch)
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+    with tempfile.TemporaryDirectory(prefix="bench_startup_tree_") as trees:
+        baseline = export_tree(args.baseline, os.path.join(trees, "baseline"))
+        patched = export_tree(args.patched, os.path.join(trees, "patched")) if args.patched else ROOT
+        results = {
+            f"baseline ({args.baseline})": measure(baseline, args.runs),
+            f"patched ({args.patched or 'working tree'})": measure(patched, args.runs),
+        }
+
+    print(f"{'':<28} {'import chatbot_logic':>21} {'app first run':>14} {'app rerun':>10}")
+    for label, r in results.items():
+        print(f"{label:<28} {r['import'] * 1000:18.1f} ms {r['first'] * 1000:11.1f} ms "
+              f"{r['rerun'] * 1000:7.1f} ms" + (f"  ({r['errors']} app exceptions)" if r["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
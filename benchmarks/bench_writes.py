@@ -0,0 +1,128 @@
+"""Submit latency and write throughput of save_candidate_data with many concurrent sessions.
+
+Each of `--sessions` threads (one per Streamlit script thread) saves
+`--saves` candidate records, and the two persistence paths are compared:
+
+- sync:   store.upsert() in the session thread, as save_candidate_data used to
+- writer: candidate_writer.CandidateWriter.submit(), with group commit in one
+          background thread; "ack" is the time until the write is committed
+
+--disk-delay adds a fixed cost per transaction to simulate a slow disk, and a
+small --queue shows backpressure (submits wait, or fail after --timeout):
+
+    python benchmarks/bench_writes.py --sessions 32 --saves 20
+    python benchmarks/bench_writes.py --sessions 32 --saves 20 --disk-delay 0.02 --queue 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_generate import percentile  # noqa: E402
+from bench_load import make_record  # noqa: E402
+from candidate_store import SqliteCandidateStore  # noqa: E402
+from candidate_writer import CandidateWriter, WriterBusy  # noqa: E402
+
+
+class SlowStore(SqliteCandidateStore):
+    """Adds `delay` seconds to every transaction, like a slow disk that serves one flush at a time."""
+
+    def __init__(self, db_path, delay):
+        super().__init__(db_path)
+        self.delay = delay
+        self._disk = threading.Lock()
+
+    def _flush(self):
+        with self._disk:
+            time.sleep(self.delay)
+
+    def upsert(self, record, candidate_id=None):
+        self._flush()
+        return super().upsert(record, candidate_id)
+
+    def upsert_many(self, records):
+        self._flush()
+        return super().upsert_many(records)
+
+
+def run_sessions(save, args):
+    """Runs `save(record)` from every session thread; returns (submit latencies, failures, seconds)."""
+    rng = random.Random(args.seed)
+    records = [[make_record(s * args.saves + i, rng) for i in range(args.saves)] for s in range(args.sessions)]
+    latencies, failures, lock = [], [], threading.Lock()
+    barrier = threading.Barrier(args.sessions)
+
+    def session(s):
+        barrier.wait()
+        for record in records[s]:
+            start = time.perf_counter()
+            try:
+                save(record)
+            except WriterBusy as e:
+                failures.append(e)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(s,)) for s in range(args.sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), failures, start
+
+
+def report(name, latencies, elapsed, saved, extra=""):
+    ms = {q: percentile(latencies, q) * 1000 for q in (0.5, 0.95, 0.99)}
+    print(f"{name:<7} submit p50 {ms[0.5]:7.2f} ms  p95 {ms[0.95]:7.2f} ms  p99 {ms[0.99]:7.2f} ms  "
+          f"throughput {saved / elapsed:8.0f} records/s{extra}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--saves", type=int, default=20, help="Records saved per session.")
+    parser.add_argument("--disk-delay", type=float, default=0.0, help="Seconds added per transaction.")
+    parser.add_argument("--queue", type=int, default=1000, help="Writer queue size.")
+    parser.add_argument("--batch", type=int, default=64, help="Most records per group commit.")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Longest a submit waits for queue space.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_writes_")
+    total = args.sessions * args.saves
+    print(f"{args.sessions} sessions x {args.saves} saves, disk delay {args.disk_delay * 1000:g} ms/transaction")
+
+    store = SlowStore(os.path.join(tmp, "sync.sqlite"), args.disk_delay)
+    latencies, _, start = run_sessions(lambda record: store.upsert(record), args)
+    report("sync", latencies, time.perf_counter() - start, total)
+
+    writer = CandidateWriter(SlowStore(os.path.join(tmp, "writer.sqlite"), args.disk_delay),
+                             max_queue=args.queue, max_batch=args.batch)
+    tickets, tickets_lock = [], threading.Lock()
+
+    def submit(record):
+        ticket = writer.submit(record, timeout=args.timeout)
+        with tickets_lock:
+            tickets.append(ticket)
+
+    latencies, failures, start = run_sessions(submit, args)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    acks = sorted(t.committed_at - t.submitted_at for t in tickets)
+    saved = sum(t.status == "saved" for t in tickets)
+    report("writer", latencies, elapsed, saved,
+           f"\n        ack p50 {percentile(acks, 0.5) * 1000:7.2f} ms  p95 {percentile(acks, 0.95) * 1000:7.2f} ms  "
+           f"{writer.stats['batches']} commits (avg {saved / max(1, writer.stats['batches']):.1f} records), "
+           f"{len(failures)} rejected by backpressure")
+
+
+if __name__ == "__main__":
+    main()
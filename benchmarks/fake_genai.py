@@ -0,0 +1,184 @@
+"""Local stand-in for google.generativeai, for benchmarks that must not spend quota.
+
+It exposes the parts of the SDK this project uses (configure, GenerativeModel
+with generate_content/count_tokens, types.GenerationConfig) and simulates:
+
+- latency drawn from a distribution spec: "fixed:0.5", "uniform:0.2,1.5",
+  "lognormal:0.8,0.4" (median seconds, sigma) or "exp:0.6" (mean seconds)
+- injected failures: `error_rate` raises a 503, `quota_rate` a 429
+- streaming in small chunks with `chunk_delay` between them
+- JSON replies when response_mime_type is "application/json", plus usage_metadata
+
+install() makes gemini_client hand out the fake instead of the real SDK.
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+import types
+from dataclasses import dataclass
+
+QUESTION_TEMPLATES = (
+    "How does {skill} manage memory, and how would you find a leak in a long-running {skill} service?",
+    "Describe a production incident you debugged that involved {skill}; what was the root cause?",
+    "What are the trade-offs of the concurrency model in {skill} for I/O-bound workloads?",
+    "How would you structure automated tests for a large {skill} codebase?",
+    "Explain how you would secure a {skill} deployment against injection and secrets leakage.",
+    "Which {skill} performance profiling tools have you used, and what did they reveal?",
+)
+_SKILLS = re.compile(r"skilled in: (.*?)\.\s", re.S)
+_ANSWER_IDS = re.compile(r"^(Q\d+):", re.M)
+
+
+class ResourceExhausted(Exception):
+    """Mirrors google.api_core's 429 error closely enough for model_router.is_quota_error."""
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+@dataclass
+class FakeConfig:
+    latency: str = "lognormal:0.8,0.4"
+    error_rate: float = 0.0
+    quota_rate: float = 0.0
+    chunk_delay: float = 0.02
+    chunk_size: int = 40
+    seed: int = 1234
+
+
+class LatencyDistribution:
+    """Parses a latency spec and samples seconds from it (thread-safe)."""
+
+    def __init__(self, spec, seed=None):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        if kind not in ("fixed", "uniform", "lognormal", "exp"):
+            raise ValueError(f"Unknown latency distribution: {spec!r}")
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.kind == "fixed":
+                return self.args[0]
+            if self.kind == "uniform":
+                return self._random.uniform(self.args[0], self.args[1])
+            if self.kind == "lognormal":
+                return self._random.lognormvariate(math.log(self.args[0]), self.args[1])
+            return self._random.expovariate(1.0 / self.args[0])
+
+
+class FakeGenAI:
+    """Module-like object with the google.generativeai surface used by gemini_client."""
+
+    def __init__(self, config=None):
+        self.config = config or FakeConfig()
+        self.latency = LatencyDistribution(self.config.latency, self.config.seed)
+        self._random = random.Random(self.config.seed + 1)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.injected_errors = 0
+        self.types = types.SimpleNamespace(GenerationConfig=_GenerationConfig)
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, model_name=None, **kwargs):
+        return _FakeModel(self, model_name)
+
+    def _next_failure(self):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+        if roll < self.config.quota_rate:
+            failure = ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        elif roll < self.config.quota_rate + self.config.error_rate:
+            failure = ServiceUnavailable("503 The service is currently unavailable.")
+        else:
+            return None
+        with self._lock:
+            self.injected_errors += 1
+        return failure
+
+
+class _GenerationConfig:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Usage:
+    def __init__(self, prompt, text):
+        # Roughly four characters per token, like English text through SentencePiece
+        self.prompt_token_count = max(1, len(prompt) // 4)
+        self.candidates_token_count = max(1, len(text) // 4)
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class _Response:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def reply_text(prompt, structured):
+    """Builds a plausible, non-repetitive question list for the skills named in the prompt.
+
+    Answer-grading prompts (answer_evaluator.py) get a score for every question instead.
+    """
+    if prompt.startswith("You are grading"):
+        return json.dumps({"scores": [{"id": qid, "score": 3, "rationale": "Adequate."}
+                                      for qid in _ANSWER_IDS.findall(prompt)]})
+    match = _SKILLS.search(prompt)
+    # Top-level commas only: a cluster such as "SQL databases (PostgreSQL, MySQL)" is one topic
+    skills = [s.strip() for s in re.split(r",(?![^()]*\))", match.group(1))] if match else ["software engineering"]
+    questions = [
+        {"question": QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)].format(skill=skills[i % len(skills)]),
+         "topic": skills[i % len(skills)], "difficulty": ("easy", "medium", "hard")[i % 3]}
+        for i in range(5)
+    ]
+    if structured:
+        return json.dumps({"questions": questions})
+    return "\n".join(f"{i}. {q['question']}" for i, q in enumerate(questions, 1))
+
+
+class _FakeModel:
+    def __init__(self, genai, model_name):
+        self.genai = genai
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        failure = self.genai._next_failure()
+        time.sleep(self.genai.latency.sample())
+        if failure is not None:
+            raise failure
+        structured = getattr(generation_config, "response_mime_type", None) == "application/json"
+        text = reply_text(str(prompt), structured)
+        if stream:
+            return self._stream(str(prompt), text)
+        return _Response(text, _Usage(str(prompt), text))
+
+    def _stream(self, prompt, text):
+        size = self.genai.config.chunk_size
+        for start in range(0, len(text), size):
+            if start:
+                time.sleep(self.genai.config.chunk_delay)
+            last = start + size >= len(text)
+            yield _Response(text[start:start + size], _Usage(prompt, text) if last else None)
+
+    def count_tokens(self, contents):
+        return types.SimpleNamespace(total_tokens=max(1, len(str(contents)) // 4))
+
+
+def install(config=None):
+    """Points gemini_client at a fresh FakeGenAI; returns it."""
+    import gemini_client
+
+    fake = FakeGenAI(config)
+    gemini_client._genai = fake
+    return fake
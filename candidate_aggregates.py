@@ -0,0 +1,214 @@
+"""Materialized recruiter analytics, kept current as candidates are saved.
+
+Each candidate contributes one count to a handful of (dimension, key)
+counters: every skill in the stack, the position, the location, an
+experience bucket and every question asked. update() applies only the
+difference between a candidate's previous and new contribution, so re-saving
+a candidate never double-counts, and the dashboard (pages/) reads a few
+top-N rows instead of scanning every record. Rebuild from the candidate store
+after a bulk import or a schema change:
+
+    python candidate_aggregates.py rebuild
+    python candidate_aggregates.py show --top 10
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from candidate_search import normalize_location
+from candidate_store import get_candidate_store, normalize_skill, parse_experience
+from metrics import metrics
+
+DEFAULT_AGGREGATES_DB = os.path.join("candidate_data", "aggregates.sqlite")
+
+DIMENSIONS = ("skill", "position", "location", "experience", "question")
+# Years of experience at or above this share the last histogram bucket
+MAX_EXPERIENCE_BUCKET = 20
+
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+
+def normalize_question(question):
+    """Drops the list number and case/whitespace differences so a reused question has one key."""
+    return " ".join(_LIST_MARKER.sub("", question).casefold().split()).rstrip(" ?.")
+
+
+def experience_bucket(value):
+    years = parse_experience(value)
+    if years is None or years < 0:
+        return "unknown"
+    return f"{MAX_EXPERIENCE_BUCKET}+" if years >= MAX_EXPERIENCE_BUCKET else str(years)
+
+
+def contributions(record):
+    """Returns {(dimension, key): label} for one candidate record; each pair counts once."""
+    info = record.get("candidate_info", {})
+    pairs = {("total", "candidates"): "candidates",
+             ("experience", experience_bucket(info.get("experience"))): None}
+    for skill in info.get("tech_stack", []):
+        if skill and skill.strip():
+            pairs.setdefault(("skill", normalize_skill(skill)), " ".join(skill.split()))
+    position = " ".join((info.get("position") or "").split())
+    if position:
+        pairs[("position", position.casefold())] = position
+    location = normalize_location(info.get("location"))
+    if location:
+        pairs[("location", location)] = " ".join(info["location"].split())
+    for question in record.get("technical_questions", []):
+        key = normalize_question(question or "")
+        if key:
+            pairs.setdefault(("question", key), _LIST_MARKER.sub("", question).strip())
+    return pairs
+
+
+class CandidateAggregates:
+    """Counters in a small SQLite (WAL) database that any number of app processes can update."""
+
+    def __init__(self, db_path=DEFAULT_AGGREGATES_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS aggregate_counts (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                label TEXT,
+                PRIMARY KEY (dimension, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_aggregate_counts_top ON aggregate_counts (dimension, count DESC);
+            CREATE TABLE IF NOT EXISTS aggregate_members (
+                candidate_id TEXT PRIMARY KEY,
+                keys TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _apply(self, conn, candidate_id, record):
+        """Moves the counters from the candidate's last contribution to this record's."""
+        row = conn.execute("SELECT keys FROM aggregate_members WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        old = {tuple(pair) for pair in json.loads(row[0])} if row else set()
+        new = contributions(record)
+        for dimension, key in old - new.keys():
+            if conn.execute("DELETE FROM aggregate_counts WHERE dimension = ? AND key = ? AND count <= 1 "
+                            "RETURNING 1", (dimension, key)).fetchone():
+                self._bump(conn, "distinct", dimension, -1)
+            else:
+                self._bump(conn, dimension, key, -1)
+        for (dimension, key), label in new.items():
+            if (dimension, key) not in old and self._bump(conn, dimension, key, 1, label) == 1:
+                self._bump(conn, "distinct", dimension, 1)
+        conn.execute("INSERT OR REPLACE INTO aggregate_members (candidate_id, keys) VALUES (?, ?)",
+                     (candidate_id, json.dumps(list(new), ensure_ascii=False, separators=(",", ":"))))
+
+    @staticmethod
+    def _bump(conn, dimension, key, delta, label=None):
+        return conn.execute(
+            "INSERT INTO aggregate_counts (dimension, key, count, label) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(dimension, key) DO UPDATE SET count = count + excluded.count RETURNING count",
+            (dimension, key, delta, label)).fetchone()[0]
+
+    def _transaction(self, op, apply):
+        conn = self._conn()
+        with metrics.timer("storage_write_seconds", backend="aggregates", op=op):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                apply(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def update(self, candidate_id, record):
+        self._transaction("update", lambda conn: self._apply(conn, candidate_id, record))
+
+    def update_many(self, records):
+        """Applies several (candidate_id, record) pairs in a single transaction."""
+        def apply(conn):
+            for candidate_id, record in records:
+                self._apply(conn, candidate_id, record)
+        self._transaction("update_many", apply)
+
+    def rebuild(self, store):
+        """Recomputes every counter from `store`; readers keep seeing the old counts until it commits."""
+        def apply(conn):
+            conn.execute("DELETE FROM aggregate_counts")
+            conn.execute("DELETE FROM aggregate_members")
+            for candidate_id, record in store.iter_records():
+                self._apply(conn, candidate_id, record)
+        self._transaction("rebuild", apply)
+        return self.total()
+
+    def total(self):
+        row = self._conn().execute(
+            "SELECT count FROM aggregate_counts WHERE dimension = 'total' AND key = 'candidates'").fetchone()
+        return row[0] if row else 0
+
+    def top(self, dimension, limit=20):
+        """Returns [(label, count)] for the `limit` most common keys of `dimension`."""
+        rows = self._conn().execute(
+            "SELECT key, label, count FROM aggregate_counts WHERE dimension = ? "
+            "ORDER BY count DESC, key LIMIT ?", (dimension, limit))
+        return [(label or key, count) for key, label, count in rows]
+
+    def experience_histogram(self):
+        """Returns [(bucket, count)] in years order, "unknown" last (at most 22 rows)."""
+        rows = self.top("experience", MAX_EXPERIENCE_BUCKET + 2)
+
+        def order(item):
+            bucket = item[0]
+            return (bucket == "unknown", int(bucket.rstrip("+")) if bucket != "unknown" else 0)
+        return sorted(rows, key=order)
+
+    def distinct(self, dimension):
+        """Number of different keys seen for `dimension`, kept as a counter of its own."""
+        row = self._conn().execute(
+            "SELECT count FROM aggregate_counts WHERE dimension = 'distinct' AND key = ?", (dimension,)).fetchone()
+        return row[0] if row else 0
+
+
+_aggregates = None
+_aggregates_lock = threading.Lock()
+
+
+def get_candidate_aggregates():
+    """Returns the process-wide CandidateAggregates at CANDIDATE_AGGREGATES_DB."""
+    global _aggregates
+    with _aggregates_lock:
+        if _aggregates is None:
+            _aggregates = CandidateAggregates(os.getenv("CANDIDATE_AGGREGATES_DB", DEFAULT_AGGREGATES_DB))
+        return _aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the recruiter analytics aggregates.")
+    parser.add_argument("command", choices=["rebuild", "show"])
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    aggregates = get_candidate_aggregates()
+    if args.command == "rebuild":
+        print(f"Rebuilt aggregates from {aggregates.rebuild(get_candidate_store())} candidates.")
+        return
+    print(f"{aggregates.total()} candidates")
+    for dimension in DIMENSIONS:
+        rows = aggregates.experience_histogram() if dimension == "experience" else aggregates.top(dimension, args.top)
+        print(f"\n{dimension} ({aggregates.distinct(dimension)} distinct)")
+        for label, count in rows:
+            print(f"{count:>6}  {label}")
+
+
+if __name__ == "__main__":
+    main()
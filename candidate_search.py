@@ -0,0 +1,209 @@
+"""Skill-based candidate search over an in-memory inverted index.
+
+    python candidate_search.py "kubernetes, go, 3+ years in Bengaluru"
+"""
+import heapq
+import re
+import sys
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from candidate_store import get_candidate_store, normalize_skill, parse_experience
+
+# "at least 3 years of experience in" is one clause; the skill or location after it is kept
+_EXPERIENCE = re.compile(
+    r"(?:\b(?:at\s+least|min(?:imum)?)\s+)?(\d+)\s*\+?\s*(?:years?|yrs?)\b"
+    r"(?:\s+(?:of\s+)?(?:experience|exp)\b(?:\s+in\b)?)?", re.I)
+# Words joining skills and clauses; a location ends at the first of these (or a comma)
+_CONNECTORS = r"and|or|with|who|knows?|having|has|have"
+_LOCATION = re.compile(rf"\bin\s+((?:(?!(?:{_CONNECTORS})\b)[A-Za-z][\w.-]*\s*)+)", re.I)
+_SPLIT = re.compile(rf",|\b(?:{_CONNECTORS})\b", re.I)
+
+
+def normalize_location(location):
+    return " ".join((location or "").strip().casefold().split())
+
+
+def parse_query(text):
+    """Splits a free-text query into (skills, min_experience, location)."""
+    min_experience = None
+    match = _EXPERIENCE.search(text)
+    if match:
+        min_experience = int(match.group(1))
+        text = text[:match.start()] + text[match.end():]
+    location = None
+    matches = list(_LOCATION.finditer(text))
+    if matches:
+        match = matches[-1]
+        location = match.group(1).strip()
+        text = text[:match.start()] + "," + text[match.end():]
+    skills = [normalize_skill(part) for part in _SPLIT.split(text) if part.strip()]
+    return [s for s in skills if s], min_experience, location
+
+
+class CandidateIndex:
+    """Inverted skill index, sorted experience array and location hash index.
+
+    add() is incremental: re-adding a candidate first removes its old postings.
+    """
+
+    def __init__(self):
+        self._skills = defaultdict(set)     # skill -> candidate IDs
+        self._locations = defaultdict(set)  # location -> candidate IDs
+        self._exp_keys = []                 # sorted (experience, candidate_id)
+        self._docs = {}                     # candidate_id -> (skills, experience, location)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove(self, candidate_id):
+        doc = self._docs.pop(candidate_id, None)
+        if doc is None:
+            return
+        skills, experience, location = doc
+        for skill in skills:
+            self._skills[skill].discard(candidate_id)
+        self._locations[location].discard(candidate_id)
+        if experience is not None:
+            i = bisect_left(self._exp_keys, (experience, candidate_id))
+            if i < len(self._exp_keys) and self._exp_keys[i] == (experience, candidate_id):
+                del self._exp_keys[i]
+
+    def add(self, candidate_id, record):
+        """Indexes (or re-indexes) one candidate record."""
+        info = record.get("candidate_info", {})
+        skills = frozenset(normalize_skill(s) for s in info.get("tech_stack", []) if s and s.strip())
+        experience = parse_experience(info.get("experience"))
+        location = normalize_location(info.get("location"))
+        with self._lock:
+            self._remove(candidate_id)
+            self._docs[candidate_id] = (skills, experience, location)
+            for skill in skills:
+                self._skills[skill].add(candidate_id)
+            self._locations[location].add(candidate_id)
+            if experience is not None:
+                insort(self._exp_keys, (experience, candidate_id))
+
+    def remove(self, candidate_id):
+        with self._lock:
+            self._remove(candidate_id)
+
+    def search(self, skills, min_experience=None, max_experience=None, location=None, limit=20):
+        """Returns [(candidate_id, score)] ranked by the fraction of query skills each candidate has.
+
+        The location and experience filters are applied first, so only the
+        candidates passing them are scored, and only the top `limit` are sorted.
+        """
+        wanted = {normalize_skill(s) for s in skills if s and s.strip()}
+        with self._lock:
+            allowed = self._filter(min_experience, max_experience, location)
+            postings = [self._skills.get(skill, ()) for skill in wanted]
+            scores = defaultdict(int)
+            if allowed is not None and len(allowed) < sum(map(len, postings)):
+                for candidate_id in allowed:
+                    score = len(wanted & self._docs[candidate_id][0])
+                    if score:
+                        scores[candidate_id] = score
+            else:
+                for posting in postings:
+                    for candidate_id in posting:
+                        if allowed is None or candidate_id in allowed:
+                            scores[candidate_id] += 1
+            if wanted:
+                candidates = scores
+            else:
+                candidates = self._docs if allowed is None else allowed
+            ranked = heapq.nsmallest(
+                limit, candidates,
+                key=lambda c: (-scores.get(c, 0), -(self._docs[c][1] or 0), c),
+            )
+            total = len(wanted) or 1
+            return [(c, scores.get(c, 0) / total) for c in ranked]
+
+    def _filter(self, min_experience, max_experience, location):
+        """The candidate IDs within the location and experience filters, or None if there are none."""
+        allowed = None
+        if location:
+            allowed = self._locations.get(normalize_location(location), set())
+        if min_experience is not None or max_experience is not None:
+            lo = bisect_left(self._exp_keys, (min_experience if min_experience is not None else -1, ""))
+            hi = (bisect_right(self._exp_keys, (max_experience, "\uffff"))
+                  if max_experience is not None else len(self._exp_keys))
+            if allowed is not None and len(allowed) < hi - lo:
+                allowed = {c for c in allowed if self._in_range(self._docs[c][1], min_experience, max_experience)}
+            else:
+                in_range = {candidate_id for _, candidate_id in self._exp_keys[lo:hi]}
+                allowed = in_range if allowed is None else allowed & in_range
+        return allowed
+
+    @staticmethod
+    def _in_range(experience, lo, hi):
+        if experience is None:
+            return False
+        return (lo is None or experience >= lo) and (hi is None or experience <= hi)
+
+    def query(self, text, limit=20):
+        """Runs a free-text query such as "kubernetes and go with 3+ years in Bengaluru"."""
+        skills, min_experience, location = parse_query(text)
+        return self.search(skills, min_experience=min_experience, location=location, limit=limit)
+
+    @classmethod
+    def build(cls, store):
+        index = cls()
+        for candidate_id, record in store.iter_records():
+            index.add(candidate_id, record)
+        return index
+
+
+_index = None
+_index_lock = threading.Lock()    # Held for a whole build, so only one runs
+_pending = None                   # candidate_id -> record saved while a build runs
+_pending_lock = threading.Lock()  # Guards _index and _pending for index_candidate
+
+
+def get_candidate_index():
+    """Returns the process-wide index, building it from the candidate store on first use."""
+    global _index, _pending
+    with _index_lock:
+        if _index is None:
+            with _pending_lock:
+                _pending = {}
+            try:
+                index = CandidateIndex.build(get_candidate_store())
+                with _pending_lock:
+                    for candidate_id, record in _pending.items():
+                        index.add(candidate_id, record)
+                    _index = index
+            finally:
+                with _pending_lock:
+                    _pending = None
+        return _index
+
+
+def index_candidate(candidate_id, record):
+    """Keeps the index current after save_candidate_data writes a record.
+
+    A record saved while the index is being built may be missed by the build's
+    scan of the store, so it is buffered and applied once the build finishes.
+    Before any build starts there is nothing to do: the first search builds the
+    index from the store, which already contains this record.
+    """
+    with _pending_lock:
+        if _index is None:
+            if _pending is not None:
+                _pending[candidate_id] = record
+            return
+        index = _index
+    index.add(candidate_id, record)
+
+
+if __name__ == "__main__":
+    store = get_candidate_store()
+    for candidate_id, score in get_candidate_index().query(" ".join(sys.argv[1:])):
+        info = store.get(candidate_id)["candidate_info"]
+        evaluation = store.get_evaluation(candidate_id)
+        answers = f"answers {evaluation['overall']}/5" if evaluation else "answers not scored"
+        print(f"{score:.2f}  {candidate_id}  {info.get('full_name')}  {info.get('experience')}y  "
+              f"{info.get('location')}  {', '.join(info.get('tech_stack', []))}  ({answers})")
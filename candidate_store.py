@@ -0,0 +1,391 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import metrics
+
+DEFAULT_DB_PATH = os.path.join("candidate_data", "candidates.sqlite")
+
+# Aliases map to the canonical skill name stored and searched on
+SKILL_ALIASES = {
+    "k8s": "kubernetes", "kube": "kubernetes",
+    "reactjs": "react", "react.js": "react",
+    "golang": "go",
+    "js": "javascript", "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python", "python3": "python",
+    "nodejs": "node", "node.js": "node",
+    "postgres": "postgresql", "psql": "postgresql",
+    "mongo": "mongodb",
+    "amazon web services": "aws",
+    "gcp": "google cloud", "google cloud platform": "google cloud",
+    "ml": "machine learning",
+    "gen ai": "generative ai", "genai": "generative ai",
+    "vuejs": "vue", "vue.js": "vue",
+    "angularjs": "angular",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++",
+}
+
+
+def normalize_skill(skill):
+    """Case-folds a skill and maps known aliases to their canonical name."""
+    skill = " ".join(skill.strip().casefold().split())
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def candidate_skills(tech_stack):
+    """The canonical skills a candidate's tech stack is filed under ("K8s" and "kubernetes" are one)."""
+    return sorted({normalize_skill(s) for s in tech_stack if isinstance(s, str) and s.strip()})
+
+
+def candidate_id_for(candidate_info):
+    """Derives a stable candidate ID from the email address (a random ID if there is none)."""
+    email = (candidate_info.get("email") or "").strip().casefold()
+    if not email:
+        return uuid.uuid4().hex[:16]
+    return hashlib.sha1(email.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_experience(value):
+    """Returns years of experience as an int, or None if it isn't a number."""
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class CandidateStore:
+    """Interface for candidate storage backends.
+
+    A record is the dict save_candidate_data writes: candidate_info,
+    technical_questions, technical_answers and conversation_history.
+    """
+
+    def upsert(self, record, candidate_id=None):
+        """Inserts or replaces a record atomically; returns its candidate ID."""
+        raise NotImplementedError
+
+    def upsert_many(self, records):
+        """Upserts several (candidate_id, record) pairs; backends may batch this."""
+        return [self.upsert(record, candidate_id) for candidate_id, record in records]
+
+    def get(self, candidate_id):
+        """Returns the stored record for `candidate_id`, or None."""
+        raise NotImplementedError
+
+    def find(self, email=None, skill=None, position=None, location=None,
+             min_experience=None, max_experience=None, limit=100):
+        """Returns candidate IDs matching every given filter."""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def get_evaluation(self, candidate_id):
+        """Returns the answer evaluation stored for `candidate_id`, or None.
+
+        Evaluations are kept apart from the record, so upserting the record
+        (e.g. the candidate saving again) never erases them.
+        """
+        raise NotImplementedError
+
+    def set_evaluation(self, candidate_id, evaluation):
+        """Stores or replaces the evaluation for `candidate_id` without touching its record."""
+        raise NotImplementedError
+
+    def recent_evaluations(self, limit=50):
+        """Returns [(candidate_id, evaluation)] for the most recently scored candidates, newest first."""
+        raise NotImplementedError
+
+    def iter_records(self):
+        """Yields (candidate_id, record) for every stored candidate."""
+        raise NotImplementedError
+
+
+class SqliteCandidateStore(CandidateStore):
+    """SQLite (WAL) backend with indexed columns and a skills table."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                candidate_id TEXT PRIMARY KEY,
+                email TEXT,
+                full_name TEXT,
+                phone TEXT,
+                experience INTEGER,
+                position TEXT,
+                location TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates (email);
+            CREATE INDEX IF NOT EXISTS idx_candidates_position ON candidates (position);
+            CREATE INDEX IF NOT EXISTS idx_candidates_location ON candidates (location);
+            CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates (experience);
+            CREATE TABLE IF NOT EXISTS candidate_skills (
+                skill TEXT NOT NULL,
+                candidate_id TEXT NOT NULL,
+                PRIMARY KEY (skill, candidate_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_candidate_skills_id ON candidate_skills (candidate_id);
+            CREATE TABLE IF NOT EXISTS candidate_evaluations (
+                candidate_id TEXT PRIMARY KEY,
+                evaluation TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._migrate(conn)
+
+    # Bumped whenever rows derived from the record change shape; _migrate rebuilds them
+    SCHEMA_VERSION = 1
+
+    def _migrate(self, conn):
+        """Re-derives candidate_skills for databases written before skills were alias-normalized."""
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+            return
+        with conn:
+            conn.execute("DELETE FROM candidate_skills")
+            for candidate_id, record in conn.execute("SELECT candidate_id, record FROM candidates"):
+                info = json.loads(record).get("candidate_info", {})
+                conn.executemany(
+                    "INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)",
+                    [(skill, candidate_id) for skill in candidate_skills(info.get("tech_stack", []))])
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _conn(self):
+        # One connection per thread; Streamlit runs each session's script in its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def set_synchronous(self, mode):
+        """Sets PRAGMA synchronous ("NORMAL" or "FULL") for the calling thread's connection only."""
+        if mode not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Unknown synchronous mode: {mode!r}")
+        self._conn().execute(f"PRAGMA synchronous={mode}")
+
+    def _write(self, conn, candidate_id, record, now):
+        info = record.get("candidate_info", {})
+        conn.execute(
+            "INSERT INTO candidates (candidate_id, email, full_name, phone, experience, position, location, "
+            "created_at, updated_at, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(candidate_id) DO UPDATE SET email = excluded.email, full_name = excluded.full_name, "
+            "phone = excluded.phone, experience = excluded.experience, position = excluded.position, "
+            "location = excluded.location, updated_at = excluded.updated_at, record = excluded.record",
+            (
+                candidate_id,
+                (info.get("email") or "").strip().casefold(),
+                info.get("full_name", ""),
+                info.get("phone", ""),
+                parse_experience(info.get("experience")),
+                (info.get("position") or "").strip().casefold(),
+                (info.get("location") or "").strip().casefold(),
+                now,
+                now,
+                json.dumps(record, ensure_ascii=False, separators=(",", ":")),
+            ),
+        )
+        conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)",
+            [(skill, candidate_id) for skill in candidate_skills(info.get("tech_stack", []))],
+        )
+
+    def upsert(self, record, candidate_id=None):
+        candidate_id = candidate_id or candidate_id_for(record.get("candidate_info", {}))
+        conn = self._conn()
+        with metrics.timer("storage_write_seconds", backend="sqlite", op="upsert"), conn:
+            self._write(conn, candidate_id, record, time.time())
+        return candidate_id
+
+    def upsert_many(self, records):
+        """Upserts all (candidate_id, record) pairs in a single transaction."""
+        conn = self._conn()
+        now = time.time()
+        ids = []
+        with metrics.timer("storage_write_seconds", backend="sqlite", op="upsert_many"), conn:
+            for candidate_id, record in records:
+                candidate_id = candidate_id or candidate_id_for(record.get("candidate_info", {}))
+                self._write(conn, candidate_id, record, now)
+                ids.append(candidate_id)
+        return ids
+
+    def get(self, candidate_id):
+        row = self._conn().execute(
+            "SELECT record FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, email=None, skill=None, position=None, location=None,
+             min_experience=None, max_experience=None, limit=100):
+        sql = "SELECT c.candidate_id FROM candidates c"
+        clauses, params = [], []
+        if skill:
+            sql += " JOIN candidate_skills s ON s.candidate_id = c.candidate_id AND s.skill = ?"
+            params.append(normalize_skill(skill))
+        for column, value in (("email", email), ("position", position), ("location", location)):
+            if value:
+                clauses.append(f"c.{column} = ?")
+                params.append(value.strip().casefold())
+        if min_experience is not None:
+            clauses.append("c.experience >= ?")
+            params.append(min_experience)
+        if max_experience is not None:
+            clauses.append("c.experience <= ?")
+            params.append(max_experience)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY c.updated_at DESC LIMIT ?"
+        params.append(limit)
+        return [row[0] for row in self._conn().execute(sql, params)]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def get_evaluation(self, candidate_id):
+        row = self._conn().execute(
+            "SELECT evaluation FROM candidate_evaluations WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_evaluation(self, candidate_id, evaluation):
+        conn = self._conn()
+        with metrics.timer("storage_write_seconds", backend="sqlite", op="set_evaluation"), conn:
+            conn.execute(
+                "INSERT INTO candidate_evaluations (candidate_id, evaluation, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(candidate_id) DO UPDATE SET evaluation = excluded.evaluation, "
+                "updated_at = excluded.updated_at",
+                (candidate_id, json.dumps(evaluation, ensure_ascii=False, separators=(",", ":")), time.time()))
+
+    def recent_evaluations(self, limit=50):
+        rows = self._conn().execute(
+            "SELECT candidate_id, evaluation FROM candidate_evaluations ORDER BY updated_at DESC LIMIT ?", (limit,))
+        return [(candidate_id, json.loads(evaluation)) for candidate_id, evaluation in rows]
+
+    def iter_records(self):
+        # A dedicated cursor streams rows instead of loading the whole table
+        for candidate_id, record in self._conn().execute("SELECT candidate_id, record FROM candidates"):
+            yield candidate_id, json.loads(record)
+
+
+class JsonDirCandidateStore(CandidateStore):
+    """Legacy one-JSON-file-per-candidate backend, keyed on candidate ID instead of name.
+
+    Records live in `<data_dir>/records/`, apart from the name-keyed legacy
+    files (see ingest_candidates.py) and everything else under data_dir.
+    """
+
+    def __init__(self, data_dir="candidate_data"):
+        self.data_dir = data_dir
+        self.records_dir = os.path.join(data_dir, "records")
+        os.makedirs(self.records_dir, exist_ok=True)
+
+    def _path(self, candidate_id):
+        return os.path.join(self.records_dir, f"{candidate_id}.json")
+
+    def _record_paths(self):
+        return glob.glob(os.path.join(self.records_dir, "*.json"))
+
+    def upsert(self, record, candidate_id=None):
+        candidate_id = candidate_id or candidate_id_for(record.get("candidate_info", {}))
+        tmp_path = self._path(candidate_id) + ".tmp"
+        with metrics.timer("storage_write_seconds", backend="json", op="upsert"):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=4)
+            os.replace(tmp_path, self._path(candidate_id))
+        return candidate_id
+
+    def get(self, candidate_id):
+        try:
+            with open(self._path(candidate_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def find(self, email=None, skill=None, position=None, location=None,
+             min_experience=None, max_experience=None, limit=100):
+        # Scans every file; only suitable for small data sets
+        matches = []
+        for path in self._record_paths():
+            with open(path, encoding="utf-8") as f:
+                info = json.load(f).get("candidate_info", {})
+            experience = parse_experience(info.get("experience"))
+            if email and (info.get("email") or "").strip().casefold() != email.strip().casefold():
+                continue
+            if skill and normalize_skill(skill) not in candidate_skills(info.get("tech_stack", [])):
+                continue
+            if position and (info.get("position") or "").strip().casefold() != position.strip().casefold():
+                continue
+            if location and (info.get("location") or "").strip().casefold() != location.strip().casefold():
+                continue
+            if min_experience is not None and (experience is None or experience < min_experience):
+                continue
+            if max_experience is not None and (experience is None or experience > max_experience):
+                continue
+            matches.append(os.path.splitext(os.path.basename(path))[0])
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def count(self):
+        return len(self._record_paths())
+
+    def _evaluation_path(self, candidate_id):
+        # Not *.json, so it is never mistaken for a candidate record
+        return os.path.join(self.records_dir, f"{candidate_id}.evaluation")
+
+    def get_evaluation(self, candidate_id):
+        try:
+            with open(self._evaluation_path(candidate_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def set_evaluation(self, candidate_id, evaluation):
+        tmp_path = self._evaluation_path(candidate_id) + ".tmp"
+        with metrics.timer("storage_write_seconds", backend="json", op="set_evaluation"):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(evaluation, f, indent=4)
+            os.replace(tmp_path, self._evaluation_path(candidate_id))
+
+    def recent_evaluations(self, limit=50):
+        paths = sorted(glob.glob(os.path.join(self.records_dir, "*.evaluation")), key=os.path.getmtime, reverse=True)
+        evaluations = []
+        for path in paths[:limit]:
+            with open(path, encoding="utf-8") as f:
+                evaluations.append((os.path.splitext(os.path.basename(path))[0], json.load(f)))
+        return evaluations
+
+    def iter_records(self):
+        for path in self._record_paths():
+            with open(path, encoding="utf-8") as f:
+                yield os.path.splitext(os.path.basename(path))[0], json.load(f)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_candidate_store():
+    """Returns the process-wide store selected by CANDIDATE_STORE ("sqlite" by default, or "json")."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.getenv("CANDIDATE_STORE", "sqlite") == "json":
+                _store = JsonDirCandidateStore(os.getenv("CANDIDATE_DATA_DIR", "candidate_data"))
+            else:
+                _store = SqliteCandidateStore(os.getenv("CANDIDATE_DB", DEFAULT_DB_PATH))
+        return _store
@@ -0,0 +1,210 @@
+"""Background candidate writer: save_candidate_data enqueues, one thread commits.
+
+submit() copies the record onto a bounded queue and returns a WriteTicket
+straight away. A single writer thread drains the queue in batches (group
+commit): every record that arrived within `max_wait` seconds of the first,
+up to `max_batch`, goes into one store.upsert_many() transaction, so many
+sessions finishing together cost one commit instead of one each. Repeated
+saves of the same candidate in a batch collapse into the latest one.
+
+- Atomicity: a batch is one SQLite transaction (JsonDirCandidateStore writes
+  each file via temp file + rename). A failed batch is retried record by
+  record, so one bad record fails only its own ticket.
+- Durability: a ticket is acknowledged only after its transaction commits.
+  The writer's connection uses synchronous=FULL, which group commit makes
+  affordable, so an acknowledged save also survives a power loss.
+- Backpressure: when the disk falls behind and the queue is full, submit()
+  blocks for up to `timeout` seconds and then raises WriterBusy.
+
+After each commit the search index, the analytics aggregates and the answer
+evaluator are updated from the writer thread, off the UI thread.
+"""
+import atexit
+import copy
+import os
+import queue
+import threading
+import time
+
+from candidate_store import candidate_id_for, get_candidate_store
+from metrics import COUNT_BUCKETS, metrics
+
+BATCH_BUCKETS = COUNT_BUCKETS + (16, 32, 64, 128)
+
+
+class WriterBusy(Exception):
+    """The write queue stayed full for the whole submit timeout."""
+
+
+class WriteTicket:
+    """Acknowledgement for one submitted record; poll `status` or block on wait()."""
+
+    def __init__(self, candidate_id, record):
+        self.candidate_id = candidate_id
+        self.record = record
+        self.submitted_at = time.time()
+        self.committed_at = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def status(self):
+        """"pending" until the write commits, then "saved" or "failed" (see `error`)."""
+        if not self._done.is_set():
+            return "pending"
+        return "failed" if self.error is not None else "saved"
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the write has committed or failed; returns True if it was saved."""
+        self._done.wait(timeout)
+        return self.status == "saved"
+
+    def _resolve(self, error=None):
+        self.error = error
+        self.committed_at = time.time()
+        self.record = None  # The queue no longer needs it
+        self._done.set()
+
+
+class CandidateWriter:
+    """Single-threaded group-commit writer in front of a CandidateStore."""
+
+    def __init__(self, store=None, max_queue=1000, max_batch=64, max_wait=0.005, after_commit=None):
+        self.store = store or get_candidate_store()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.after_commit = after_commit
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "saved": 0, "failed": 0, "batches": 0, "busy": 0}
+        self._thread = threading.Thread(target=self._run, name="candidate-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, 10.0)  # Give queued saves a chance to commit on a clean shutdown
+
+    def submit(self, record, candidate_id=None, timeout=None):
+        """Queues a copy of `record`; returns its WriteTicket (the candidate ID is known immediately).
+
+        Blocks while the queue is full, for at most `timeout` seconds (None waits
+        indefinitely), then raises WriterBusy.
+        """
+        ticket = WriteTicket(candidate_id or candidate_id_for(record.get("candidate_info", {})),
+                             copy.deepcopy(record))
+        start = time.perf_counter()
+        try:
+            self._queue.put(ticket, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.stats["busy"] += 1
+            metrics.inc("candidate_writer_busy_total")
+            raise WriterBusy(f"Candidate writer queue is full ({self._queue.maxsize} records).") from None
+        metrics.observe("candidate_writer_submit_seconds", time.perf_counter() - start)
+        with self._lock:
+            self.stats["submitted"] += 1
+        return ticket
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        """Blocks until everything submitted so far has been committed or failed."""
+        ticket = WriteTicket(None, None)
+        self._queue.put(ticket, timeout=timeout)  # Markers with no record are acknowledged in order
+        return ticket.wait(timeout)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        set_synchronous = getattr(self.store, "set_synchronous", None)
+        if set_synchronous is not None:
+            set_synchronous("FULL")  # Only this thread's connection; see the module docstring
+        while True:
+            batch = self._next_batch()
+            try:
+                self._commit([t for t in batch if t.candidate_id is not None])
+            except Exception as e:  # Keep the writer alive whatever happens to one batch
+                print(f"Candidate writer: unexpected error: {e}")
+                for ticket in batch:
+                    if not ticket.done():
+                        ticket._resolve(e)
+            for ticket in batch:
+                if not ticket.done():
+                    ticket._resolve()  # flush() markers
+
+    def _commit(self, tickets):
+        if not tickets:
+            return
+        latest = {}
+        for ticket in tickets:
+            latest[ticket.candidate_id] = ticket.record  # A later save of the same candidate wins
+        pairs = list(latest.items())
+        metrics.observe("candidate_writer_batch_size", len(pairs), buckets=BATCH_BUCKETS)
+        failed = {}
+        try:
+            self.store.upsert_many(pairs)
+        except Exception as e:
+            print(f"Candidate writer: batch of {len(pairs)} failed ({e}); retrying one by one.")
+            for candidate_id, record in pairs:
+                try:
+                    self.store.upsert(record, candidate_id)
+                except Exception as record_error:
+                    failed[candidate_id] = record_error
+        saved = [(candidate_id, record) for candidate_id, record in pairs if candidate_id not in failed]
+        failed_tickets = sum(t.candidate_id in failed for t in tickets)
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["saved"] += len(tickets) - failed_tickets
+            self.stats["failed"] += failed_tickets
+        for ticket in tickets:
+            metrics.observe("candidate_writer_ack_seconds", time.time() - ticket.submitted_at)
+            ticket._resolve(failed.get(ticket.candidate_id))
+        if saved and self.after_commit is not None:
+            try:
+                self.after_commit(saved)
+            except Exception as e:
+                print(f"Candidate writer: post-commit update failed: {e}")
+
+
+def update_derived_data(pairs):
+    """Brings the search index, analytics aggregates and answer scoring up to date after a commit."""
+    from answer_evaluator import get_answer_evaluator
+    from candidate_aggregates import get_candidate_aggregates
+    from candidate_search import index_candidate
+
+    for candidate_id, record in pairs:
+        index_candidate(candidate_id, record)
+    try:
+        get_candidate_aggregates().update_many(pairs)
+    except Exception as e:
+        print(f"Could not update analytics aggregates: {e}")
+    evaluator = get_answer_evaluator()
+    for candidate_id, record in pairs:
+        # Scoring runs in its own workers; this only enqueues the job
+        evaluator.submit(candidate_id, record)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_candidate_writer():
+    """Returns the process-wide writer for the candidate store, starting its thread on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = CandidateWriter(
+                max_queue=int(os.getenv("CANDIDATE_WRITER_QUEUE", "1000")),
+                max_batch=int(os.getenv("CANDIDATE_WRITER_BATCH", "64")),
+                after_commit=update_derived_data,
+            )
+        return _writer
@@ -1,76 +1,253 @@
 import os
-import google.generativeai as genai
+from gemini_client import create_model, generation_config, get_genai
+from interview_flow import END_MESSAGE, GREETING_MESSAGE
+from metrics import metrics
+from model_router import ModelRouter
+from prompt_budget import max_output_tokens, plan_prompt
+from question_bank import DEFAULT_BANK_PATH, QuestionBank
+from question_cache import QuestionCache, make_cache_key
+from question_diversity import is_near_duplicate, select_diverse
+from response_parser import (Question, ResponseParseError, iter_plain_questions, looks_like_json, parse_plain,
+                             parse_structured)
+from single_flight import FlightTimeout, SingleFlight
+
+QUESTION_PROMPT_TEMPLATE = (
+    "Generate 3 to 5 highly relevant and concise technical interview questions for a candidate "
+    "who is skilled in: {skills}. "
+    "Format the output as a simple numbered list, with no introductory or concluding sentences, "
+    "just the questions themselves. Ensure questions are diverse if multiple topics are provided."
+)
+QUESTION_JSON_PROMPT_TEMPLATE = (
+    "Generate 3 to 5 highly relevant and concise technical interview questions for a candidate "
+    "who is skilled in: {skills}. "
+    'Respond with JSON only, in the form {{"questions": [{{"question": "...", "topic": "...", '
+    '"difficulty": "easy|medium|hard"}}]}}. '
+    "Ensure questions are diverse if multiple topics are provided."
+)
+QUESTION_TEMPERATURE = 0.7
+MIN_QUESTIONS = 3 # Fewer are padded with general questions
+MAX_QUESTIONS = 5 # The "3 to 5" in the prompts; also sizes max_output_tokens
+# "json" asks for structured output on one-shot generation; "text" uses the numbered-list prompt.
+# Streaming always uses the numbered list so each question can be shown as soon as its line is complete.
+QUESTION_OUTPUT_MODE = os.getenv("QUESTION_OUTPUT_MODE", "json")
+
+# Models to try in order of preference; the router reorders them by observed health.
+# Moving away from gemini-2.0-flash due to quota limits
+models_to_try = [
+    "gemini-flash-latest",
+    "gemini-pro-latest",
+    "gemini-2.0-flash-lite-preview-02-05",
+    "gemini-2.0-flash-exp",
+    "gemini-2.0-flash"
+]
+
+# One client per model, shared across calls. Inspect model_router.snapshot() to see why a model was skipped.
+model_router = ModelRouter(
+    models_to_try,
+    create_model,
+    hedge_quantile=float(os.getenv("QUESTION_HEDGE_QUANTILE", "0.9")),
+    max_hedges_per_minute=int(os.getenv("QUESTION_HEDGE_MAX_PER_MINUTE", "10")),
+    max_hedge_workers=int(os.getenv("QUESTION_HEDGE_WORKERS", "4")),
+    explore_every=int(os.getenv("QUESTION_EXPLORE_EVERY", "20")), # 0 turns probing off
+)
+# Hedged mode races a second model when the preferred one is slower than its usual p90.
+QUESTION_HEDGING = os.getenv("QUESTION_HEDGING", "0") == "1"
+
+# Shared cache of generated question sets. Set QUESTION_CACHE_DB to an empty string to keep it in memory only.
+question_cache = QuestionCache(db_path=os.getenv("QUESTION_CACHE_DB", os.path.join("candidate_data", "question_cache.sqlite")))
+
+# Offline-built question bank (see question_bank.py); stacks it fully covers never hit the network.
+question_bank = QuestionBank.load(os.getenv("QUESTION_BANK_PATH", DEFAULT_BANK_PATH))
+
+# Concurrent cache misses for the same normalized stack share one LLM request (see single_flight.py).
+# Callers that join another session's request give up after QUESTION_FLIGHT_TIMEOUT seconds.
+question_flights = SingleFlight("questions")
+QUESTION_FLIGHT_TIMEOUT = float(os.getenv("QUESTION_FLIGHT_TIMEOUT", "60"))
+
+class QuestionGenerationError(Exception):
+    """Raised when no model produced usable questions; the last model error is chained as __cause__."""
+
+def _parse_reply(response):
+    """Validates a model reply into Question tuples, falling back to the plain-text parser.
+
+    Raising here makes the router reject the reply and move on to the next model.
+    In JSON mode only a reply that is not JSON at all (a model that ignored the
+    response schema) goes to the plain-text parser; broken or truncated JSON is
+    rejected rather than read line by line.
+    """
+    text = response.text
+    if QUESTION_OUTPUT_MODE == "json":
+        try:
+            return parse_structured(text)
+        except ResponseParseError as e:
+            if looks_like_json(text):
+                raise
+            print(f"Structured reply rejected ({e}); trying the plain-text parser.")
+    return parse_plain(text)
+
+def _pad_questions(questions, tech_stack):
+    """Appends general questions in place when the LLM produced fewer than 3."""
+    if len(questions) < MIN_QUESTIONS:
+        # Fallback if LLM doesn't generate enough
+        print("Warning: LLM generated fewer than 3 questions. Appending general ones.")
+        skill_hint = f" ({tech_stack[0]} perhaps?)" if tech_stack else "" # plan.skills can be empty
+        general_fallback_questions = [
+            f"Describe a challenging technical problem you've solved using one of your listed skills{skill_hint}.",
+            "How do you stay updated with the latest trends and technologies in your field?",
+            "What's your approach to debugging complex issues?"
+        ]
+        for q in general_fallback_questions:
+            if q not in questions:
+                questions.append(q)
+    return questions
+
+def _stored_questions(tech_stack, cache_key):
+    """Returns questions from the question bank or the cache, or None if the LLM is needed."""
+    bank_questions = question_bank.build_question_set(tech_stack)
+    if bank_questions:
+        print("Serving questions from question bank")
+        metrics.inc("question_requests_total", source="bank")
+        return bank_questions
+    cached_questions = question_cache.get(cache_key)
+    if cached_questions:
+        print("Serving questions from cache")
+        metrics.inc("question_requests_total", source="cache")
+        return _pad_questions(list(cached_questions), tech_stack) # Short sets cached before they were skipped
+    metrics.inc("question_requests_total", source="llm")
+    return None
 
 def greet_candidate():
     """Greets the candidate and explains the chatbot's purpose with emojis."""
-    return "👋 Hello there! I'm your **TalentScout AI Assistant**. I'm here to gather some quick information and then ask a few technical questions based on your skills. Let's make this quick and smooth! ✨"
+    return GREETING_MESSAGE
+
+def generate_question_details(tech_stack, position=None):
+    """Returns Question tuples (text, topic, difficulty) for the tech stack.
+
+    Only the skills most relevant to `position` go into the prompt (see
+    prompt_budget.py). Topic and difficulty are only known for freshly generated
+    structured replies; questions from the bank or cache carry the text alone.
+    Raises QuestionGenerationError when every model fails or returns nothing usable;
+    concurrent calls for the same stack share one request and its outcome.
+    """
+    plan = plan_prompt(tech_stack, position)
+    # Both prompt formats share one cache key: only the question texts are stored
+    cache_key = make_cache_key(plan.skills, QUESTION_PROMPT_TEMPLATE, QUESTION_TEMPERATURE)
+    stored_questions = _stored_questions(plan.skills, cache_key)
+    if stored_questions:
+        return [Question(q) for q in stored_questions]
+    try:
+        questions = question_flights.do(("details", cache_key), lambda: _generate_questions(plan, cache_key),
+                                        timeout=QUESTION_FLIGHT_TIMEOUT)
+    except FlightTimeout as e:
+        raise QuestionGenerationError(f"Timed out waiting for questions. (Details: {e})") from e
+    return list(questions)  # Shared with every coalesced caller
 
-def generate_technical_questions(tech_stack):
-    """Generates technical questions based on the provided tech stack using Gemini LLM."""
+def _generate_questions(plan, cache_key):
+    """One LLM round trip for generate_question_details; caches and returns the Question tuples."""
+    if QUESTION_OUTPUT_MODE == "json":
+        prompt = QUESTION_JSON_PROMPT_TEMPLATE.format(skills=plan.skills_text)
+        config = generation_config(temperature=QUESTION_TEMPERATURE, response_mime_type="application/json",
+                                   max_output_tokens=max_output_tokens(MAX_QUESTIONS, "json"))
+    else:
+        prompt = QUESTION_PROMPT_TEMPLATE.format(skills=plan.skills_text)
+        config = generation_config(temperature=QUESTION_TEMPERATURE,
+                                   max_output_tokens=max_output_tokens(MAX_QUESTIONS, "text"))
+
+    try:
+        generate = model_router.generate_hedged if QUESTION_HEDGING else model_router.generate
+        parsed, _ = generate(prompt, validate=_parse_reply, generation_config=config)
+    except Exception as e:
+        print(f"❌ Error generating questions from Gemini: {e}")
+        raise QuestionGenerationError(f"Could not generate questions. (Details: {e})") from e
+
+    # Drop near-duplicates (e.g. two GIL questions) before padding to the minimum
+    by_text = {q.text: q for q in parsed}
+    texts = select_diverse(list(by_text), k=MAX_QUESTIONS)
+    _pad_questions(texts, plan.skills)
+    texts = texts[:MAX_QUESTIONS]
+    question_cache.put(cache_key, texts)
+    return [by_text.get(text, Question(text)) for text in texts]
+
+def generate_technical_questions(tech_stack, position=None):
+    """Generates technical questions based on the provided tech stack using Gemini LLM.
+
+    Raises QuestionGenerationError if no questions could be generated.
+    """
     if not tech_stack:
         return ["🤔 It looks like you haven't provided your tech stack yet. Please tell me your key skills so I can generate relevant questions!"]
+    return [q.text for q in generate_question_details(tech_stack, position)]
 
-    # Construct a clear and concise prompt for Gemini
-    prompt = (
-        f"Generate 3 to 5 highly relevant and concise technical interview questions for a candidate "
-        f"who is skilled in: {', '.join(tech_stack)}. "
-        f"Format the output as a simple numbered list, with no introductory or concluding sentences, "
-        f"just the questions themselves. Ensure questions are diverse if multiple topics are provided."
-    )
+def stream_technical_questions(tech_stack, position=None):
+    """Yields technical questions one at a time as soon as each line of the Gemini stream is complete.
 
+    Raises QuestionGenerationError if every model fails before producing a question;
+    a stream that breaks off later is padded with general questions instead.
+    Sessions asking for the same stack at the same time share one stream.
+    """
+    if not tech_stack:
+        yield from generate_technical_questions(tech_stack)
+        return
+
+    plan = plan_prompt(tech_stack, position)
+    cache_key = make_cache_key(plan.skills, QUESTION_PROMPT_TEMPLATE, QUESTION_TEMPERATURE)
+    stored_questions = _stored_questions(plan.skills, cache_key)
+    if stored_questions:
+        yield from stored_questions
+        return
+
+    questions = []
     try:
-        # Define the list of models to try in order of preference
-        # Moving away from gemini-2.0-flash due to quota limits
-        models_to_try = [
-            "gemini-flash-latest",
-            "gemini-pro-latest",
-            "gemini-2.0-flash-lite-preview-02-05",
-            "gemini-2.0-flash-exp",
-            "gemini-2.0-flash"
-        ]
+        for q in question_flights.stream(("stream", cache_key), lambda: _stream_questions(plan, cache_key),
+                                         timeout=QUESTION_FLIGHT_TIMEOUT):
+            questions.append(q)
+            yield q
+    except FlightTimeout as e:
+        print(f"❌ Timed out waiting for streamed questions: {e}")
+        if not questions:
+            raise QuestionGenerationError(f"Timed out waiting for questions. (Details: {e})") from e
+    except QuestionGenerationError:
+        raise
+    except Exception:
+        pass # The stream broke off after some questions (logged by _stream_questions); pad below
+
+    produced = len(questions)
+    yield from _pad_questions(questions, plan.skills)[produced:]
 
-        response = None
-        last_exception = None
-
-        for model_name in models_to_try:
-            try:
-                print(f"Trying model: {model_name}")
-                model = genai.GenerativeModel(model_name=model_name)
-                response = model.generate_content(prompt, generation_config=genai.types.GenerationConfig(temperature=0.7))
-                if response:
-                    print(f"Successfully generated with {model_name}")
-                    break
-            except Exception as e:
-                print(f"Failed with {model_name}: {e}")
-                last_exception = e
-                continue
-        
-        if not response and last_exception:
-            raise last_exception
-
-        questions = response.text.strip().split('\n')
-        # Filter out empty strings and potential markdown list indicators if any, then strip whitespace
-        filtered_questions = [q.strip().lstrip('*- ').strip() for q in questions if q.strip()]
-
-        # Ensure we return 3 to 5 questions
-        if len(filtered_questions) < 3:
-            # Fallback if LLM doesn't generate enough
-            print("Warning: LLM generated fewer than 3 questions. Appending general ones.")
-            general_fallback_questions = [
-                f"Describe a challenging technical problem you've solved using one of your listed skills ({tech_stack[0]} perhaps?).",
-                "How do you stay updated with the latest trends and technologies in your field?",
-                "What's your approach to debugging complex issues?"
-            ]
-            for q in general_fallback_questions:
-                if q not in filtered_questions:
-                    filtered_questions.append(q)
-
-        return filtered_questions[:5] # Ensure max of 5 questions
+def _complete_lines(chunks):
+    """Yields each line of a streamed reply as soon as it is complete."""
+    buffer = ""
+    for text in chunks:
+        buffer += text
+        *complete_lines, buffer = buffer.split('\n')
+        yield from complete_lines
+    yield buffer
 
+def _stream_questions(plan, cache_key):
+    """One streamed LLM round trip, shared by every session asking for the same stack at once.
+
+    Yields each new question as its line completes and caches the set if the
+    stream finished. Raises QuestionGenerationError if no question was produced;
+    a stream error after that is re-raised and the callers pad instead.
+    """
+    prompt = QUESTION_PROMPT_TEMPLATE.format(skills=plan.skills_text)
+    questions = []
+    try:
+        chunks, _ = model_router.generate_stream(
+            prompt, generation_config=generation_config(
+                temperature=QUESTION_TEMPERATURE, max_output_tokens=max_output_tokens(MAX_QUESTIONS, "text")))
+        for q in iter_plain_questions(_complete_lines(chunks)):
+            if len(questions) < MAX_QUESTIONS and not is_near_duplicate(q, questions):
+                questions.append(q)
+                yield q
     except Exception as e:
-        print(f"❌ Error generating questions from Gemini: {e}")
-        error_details = str(e)
-        return [f"Error: Could not generate questions. (Details: {e})"]
+        print(f"❌ Error streaming questions from Gemini: {e}")
+        if not questions:
+            raise QuestionGenerationError(f"Could not generate questions. (Details: {e})") from e
+        raise
+    if len(questions) >= MIN_QUESTIONS:
+        # Only complete replies with a full set are reused for other candidates; a short one is padded
+        # by the callers and generated afresh next time
+        question_cache.put(cache_key, questions)
 
 def handle_fallback():
     """Provides a fallback response for unclear input."""
@@ -78,25 +255,21 @@ def handle_fallback():
 
 def end_conversation():
     """Gracefully concludes the conversation with a positive closing."""
-    return "Thank you for your time and for sharing your information! Your details and answers have been successfully recorded. We'll be in touch very soon regarding the next steps in our hiring process. Have a fantastic day! 😊👋"
+    return END_MESSAGE
 
 if __name__ == "__main__":
-    from dotenv import load_dotenv
-    load_dotenv()
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    get_genai()
 
     # Example usage for testing functions directly
     print(greet_candidate())
     print("\n--- Example 1: Python & React ---")
     tech_stack_example_1 = ["Python", "React"]
-    questions_1 = generate_technical_questions(tech_stack_example_1)
-    for q in questions_1:
-        print(f"- {q}")
+    for q in generate_question_details(tech_stack_example_1):
+        print(f"- {q.text} [{q.topic or '-'}, {q.difficulty or '-'}]")
 
     print("\n--- Example 2: AWS & SQL ---")
     tech_stack_example_2 = ["AWS", "SQL"]
-    questions_2 = generate_technical_questions(tech_stack_example_2)
-    for q in questions_2:
-        print(f"- {q}")
+    for q in generate_question_details(tech_stack_example_2):
+        print(f"- {q.text} [{q.topic or '-'}, {q.difficulty or '-'}]")
 
     print("\n" + end_conversation())
\ No newline at end of file
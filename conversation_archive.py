@@ -0,0 +1,388 @@
+"""Compact archive for candidate conversation histories.
+
+Most of a stored conversation is boilerplate: the greeting, the step prompts
+and acknowledgements, the questions intro and end_conversation(). Each
+message is therefore stored as (role, template ID, argument), where the
+argument is only the part that differs from the template ("kit" in
+"Nice to meet you, **kit**! 👋"). Decoding is lossless for any text.
+
+File layout (all integers little-endian):
+
+    b"CVA1" | block 0 | block 1 | ... | footer | trailer
+
+Each block holds up to `block_size` candidates in columnar form (message
+counts, role IDs, template IDs, argument lengths, then every argument's UTF-8
+bytes), compressed as one zstd frame (if the `zstandard` package is
+installed) or gzip member. The footer is compressed JSON with the template
+table, the block offsets and a candidate ID -> (block, position) index, so
+reading one transcript decompresses only its block. The 20-byte trailer
+(footer offset, footer length, codec, magic) is read first.
+
+Conversations are streamed from the candidate store (get_candidate_store(),
+see CANDIDATE_STORE / CANDIDATE_DB), so only one block is held in memory
+while building; import legacy JSON files with ingest_candidates.py first.
+
+    python conversation_archive.py build -o candidate_data/conversations.cva
+    python conversation_archive.py report --limit 1000
+    python conversation_archive.py show candidate_data/conversations.cva <candidate_id>
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from itertools import islice
+
+from interview_flow import (
+    ANSWERS_INTRO, END_MESSAGE, FLOWS, GREETING_MESSAGE, QUESTIONS_ERROR_MESSAGE, QUESTIONS_INTRO,
+    TECH_STACK_MESSAGE, TECH_STACK_PROMPT,
+)
+
+try:
+    import zstandard
+except ImportError:  # Optional; gzip is always available
+    zstandard = None
+
+MAGIC = b"CVA1"
+_TRAILER = struct.Struct("<QI4s4s")
+DEFAULT_BLOCK_SIZE = 32
+
+
+def default_templates():
+    """Returns the fixed assistant/user texts as [(prefix, suffix)], "{value}" marking the variable part.
+
+    A text without "{value}" still matches messages that extend it, such as the
+    questions intro followed by the questions.
+    """
+    texts = [GREETING_MESSAGE, END_MESSAGE, TECH_STACK_PROMPT, TECH_STACK_MESSAGE, QUESTIONS_INTRO,
+             QUESTIONS_ERROR_MESSAGE, ANSWERS_INTRO]
+    for flow in FLOWS.values():
+        for step in flow.steps.values():
+            texts += [step.prompt, step.ack_template, step.error_message]
+    templates = []
+    for text in dict.fromkeys(t for t in texts if t):
+        prefix, _, suffix = text.partition("{value}")
+        templates.append((prefix, suffix))
+    return templates
+
+
+def _compress(data, codec):
+    if codec == b"zstd":
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _decompress(data, codec):
+    if codec == b"zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive is zstd-compressed; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _le_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class TemplateCodec:
+    """Maps message text to (template ID, argument) and back; ID 0 is "no template"."""
+
+    def __init__(self, templates):
+        self.templates = [("", "")] + [tuple(t) for t in templates]
+        # Longest templates first, so a message matches the most specific one
+        self._by_length = sorted(range(1, len(self.templates)), key=lambda i: -len("".join(self.templates[i])))
+
+    def encode(self, text):
+        for template_id in self._by_length:
+            prefix, suffix = self.templates[template_id]
+            if (len(text) >= len(prefix) + len(suffix) and text.startswith(prefix) and text.endswith(suffix)):
+                return template_id, text[len(prefix):len(text) - len(suffix)]
+        return 0, text
+
+    def decode(self, template_id, argument):
+        prefix, suffix = self.templates[template_id]
+        return prefix + argument + suffix
+
+
+class ArchiveWriter:
+    """Streams candidates into an archive; use as a context manager or call close()."""
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE, codec=None, templates=None):
+        self.path = path
+        self.block_size = block_size
+        self.codec = codec or (b"zstd" if zstandard is not None else b"gzip")
+        if self.codec == b"zstd" and zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard).")
+        self.templates = TemplateCodec(default_templates() if templates is None else templates)
+        self.roles = {}
+        self.blocks = []
+        self.index = {}
+        self._pending = []
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(MAGIC)
+
+    def add(self, candidate_id, messages):
+        """Queues one candidate's conversation (a list of {"role", "content"} dicts)."""
+        if candidate_id in self.index:
+            raise ValueError(f"Candidate {candidate_id} is already in the archive.")
+        self.index[candidate_id] = (len(self.blocks), len(self._pending))
+        self._pending.append(messages)
+        if len(self._pending) >= self.block_size:
+            self._flush()
+
+    def _flush(self):
+        counts, roles, template_ids, lengths, arguments = array("I"), bytearray(), array("H"), array("I"), []
+        for messages in self._pending:
+            counts.append(len(messages))
+            for message in messages:
+                roles.append(self.roles.setdefault(message.get("role", ""), len(self.roles)))
+                template_id, argument = self.templates.encode(message.get("content", ""))
+                argument = argument.encode("utf-8")
+                template_ids.append(template_id)
+                lengths.append(len(argument))
+                arguments.append(argument)
+        columns = [_le_bytes(counts), bytes(roles), _le_bytes(template_ids), _le_bytes(lengths), b"".join(arguments)]
+        header = struct.pack("<II", len(counts), len(roles))
+        data = _compress(header + b"".join(columns), self.codec)
+        self.blocks.append((self._file.tell(), len(data)))
+        self._file.write(data)
+        self._pending = []
+
+    def close(self):
+        if self._pending:
+            self._flush()
+        footer = _compress(json.dumps({
+            "templates": self.templates.templates[1:],
+            "roles": list(self.roles),
+            "blocks": self.blocks,
+            "index": self.index,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), self.codec)
+        offset = self._file.tell()
+        self._file.write(footer)
+        self._file.write(_TRAILER.pack(offset, len(footer), self.codec, MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+
+class ArchiveReader:
+    """Random and sequential access to an archive; keeps the most recently decoded blocks."""
+
+    def __init__(self, path, cached_blocks=4):
+        self.path = path
+        self._file = open(path, "rb")
+        self._file.seek(-_TRAILER.size, os.SEEK_END)
+        offset, length, self.codec, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a conversation archive.")
+        self._file.seek(offset)
+        footer = json.loads(_decompress(self._file.read(length), self.codec))
+        self.templates = TemplateCodec(footer["templates"])
+        self.roles = footer["roles"]
+        self.blocks = footer["blocks"]
+        self.index = footer["index"]
+        self._cache = OrderedDict()
+        self._cached_blocks = cached_blocks
+
+    def _read_block(self, block_no):
+        if block_no in self._cache:
+            self._cache.move_to_end(block_no)
+            return self._cache[block_no]
+        offset, length = self.blocks[block_no]
+        self._file.seek(offset)
+        data = _decompress(self._file.read(length), self.codec)
+        n_candidates, n_messages = struct.unpack_from("<II", data)
+        pos = 8
+        counts = _le_array("I", data[pos:pos + 4 * n_candidates])
+        pos += 4 * n_candidates
+        roles = data[pos:pos + n_messages]
+        pos += n_messages
+        template_ids = _le_array("H", data[pos:pos + 2 * n_messages])
+        pos += 2 * n_messages
+        lengths = _le_array("I", data[pos:pos + 4 * n_messages])
+        pos += 4 * n_messages
+        conversations, m = [], 0
+        for count in counts:
+            messages = []
+            for _ in range(count):
+                argument = data[pos:pos + lengths[m]].decode("utf-8")
+                pos += lengths[m]
+                messages.append({"role": self.roles[roles[m]],
+                                 "content": self.templates.decode(template_ids[m], argument)})
+                m += 1
+            conversations.append(messages)
+        self._cache[block_no] = conversations
+        if len(self._cache) > self._cached_blocks:
+            self._cache.popitem(last=False)
+        return conversations
+
+    def get(self, candidate_id):
+        """Returns one candidate's conversation, or None if it is not archived."""
+        location = self.index.get(candidate_id)
+        if location is None:
+            return None
+        block_no, position = location
+        return self._read_block(block_no)[position]
+
+    def __iter__(self):
+        """Yields (candidate_id, conversation) in archive order, one block at a time."""
+        ids_by_block = {}
+        for candidate_id, (block_no, position) in self.index.items():
+            ids_by_block.setdefault(block_no, {})[position] = candidate_id
+        for block_no in range(len(self.blocks)):
+            for position, messages in enumerate(self._read_block(block_no)):
+                yield ids_by_block[block_no][position], messages
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self.index
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_archive(path, conversations, block_size=DEFAULT_BLOCK_SIZE, codec=None):
+    """Archives (candidate_id, conversation) pairs; returns the number written."""
+    with ArchiveWriter(path, block_size, codec) as writer:
+        for candidate_id, messages in conversations:
+            writer.add(candidate_id, messages)
+    return len(writer.index)
+
+
+def iter_conversations(store=None):
+    """Yields (candidate_id, conversation) for every candidate in the store, one record at a time."""
+    if store is None:
+        from candidate_store import get_candidate_store
+
+        store = get_candidate_store()
+    for candidate_id, record in store.iter_records():
+        yield candidate_id, record.get("conversation_history", [])
+
+
+def report(conversations, block_size=DEFAULT_BLOCK_SIZE, codec=None, repeat=200):
+    """Prints archive size and read speed against the indent=4 JSON the app writes today.
+
+    `conversations` is a list: the benchmark reads it several times, so pass a bounded sample.
+    """
+    if not conversations:
+        print("No stored candidates found.")
+        return
+    json_bytes = sum(len(json.dumps(messages, indent=4).encode("utf-8")) for _, messages in conversations)
+    gzip_bytes = sum(len(gzip.compress(json.dumps(messages, indent=4).encode("utf-8"), 9, mtime=0))
+                     for _, messages in conversations)
+    templates = TemplateCodec(default_templates())
+    interned = sum(templates.encode(m.get("content", ""))[0] != 0 for _, messages in conversations for m in messages)
+    total_messages = sum(len(messages) for _, messages in conversations)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="conversation_archive_"), "report.cva")
+    write_archive(path, conversations, block_size, codec)
+    archive_bytes = os.path.getsize(path)
+    print(f"{len(conversations)} conversations, {total_messages} messages "
+          f"({interned} matched a template, {interned / max(1, total_messages):.0%})")
+    print(f"  conversation_history as indent=4 JSON: {json_bytes:>9,} bytes")
+    print(f"  same, gzip -9 per file:                {gzip_bytes:>9,} bytes ({json_bytes / gzip_bytes:.1f}x smaller)")
+    with ArchiveReader(path) as reader:
+        print(f"  archive ({reader.codec.decode()}, {len(reader.blocks)} blocks):         "
+              f"{archive_bytes:>9,} bytes ({json_bytes / archive_bytes:.1f}x smaller)")
+        for candidate_id, messages in conversations:
+            assert reader.get(candidate_id) == messages, f"{candidate_id} did not round-trip"
+
+    # Full scans, and random lookups with a cold block cache (a new reader each time)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with ArchiveReader(path) as reader:
+            scanned = sum(len(messages) for _, messages in reader)
+    scan_seconds = (time.perf_counter() - start) / repeat
+    lookups = []
+    for i in range(repeat):
+        candidate_id = conversations[(i * 7919) % len(conversations)][0]
+        start = time.perf_counter()
+        with ArchiveReader(path, cached_blocks=0) as reader:
+            reader.get(candidate_id)
+        lookups.append(time.perf_counter() - start)
+    json_dir = os.path.dirname(path)
+    for i, (_, messages) in enumerate(conversations):
+        with open(os.path.join(json_dir, f"{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(messages, f, indent=4)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for i in range(len(conversations)):
+            with open(os.path.join(json_dir, f"{i}.json"), encoding="utf-8") as f:
+                json.load(f)
+    json_seconds = (time.perf_counter() - start) / repeat
+    print(f"  full scan: {scan_seconds * 1000:.2f} ms ({scanned / scan_seconds:,.0f} messages/s); "
+          f"one JSON file per candidate: {json_seconds * 1000:.2f} ms")
+    print(f"  one transcript, cold open: median {statistics.median(lookups) * 1000:.3f} ms")
+    shutil.rmtree(json_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, inspect and benchmark conversation archives.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Archive every conversation in the candidate store.")
+    build.add_argument("-o", "--output", default=os.path.join("candidate_data", "conversations.cva"))
+    build.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    build.add_argument("--codec", choices=["zstd", "gzip"], default=None)
+    bench = sub.add_parser("report", help="Compare size and read speed with one JSON file per candidate.")
+    bench.add_argument("--limit", type=int, default=1000, help="Stored conversations to sample.")
+    bench.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    bench.add_argument("--codec", choices=["zstd", "gzip"], default=None)
+    show = sub.add_parser("show", help="Print one candidate's conversation.")
+    show.add_argument("archive")
+    show.add_argument("candidate_id")
+    args = parser.parse_args(argv)
+
+    codec = getattr(args, "codec", None)
+    codec = codec.encode() if codec else None
+    if args.command == "build":
+        count = write_archive(args.output, iter_conversations(), args.block_size, codec)
+        print(f"Archived {count} conversations to {args.output} ({os.path.getsize(args.output):,} bytes).")
+    elif args.command == "report":
+        report(list(islice(iter_conversations(), args.limit)), args.block_size, codec)
+    else:
+        with ArchiveReader(args.archive) as reader:
+            messages = reader.get(args.candidate_id)
+        if messages is None:
+            sys.exit(f"{args.candidate_id} is not in {args.archive}.")
+        for message in messages:
+            print(f"[{message['role']}] {message['content']}\n")
+
+
+if __name__ == "__main__":
+    main()
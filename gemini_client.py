@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+
+_genai = None
+_lock = threading.Lock()
+
+
+def get_genai():
+    """Imports and configures google.generativeai once per process, on first use."""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                from dotenv import load_dotenv
+                import google.generativeai as genai
+
+                load_dotenv()
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY is not set. Please set it in your .env file.")
+                genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+
+def create_model(model_name):
+    """Client factory for the model router."""
+    return get_genai().GenerativeModel(model_name=model_name)
+
+
+def generation_config(**kwargs):
+    return get_genai().types.GenerationConfig(**kwargs)
+
+
+def warm_up(router):
+    """Makes one cheap authenticated call (count_tokens) on the preferred model; returns seconds taken.
+
+    This opens the SDK's connection and caches the client in the router so the
+    first candidate does not pay for connection setup. Failures are logged only.
+    """
+    start = time.perf_counter()
+    model_name = router.ordered_models()[0]
+    try:
+        router.get_client(model_name).count_tokens("ping")
+        print(f"Warmed up {model_name} in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Warm-up call to {model_name} failed: {e}")
+    return time.perf_counter() - start
@@ -0,0 +1,169 @@
+"""Bulk importer for legacy candidate_data/*.json files.
+
+Maps both historical schemas to the record format save_candidate_data writes
+and loads them into the candidate store in batched transactions, updating the
+analytics aggregates with each batch:
+
+    python ingest_candidates.py candidate_data --workers 8 --batch-size 500
+
+Several files can map to one candidate (the ID comes from the email). The
+newest file (by modification time, then path) wins whatever order the files
+are read in, and every collision is reported.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from candidate_aggregates import DEFAULT_AGGREGATES_DB, CandidateAggregates
+from candidate_store import DEFAULT_DB_PATH, SqliteCandidateStore, candidate_id_for
+
+# Older files embed answers in the final user message as "**Q1:** question\n**A:** answer"
+_LEGACY_ANSWER = re.compile(r"\*\*Q(\d+):\*\*.*?\n\*\*A:\*\*\s?(.*?)(?=\n\n\*\*Q\d+:\*\*|\s*$)", re.S)
+
+
+class MalformedRecord(ValueError):
+    pass
+
+
+def _legacy_answers(conversation):
+    for message in reversed(conversation):
+        if message.get("role") == "user" and "**A:**" in message.get("content", ""):
+            return {f"Q{n}": answer.strip() for n, answer in _LEGACY_ANSWER.findall(message["content"])}
+    return {}
+
+
+def normalize_record(data):
+    """Maps either legacy schema to the canonical candidate record."""
+    if not isinstance(data, dict) or not isinstance(data.get("candidate_info"), dict):
+        raise MalformedRecord("missing candidate_info")
+    if "technical_questions" in data or "conversation_history" in data:
+        questions = data.get("technical_questions", [])
+        answers = data.get("technical_answers", {})
+        conversation = data.get("conversation_history", [])
+    elif "tech_questions" in data or "conversation" in data:
+        questions = data.get("tech_questions", [])
+        conversation = data.get("conversation", [])
+        answers = _legacy_answers(conversation)
+    else:
+        raise MalformedRecord("unrecognized schema")
+    if not isinstance(questions, list) or not isinstance(conversation, list) or not isinstance(answers, dict):
+        raise MalformedRecord("wrong field types")
+    info = dict(data["candidate_info"])
+    tech_stack = info.get("tech_stack", [])
+    info["tech_stack"] = [tech_stack] if isinstance(tech_stack, str) else list(tech_stack or [])
+    return {
+        "candidate_info": info,
+        "technical_questions": questions,
+        "technical_answers": answers,
+        "conversation_history": conversation,
+    }
+
+
+def load_file(path):
+    """Parses one file; returns (path, candidate_id, record, size, mtime, error)."""
+    try:
+        stat = os.stat(path)
+        with open(path, encoding="utf-8") as f:
+            record = normalize_record(json.load(f))
+    except (OSError, ValueError) as e:
+        return path, None, None, 0, 0.0, f"{type(e).__name__}: {e}"
+    if (record["candidate_info"].get("email") or "").strip():
+        candidate_id = candidate_id_for(record["candidate_info"])
+    else:
+        # Keep re-imports idempotent for records without an email
+        candidate_id = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return path, candidate_id, record, stat.st_size, stat.st_mtime, None
+
+
+def iter_json_files(paths):
+    """Lazily yields every *.json file under the given files/directories."""
+    for root in paths:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith(".json"):
+                    yield os.path.join(dirpath, name)
+
+
+def ingest(paths, store, workers=8, batch_size=500, use_processes=False, aggregates=None):
+    """Streams files through a worker pool and upserts them batch by batch; returns a report dict.
+
+    "imported" counts distinct candidates stored and "upserts" the rows written
+    (a newer colliding file in a later batch overwrites an earlier one).
+    "collisions" lists (candidate_id, kept path, skipped path). Only the newest
+    (mtime, path) per candidate seen so far is kept in memory, not the records.
+    """
+    report = {"files": 0, "imported": 0, "upserts": 0, "malformed": [], "collisions": [], "bytes": 0}
+    newest = {}  # candidate_id -> (mtime, path) of the file stored for it
+    start = time.perf_counter()
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    files = iter_json_files(paths)
+    with executor_cls(max_workers=workers) as executor:
+        # Only one batch of paths and parsed records is held in memory at a time
+        while True:
+            batch_paths = list(islice(files, batch_size))
+            if not batch_paths:
+                break
+            batch = {}
+            for path, candidate_id, record, size, mtime, error in executor.map(load_file, batch_paths, chunksize=16):
+                report["files"] += 1
+                if error:
+                    report["malformed"].append((path, error))
+                    continue
+                report["bytes"] += size
+                previous = newest.get(candidate_id)
+                if previous is not None:
+                    kept, skipped = max(previous, (mtime, path)), min(previous, (mtime, path))
+                    report["collisions"].append((candidate_id, kept[1], skipped[1]))
+                    if kept == previous:
+                        continue
+                newest[candidate_id] = (mtime, path)
+                batch[candidate_id] = record
+            pairs = list(batch.items())
+            store.upsert_many(pairs)
+            if aggregates is not None:
+                aggregates.update_many(pairs)  # Replaces an overwritten candidate's previous contribution
+            report["upserts"] += len(pairs)
+            report["imported"] = len(newest)
+            print(f"Imported {report['imported']} candidates from {report['files']} files...")
+    elapsed = time.perf_counter() - start
+    report["seconds"] = elapsed
+    report["files_per_second"] = report["files"] / elapsed if elapsed else 0.0
+    report["mb_per_second"] = report["bytes"] / 1e6 / elapsed if elapsed else 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import legacy candidate JSON files into the candidate store.")
+    parser.add_argument("paths", nargs="*", default=["candidate_data"])
+    parser.add_argument("--db", default=os.getenv("CANDIDATE_DB", DEFAULT_DB_PATH))
+    parser.add_argument("--aggregates-db", default=os.getenv("CANDIDATE_AGGREGATES_DB", DEFAULT_AGGREGATES_DB))
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--processes", action="store_true", help="Parse in worker processes instead of threads.")
+    args = parser.parse_args(argv)
+
+    report = ingest(args.paths, SqliteCandidateStore(args.db), args.workers, args.batch_size, args.processes,
+                    CandidateAggregates(args.aggregates_db))
+    print(f"\nFiles: {report['files']}  Imported: {report['imported']} candidates ({report['upserts']} upserts)  "
+          f"Collisions: {len(report['collisions'])}  Malformed: {len(report['malformed'])}")
+    print(f"Time: {report['seconds']:.2f}s  ({report['files_per_second']:.0f} files/s, "
+          f"{report['mb_per_second']:.1f} MB/s)")
+    for candidate_id, kept, skipped in report["collisions"]:
+        print(f"  ⚠️ {candidate_id}: kept {kept}, skipped older {skipped}")
+    for path, error in report["malformed"]:
+        print(f"  ❌ {path}: {error}")
+    if report["imported"]:
+        # The search index lives in each app process and is built from the store on first use
+        print("Analytics aggregates are updated; restart running app processes to search the new candidates.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import re
+from dataclasses import dataclass, replace
+from typing import Optional, Pattern
+
+# Validators are compiled once at import time and matched against the stripped input
+NAME_RE = re.compile(r"^.{2,}$")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+PHONE_RE = re.compile(r"^(?=.*\d)[\d -]{8,}$")
+YEARS_RE = re.compile(r"^\d+$")
+FREE_TEXT_RE = re.compile(r"^.{3,}$")
+
+
+@dataclass(frozen=True)
+class Step:
+    """One step of an interview flow.
+
+    `kind` selects the handler in app.py: "greeting", "chat" (single chat_input
+    answer stored in `field`), "tech_stack" or "technical_questions".
+    """
+    name: str
+    kind: str
+    next_step: Optional[str] = None
+    prompt: str = ""
+    field: Optional[str] = None
+    validator: Optional[Pattern] = None
+    ack_template: str = ""
+    error_message: str = ""
+
+    def validate(self, value):
+        return self.validator is None or bool(self.validator.match(value.strip()))
+
+    def acknowledge(self, value):
+        return self.ack_template.format(value=value.strip())
+
+
+class InterviewFlow:
+    """An ordered set of steps with O(1) lookup by step name."""
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = {step.name: step for step in steps}
+        self.first_step = steps[0].name
+        for step in steps:
+            if step.next_step is not None and step.next_step not in self.steps:
+                raise ValueError(f"Flow {name!r}: step {step.name!r} points to unknown step {step.next_step!r}")
+
+    def get(self, step_name):
+        return self.steps.get(step_name)
+
+    def first_unfinished_step(self, candidate_info, started):
+        """The first step, in flow order, still waiting for its answer; `started` is True once greeted."""
+        name, seen = self.first_step, set()
+        while name is not None and name not in seen:
+            seen.add(name)
+            step = self.steps[name]
+            done = started if step.kind == "greeting" else bool(step.field and candidate_info.get(step.field))
+            if not done:
+                return name
+            name = step.next_step
+        return self.first_step
+
+
+# Opening and closing messages (chatbot_logic.greet_candidate / end_conversation)
+GREETING_MESSAGE = "👋 Hello there! I'm your **TalentScout AI Assistant**. I'm here to gather some quick information and then ask a few technical questions based on your skills. Let's make this quick and smooth! ✨"
+END_MESSAGE = "Thank you for your time and for sharing your information! Your details and answers have been successfully recorded. We'll be in touch very soon regarding the next steps in our hiring process. Have a fantastic day! 😊👋"
+
+# Fixed chat messages around the technical questions; {value} is filled in by app.py
+TECH_STACK_MESSAGE = "My tech stack includes: {value}"
+QUESTIONS_INTRO = "Excellent! Here are a few technical questions for you. Please answer them in detail. Take your time! 👇"
+QUESTIONS_ERROR_MESSAGE = "⚠️ I encountered an issue generating questions for your tech stack. Please try again or simplify your tech stack. {value}"
+ANSWERS_INTRO = "Here are my answers to the technical questions: \n\n"
+
+TECH_STACK_PROMPT = "🛠️ Tell me about your primary tech stack or key skills, separated by commas (e.g., Python, React, AWS, SQL). This helps me tailor questions for you!"
+
+ASK_NAME = Step(
+    "ask_name", "chat", "ask_email",
+    prompt="👤 What's your full name?",
+    field="full_name", validator=NAME_RE,
+    ack_template="Nice to meet you, **{value}**! 👋",
+    error_message="Please enter a valid full name. 🤔",
+)
+ASK_EMAIL = Step(
+    "ask_email", "chat", "ask_phone",
+    prompt="📧 Could you please share your email address?",
+    field="email", validator=EMAIL_RE,
+    ack_template="Got it! Your email has been recorded. 📧",
+    error_message="Please enter a valid email address. ❌",
+)
+ASK_PHONE = Step(
+    "ask_phone", "chat", "ask_experience",
+    prompt="📞 What's your phone number?",
+    field="phone", validator=PHONE_RE,
+    ack_template="Thanks for your phone number! 📞",
+    error_message="Please enter a valid phone number (at least 8 digits, numbers only). 🔢",
+)
+ASK_EXPERIENCE = Step(
+    "ask_experience", "chat", "ask_position",
+    prompt="💼 How many years of professional experience do you have? (e.g., 5)",
+    field="experience", validator=YEARS_RE,
+    ack_template="Okay, **{value} years** of experience. That's helpful! 👍",
+    error_message="Please enter a number for years of experience. 🧐",
+)
+ASK_POSITION = Step(
+    "ask_position", "chat", "ask_location",
+    prompt="🎯 What kind of position(s) are you interested in? (e.g., Software Engineer, Data Scientist)",
+    field="position", validator=FREE_TEXT_RE,
+    ack_template="Understood, you're interested in **{value}** roles. 🚀",
+    error_message="Please tell me about the positions you're interested in. 📝",
+)
+ASK_LOCATION = Step(
+    "ask_location", "chat", "ask_tech_stack",
+    prompt="🌍 What's your current or preferred work location? (e.g., Bengaluru, Remote)",
+    field="location", validator=FREE_TEXT_RE,
+    ack_template="Great! Your location is **{value}**. 📍 Now, let's talk tech!",
+    error_message="Please provide your location. 🌎",
+)
+ASK_TECH_STACK = Step(
+    "ask_tech_stack", "tech_stack", "technical_questions",
+    prompt=TECH_STACK_PROMPT, field="tech_stack",
+    error_message="Please list your tech stack before submitting. 🤔",
+)
+TECHNICAL_QUESTIONS = Step(
+    "technical_questions", "technical_questions",
+    error_message="Please answer all the technical questions before submitting. 🙏",
+)
+
+FLOWS = {
+    "default": InterviewFlow("default", [
+        Step("greeting", "greeting", "ask_name"),
+        ASK_NAME, ASK_EMAIL, ASK_PHONE, ASK_EXPERIENCE, ASK_POSITION, ASK_LOCATION,
+        ASK_TECH_STACK, TECHNICAL_QUESTIONS,
+    ]),
+    # Shorter screen for high-volume openings: contact details, then straight to tech
+    "quick_screen": InterviewFlow("quick_screen", [
+        Step("greeting", "greeting", "ask_name"),
+        ASK_NAME,
+        replace(ASK_EMAIL, next_step="ask_tech_stack"),
+        ASK_TECH_STACK, TECHNICAL_QUESTIONS,
+    ]),
+}
+
+
+def register_flow(flow):
+    """Adds or replaces a named interview flow (e.g. one per job opening)."""
+    FLOWS[flow.name] = flow
+
+
+def get_flow(name=None):
+    """Returns the named flow, falling back to the default one."""
+    return FLOWS.get(name or "default", FLOWS["default"])
@@ -0,0 +1,229 @@
+"""In-process counters and histograms with Prometheus text and JSON export.
+
+Everything is recorded in this process only. Two optional exporters are
+started by start_exporters_from_env():
+
+    METRICS_PORT=9464            serves http://127.0.0.1:9464/metrics (Prometheus text)
+    METRICS_JSON_PATH=m.json     rewrites a JSON snapshot every METRICS_JSON_INTERVAL seconds (default 60)
+
+Run directly to print the last JSON dump as Prometheus-style text:
+
+    python metrics.py candidate_data/metrics.json
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds; a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 8)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is O(log buckets)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate quantile: the upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+    def as_dict(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, label_key) -> float
+        self._histograms = {}  # (name, label_key) -> Histogram
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the wall time of the block in `name`, labelled with outcome and error class.
+
+        The yielded dict can be updated inside the block to add labels.
+        """
+        labels = dict(labels)
+        start = time.perf_counter()
+        try:
+            yield labels
+        except BaseException as e:
+            labels.setdefault("outcome", "error")
+            labels.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            labels.setdefault("outcome", "ok")
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Returns all metrics as a JSON-serialisable dict."""
+        with self._lock:
+            counters = [{"name": n, "labels": dict(k), "value": v} for (n, k), v in sorted(self._counters.items())]
+            histograms = [{"name": n, "labels": dict(k), **h.as_dict()}
+                          for (n, k), h in sorted(self._histograms.items())]
+        return {"time": time.time(), "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self):
+        return render_prometheus(self.snapshot())
+
+    def dump_json(self, path):
+        """Writes a snapshot atomically so readers never see a partial file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def render_prometheus(snapshot):
+    """Formats a snapshot() dict in the Prometheus text exposition format."""
+    lines, typed = [], set()
+    for c in snapshot["counters"]:
+        if c["name"] not in typed:
+            typed.add(c["name"])
+            lines.append(f"# TYPE {c['name']} counter")
+        lines.append(f"{c['name']}{_format_labels(_label_key(c['labels']))} {c['value']:g}")
+    for h in snapshot["histograms"]:
+        name, key = h["name"], _label_key(h["labels"])
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in zip(h["buckets"] + ["+Inf"], h["counts"]):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(key)} {h['sum']:g}")
+        lines.append(f"{name}_count{_format_labels(key)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serves /metrics from a daemon thread; returns the server.
+
+    http.server is imported here rather than with the module: it costs tens
+    of milliseconds and most processes never start the exporter.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def start_json_dumper(path, interval=60.0):
+    """Rewrites `path` with a snapshot every `interval` seconds from a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                metrics.dump_json(path)
+            except OSError as e:
+                print(f"Could not write metrics to {path}: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-json", daemon=True)
+    thread.start()
+    return thread
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters_from_env():
+    """Starts the exporters configured by METRICS_PORT / METRICS_JSON_PATH, once per process."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if os.getenv("METRICS_PORT"):
+            start_http_server(int(os.getenv("METRICS_PORT")), os.getenv("METRICS_HOST", "127.0.0.1"))
+        if os.getenv("METRICS_JSON_PATH"):
+            start_json_dumper(os.getenv("METRICS_JSON_PATH"), float(os.getenv("METRICS_JSON_INTERVAL", "60")))
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8") as f:
+        sys.stdout.write(render_prometheus(json.load(f)))
@@ -0,0 +1,507 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from metrics import COUNT_BUCKETS, TOKEN_BUCKETS, metrics
+
+
+def is_quota_error(exc):
+    """Returns True for rate-limit / quota errors (HTTP 429, ResourceExhausted)."""
+    text = f"{type(exc).__name__} {exc}".lower()
+    return "429" in text or "quota" in text or "resourceexhausted" in text or "rate limit" in text
+
+
+class TruncatedReplyError(Exception):
+    """The model stopped at max_output_tokens (finish_reason MAX_TOKENS), so its reply is cut short."""
+
+
+def finish_reason(response):
+    """Returns the first candidate's finish reason name (e.g. "STOP", "MAX_TOKENS"), or None."""
+    candidates = getattr(response, "candidates", None)
+    if not candidates:
+        return None
+    reason = getattr(candidates[0], "finish_reason", None)
+    if reason is None:
+        return None
+    return getattr(reason, "name", None) or ("MAX_TOKENS" if reason == 2 else str(reason))
+
+
+def _check_truncated(model_name, response):
+    """Logs and counts a reply cut off at max_output_tokens; returns a TruncatedReplyError for it, or None.
+
+    Thinking models spend output tokens on reasoning before any visible text,
+    so a run of these points at max_output_tokens being set too low.
+    """
+    if finish_reason(response) != "MAX_TOKENS":
+        return None
+    usage = getattr(response, "usage_metadata", None)
+    thoughts = getattr(usage, "thoughts_token_count", None)
+    print(f"⚠️ {model_name} hit max_output_tokens" + (f" ({thoughts} thinking tokens)" if thoughts else ""))
+    metrics.inc("llm_truncated_replies_total", model=model_name)
+    return TruncatedReplyError(f"{model_name} stopped at max_output_tokens.")
+
+
+def _error_labels(exc):
+    return {"outcome": "error" if exc else "ok", "error": type(exc).__name__ if exc else None}
+
+
+def _observe_call(model_name, start, exc=None, stream=False):
+    """Records one model attempt in the llm_call_seconds histogram."""
+    metrics.observe("llm_call_seconds", time.perf_counter() - start,
+                    model=model_name, stream=str(stream).lower(), **_error_labels(exc))
+
+
+def _observe_usage(model_name, response):
+    """Records prompt/response token counts when the SDK reports usage_metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is not None:
+        metrics.observe("llm_prompt_tokens", prompt_tokens, buckets=TOKEN_BUCKETS, model=model_name)
+    if response_tokens is not None:
+        metrics.observe("llm_response_tokens", response_tokens, buckets=TOKEN_BUCKETS, model=model_name)
+
+
+def _observe_request(mode, start, attempts, model_name=None, exc=None):
+    """Records a whole routed request, fallback chain included: wall time and number of attempts."""
+    labels = {"mode": mode, "model": model_name, **_error_labels(exc)}
+    metrics.observe("llm_request_seconds", time.perf_counter() - start, **labels)
+    metrics.observe("llm_request_attempts", attempts, buckets=COUNT_BUCKETS, **labels)
+
+
+class ModelHealth:
+    """Rolling health record for a single model."""
+
+    def __init__(self, name, rank):
+        self.name = name
+        self.rank = rank  # position in the preference list, used to break ties
+        self.latency_ewma = None
+        self.latency_samples = deque(maxlen=50)
+        self.last_sampled = None  # time.time() of the latest latency sample
+        self.successes = 0
+        self.failures = 0
+        self.invalid_replies = 0  # answered, but `validate` rejected the reply
+        self.consecutive_invalid = 0
+        self.quota_errors = 0
+        self.consecutive_failures = 0
+        self.error_rate = 0.0  # exponentially weighted, 0.0 = healthy, 1.0 = always failing
+        self.open_until = 0.0
+        self.last_error = None
+
+    def is_open(self, now):
+        return now < self.open_until
+
+    def latency_quantile(self, q):
+        if not self.latency_samples:
+            return None
+        ordered = sorted(self.latency_samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self, now):
+        return {
+            "model": self.name,
+            "rank": self.rank,
+            "latency_ewma": self.latency_ewma,
+            "latency_p90": self.latency_quantile(0.9),
+            "successes": self.successes,
+            "failures": self.failures,
+            "invalid_replies": self.invalid_replies,
+            "consecutive_invalid": self.consecutive_invalid,
+            "quota_errors": self.quota_errors,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 3),
+            "circuit_open": self.is_open(now),
+            "retry_in": max(0.0, round(self.open_until - now, 1)),
+            "last_error": self.last_error,
+        }
+
+
+class ModelRouter:
+    """Routes generation calls to the fastest healthy model.
+
+    One client object is kept per model. Failing models are skipped by a
+    circuit breaker whose cool-down doubles on each consecutive failure;
+    quota errors start from a longer cool-down than other errors. A model
+    whose last `invalid_reply_limit` replies were all rejected by `validate`
+    is tripped the same way. Every `explore_every`-th request probes the
+    healthy model sampled least recently, so models other than the current
+    fastest keep getting measured.
+    """
+
+    def __init__(self, model_names, client_factory, alpha=0.3, base_backoff=2.0,
+                 quota_backoff=30.0, max_backoff=600.0, hedge_quantile=0.9,
+                 hedge_default_deadline=4.0, hedge_min_samples=5, max_hedges_per_minute=10,
+                 max_hedge_workers=4, invalid_reply_limit=3, explore_every=20):
+        self.client_factory = client_factory
+        self.alpha = alpha
+        self.base_backoff = base_backoff
+        self.quota_backoff = quota_backoff
+        self.max_backoff = max_backoff
+        self.hedge_quantile = hedge_quantile
+        self.hedge_default_deadline = hedge_default_deadline
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedges_per_minute = max_hedges_per_minute
+        self.max_hedge_workers = max_hedge_workers
+        self.invalid_reply_limit = invalid_reply_limit
+        self.explore_every = explore_every
+        self._requests = 0
+        self.hedges_launched = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+        self._hedge_times = deque()
+        self._hedges_running = 0
+        self._executor = None
+        self._health = {name: ModelHealth(name, rank) for rank, name in enumerate(model_names)}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_names(self):
+        return list(self._health)
+
+    def get_client(self, model_name):
+        """Returns the shared client for `model_name`, creating it on first use."""
+        with self._lock:
+            client = self._clients.get(model_name)
+            if client is None:
+                client = self.client_factory(model_name)
+                self._clients[model_name] = client
+            return client
+
+    def ordered_models(self, explore=False):
+        """Returns models to try: healthy ones fastest first, then open circuits soonest-to-reopen.
+
+        Untried models rank after measured ones, so on its own this would never
+        try them while the fastest model keeps succeeding. Requests pass
+        `explore=True`: every `explore_every`-th one moves the healthy model
+        sampled least recently (an untried one first) to the front as a probe.
+        """
+        now = time.time()
+        with self._lock:
+            healthy = [h for h in self._health.values() if not h.is_open(now)]
+            tripped = [h for h in self._health.values() if h.is_open(now)]
+            probe = False
+            if explore and self.explore_every:
+                self._requests += 1
+                probe = self._requests % self.explore_every == 0
+        healthy.sort(key=lambda h: (h.latency_ewma is None, h.latency_ewma or 0.0, h.rank))
+        tripped.sort(key=lambda h: h.open_until)
+        if probe and len(healthy) > 1:
+            stalest = min(healthy, key=lambda h: (h.last_sampled is not None, h.last_sampled or 0.0, h.rank))
+            if stalest is not healthy[0]:
+                print(f"Probing {stalest.name}")
+                metrics.inc("llm_probes_total", model=stalest.name)
+                healthy.remove(stalest)
+                healthy.insert(0, stalest)
+        return [h.name for h in healthy + tripped]
+
+    def record_success(self, model_name, latency):
+        with self._lock:
+            h = self._health[model_name]
+            h.successes += 1
+            h.consecutive_failures = 0
+            h.consecutive_invalid = 0
+            h.open_until = 0.0
+            h.error_rate = (1 - self.alpha) * h.error_rate
+            h.latency_samples.append(latency)
+            h.last_sampled = time.time()
+            h.latency_ewma = latency if h.latency_ewma is None else (
+                self.alpha * latency + (1 - self.alpha) * h.latency_ewma)
+
+    def record_invalid_reply(self, model_name, exc):
+        """The model answered but its reply was rejected.
+
+        One bad reply leaves the circuit alone; `invalid_reply_limit` in a row
+        trip it like a failure, so a model that keeps answering with unusable
+        replies stops being tried first. Its latency is not recorded, so a model
+        that answers fast with unusable replies does not rise in the routing order.
+        """
+        with self._lock:
+            h = self._health[model_name]
+            h.invalid_replies += 1
+            h.consecutive_invalid += 1
+            tripped = h.consecutive_invalid >= self.invalid_reply_limit
+        if tripped:
+            self.record_failure(model_name, exc)
+        else:
+            with self._lock:
+                h.last_error = f"{type(exc).__name__}: {exc}"[:200]
+
+    def record_failure(self, model_name, exc):
+        with self._lock:
+            h = self._health[model_name]
+            h.failures += 1
+            h.consecutive_failures += 1
+            h.error_rate = self.alpha + (1 - self.alpha) * h.error_rate
+            h.last_error = f"{type(exc).__name__}: {exc}"[:200]
+            base = self.base_backoff
+            if is_quota_error(exc):
+                h.quota_errors += 1
+                base = self.quota_backoff
+            backoff = min(self.max_backoff, base * (2 ** (h.consecutive_failures - 1)))
+            h.open_until = time.time() + backoff
+
+    def call_model(self, model_name, prompt, validate=None, **kwargs):
+        """Calls a single model and records the outcome in its health record.
+
+        If `validate` is given it is applied to the response and its result is
+        returned instead. A response it rejects (by raising) is re-raised so
+        callers fall through to the next model straight away, but the model did
+        answer: it is counted in `invalid_replies`, and only a run of them
+        trips its circuit (see record_invalid_reply()).
+        A reply cut off at max_output_tokens is treated the same way and raised
+        as TruncatedReplyError, whatever `validate` would make of it.
+        """
+        client = self.get_client(model_name)
+        start = time.perf_counter()
+        try:
+            response = client.generate_content(prompt, **kwargs)
+            _observe_usage(model_name, response)
+        except Exception as e:
+            self.record_failure(model_name, e)
+            _observe_call(model_name, start, e)
+            raise
+        truncated = _check_truncated(model_name, response)
+        if truncated is not None:
+            self.record_invalid_reply(model_name, truncated)
+            _observe_call(model_name, start, truncated)
+            raise truncated
+        if validate is not None:
+            try:
+                response = validate(response)
+            except Exception as e:
+                self.record_invalid_reply(model_name, e)
+                _observe_call(model_name, start, e)
+                raise
+        self.record_success(model_name, time.perf_counter() - start)
+        _observe_call(model_name, start)
+        return response
+
+    def generate(self, prompt, **kwargs):
+        """Tries models in routing order until one answers; returns (response, model_name).
+
+        Accepts the same `validate` callable as call_model().
+        """
+        last_exception = None
+        start, attempts = time.perf_counter(), 0
+        for model_name in self.ordered_models(explore=True):
+            attempts += 1
+            try:
+                print(f"Trying model: {model_name}")
+                response = self.call_model(model_name, prompt, **kwargs)
+                if response:
+                    print(f"Successfully generated with {model_name}")
+                    _observe_request("generate", start, attempts, model_name)
+                    return response, model_name
+            except Exception as e:
+                print(f"Failed with {model_name}: {e}")
+                last_exception = e
+        last_exception = last_exception or RuntimeError("No model returned a response.")
+        _observe_request("generate", start, attempts, exc=last_exception)
+        raise last_exception
+
+    def generate_stream(self, prompt, **kwargs):
+        """Streaming variant of generate(); returns (chunk_text_iterator, model_name).
+
+        A model only counts as answering once its first chunk arrives, so a model
+        that fails up front falls through to the next one. Failures after that
+        point are raised from the iterator.
+        """
+        last_exception = None
+        request_start, attempts = time.perf_counter(), 0
+        for model_name in self.ordered_models(explore=True):
+            client = self.get_client(model_name)
+            start = time.perf_counter()
+            attempts += 1
+            try:
+                print(f"Trying model (streaming): {model_name}")
+                chunks = iter(client.generate_content(prompt, stream=True, **kwargs))
+                first_chunk = next(chunks)
+            except StopIteration:
+                last_exception = RuntimeError(f"{model_name} returned an empty stream.")
+                self.record_failure(model_name, last_exception)
+                _observe_call(model_name, start, last_exception, stream=True)
+                continue
+            except Exception as e:
+                print(f"Failed with {model_name}: {e}")
+                self.record_failure(model_name, e)
+                _observe_call(model_name, start, e, stream=True)
+                last_exception = e
+                continue
+            print(f"Streaming from {model_name}")
+            # For streams the request time is the time to the first chunk
+            _observe_request("stream", request_start, attempts, model_name)
+            return self._stream_texts(model_name, start, first_chunk, chunks), model_name
+        last_exception = last_exception or RuntimeError("No model returned a response.")
+        _observe_request("stream", request_start, attempts, exc=last_exception)
+        raise last_exception
+
+    def _stream_texts(self, model_name, start, first_chunk, chunks):
+        last_chunk = first_chunk
+        try:
+            yield first_chunk.text
+            for last_chunk in chunks:
+                yield last_chunk.text
+        except Exception as e:
+            self.record_failure(model_name, e)
+            _observe_call(model_name, start, e, stream=True)
+            raise
+        self.record_success(model_name, time.perf_counter() - start)
+        _observe_call(model_name, start, stream=True)
+        # The final chunk carries the usage totals and finish reason for the whole reply
+        _observe_usage(model_name, last_chunk)
+        _check_truncated(model_name, last_chunk)  # Already streamed; only logged and counted
+
+    def hedge_deadline(self, model_name):
+        """Seconds to wait on `model_name` before hedging: its observed p-quantile latency."""
+        with self._lock:
+            h = self._health[model_name]
+            if len(h.latency_samples) < self.hedge_min_samples:
+                return self.hedge_default_deadline
+            return h.latency_quantile(self.hedge_quantile)
+
+    def _take_hedge_token(self):
+        """Admits a hedge if fewer than `max_hedges_per_minute` were launched in the last 60s
+        and a hedge worker is free (a hedge that would queue behind slow losers is pointless)."""
+        now = time.time()
+        with self._lock:
+            while self._hedge_times and now - self._hedge_times[0] > 60:
+                self._hedge_times.popleft()
+            if (len(self._hedge_times) >= self.max_hedges_per_minute
+                    or self._hedges_running >= self.max_hedge_workers):
+                self.hedges_denied += 1
+                return False
+            self._hedge_times.append(now)
+            self.hedges_launched += 1
+            self._hedges_running += 1
+            return True
+
+    def _start(self, model_name, prompt, kwargs):
+        """Calls the model on a thread of its own and returns a Future for the result.
+
+        Primary and fallback calls are not pooled: one in-flight call per
+        request, like a call in the caller's thread, so nothing caps how many
+        requests reach the models at once.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.call_model(model_name, prompt, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        print(f"Trying model: {model_name}")
+        threading.Thread(target=run, name=f"gemini-{model_name}", daemon=True).start()
+        return future
+
+    def _submit_hedge(self, model_name, prompt, kwargs):
+        """Runs a hedge on the bounded hedge pool; the caller has taken a hedge token first."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_hedge_workers,
+                                                    thread_name_prefix="gemini-hedge")
+
+        def run():
+            try:
+                return self.call_model(model_name, prompt, **kwargs)
+            finally:
+                with self._lock:
+                    self._hedges_running -= 1
+
+        print(f"Trying model: {model_name}")
+        return self._executor.submit(run)
+
+    def _first_closed(self, model_names):
+        """Returns the first of `model_names` whose circuit is closed, or None."""
+        now = time.time()
+        with self._lock:
+            return next((m for m in model_names if not self._health[m].is_open(now)), None)
+
+    def generate_hedged(self, prompt, **kwargs):
+        """Like generate(), but launches the next model in parallel if the current one is slow.
+
+        If the preferred model has not answered within its p-quantile latency, a
+        second model whose circuit is closed is started and the first valid
+        response wins. The loser is discarded; an in-flight SDK call cannot be
+        interrupted. Hedges run on a pool of `max_hedge_workers` and are capped
+        at `max_hedges_per_minute`; beyond either limit this behaves like generate().
+        """
+        start, attempts = time.perf_counter(), 1
+        remaining = self.ordered_models(explore=True)
+        first = remaining.pop(0)
+        pending = {self._start(first, prompt, kwargs): first}
+        deadline = self.hedge_deadline(first)
+        hedged = False
+        last_exception = None
+
+        while pending:
+            timeout = deadline if (remaining and not hedged) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The current model missed its deadline: hedge once per primary, quota permitting
+                hedged = True
+                model_name = self._first_closed(remaining)
+                if model_name is not None and self._take_hedge_token():
+                    remaining.remove(model_name)
+                    print(f"Hedging with {model_name} after {deadline:.2f}s")
+                    pending[self._submit_hedge(model_name, prompt, kwargs)] = model_name
+                    attempts += 1
+                continue
+
+            for future in done:
+                model_name = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    print(f"Failed with {model_name}: {e}")
+                    last_exception = e
+                    continue
+                if response:
+                    for loser in pending:
+                        loser.cancel()
+                    if hedged and model_name != first:
+                        with self._lock:
+                            self.hedges_won += 1
+                    print(f"Successfully generated with {model_name}")
+                    _observe_request("hedged", start, attempts, model_name)
+                    return response, model_name
+
+            if not pending and remaining:
+                # Everything in flight failed: fall back to the next model, which may hedge again
+                model_name = remaining.pop(0)
+                pending[self._start(model_name, prompt, kwargs)] = model_name
+                attempts += 1
+                deadline = self.hedge_deadline(model_name)
+                hedged = False
+
+        last_exception = last_exception or RuntimeError("No model returned a response.")
+        _observe_request("hedged", start, attempts, exc=last_exception)
+        raise last_exception
+
+    def hedge_stats(self):
+        with self._lock:
+            return {
+                "hedges_launched": self.hedges_launched,
+                "hedges_won": self.hedges_won,
+                "hedges_denied": self.hedges_denied,
+                "max_hedges_per_minute": self.max_hedges_per_minute,
+                "hedges_running": self._hedges_running,
+            }
+
+    def snapshot(self):
+        """Returns the per-model health state, in routing order, for inspection."""
+        order = self.ordered_models()
+        now = time.time()
+        with self._lock:
+            return [self._health[name].as_dict(now) for name in order]
+
+    def reset(self):
+        """Clears all health state (clients are kept)."""
+        with self._lock:
+            self._health = {name: ModelHealth(name, h.rank) for name, h in self._health.items()}
@@ -0,0 +1,159 @@
+import hmac
+import os
+
+import streamlit as st
+
+# Reads the precomputed counters (see candidate_aggregates.py) and only the SCORED_N most recently
+# scored records, so a rerun costs a few indexed queries however many candidates are stored.
+from candidate_aggregates import get_candidate_aggregates
+from candidate_store import get_candidate_store
+
+TOP_N = 15
+SCORED_N = 50
+
+st.set_page_config(page_title="Recruiter Analytics 📊", page_icon="📊", layout="wide")
+
+
+def recruiter_password():
+    """RECRUITER_PASSWORD from .streamlit/secrets.toml, else from the environment (or .env)."""
+    try:
+        if "RECRUITER_PASSWORD" in st.secrets:
+            return st.secrets["RECRUITER_PASSWORD"]
+    except FileNotFoundError:  # No secrets file
+        pass
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("RECRUITER_PASSWORD")
+
+
+def require_recruiter():
+    """Stops the page unless this session has entered the recruiter password.
+
+    The page lives in the same app as the interview, so without a password
+    configured it stays locked rather than showing the question pool to candidates.
+    """
+    if st.session_state.get("recruiter_authenticated"):
+        return
+    password = recruiter_password()
+    st.title("📊 Recruiter Analytics")
+    if not password:
+        st.warning("This page is disabled. Set RECRUITER_PASSWORD in .streamlit/secrets.toml or .env to enable it.")
+        st.stop()
+    entered = st.text_input("Recruiter password", type="password")
+    if entered and hmac.compare_digest(entered.encode(), str(password).encode()):
+        st.session_state.recruiter_authenticated = True
+        st.rerun()
+    if entered:
+        st.error("Incorrect password.")
+    st.stop()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_aggregates(top_n):
+    aggregates = get_candidate_aggregates()
+    return {
+        "total": aggregates.total(),
+        "skill": aggregates.top("skill", top_n),
+        "position": aggregates.top("position", top_n),
+        "location": aggregates.top("location", top_n),
+        "experience": aggregates.experience_histogram(),
+        "question": aggregates.top("question", top_n),
+        "distinct": {d: aggregates.distinct(d) for d in ("skill", "position", "location", "question")},
+    }
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_scores(limit):
+    """The answer evaluator's rubric scores for the `limit` most recently scored candidates."""
+    store = get_candidate_store()
+    scored = []
+    for candidate_id, evaluation in store.recent_evaluations(limit):
+        record = store.get(candidate_id) or {}
+        info = record.get("candidate_info", {})
+        questions = {f"Q{i}": q for i, q in enumerate(record.get("technical_questions", []), 1)}
+        answers = record.get("technical_answers", {})
+        scored.append({
+            "candidate_id": candidate_id,
+            "name": info.get("full_name") or candidate_id,
+            "position": info.get("position", ""),
+            "overall": evaluation.get("overall"),
+            "scores": [{
+                "id": s["id"],
+                "question": questions.get(s["id"], ""),
+                "answer": answers.get(s["id"], ""),
+                "score": s["score"],
+                "rationale": s.get("rationale", ""),
+            } for s in evaluation.get("scores", [])],
+        })
+    return scored
+
+
+def bar_chart(rows, label, value="Candidates"):
+    if not rows:
+        st.info("No data yet.")
+        return
+    st.bar_chart({label: [r[0] for r in rows], value: [r[1] for r in rows]}, x=label, y=value, horizontal=True)
+
+
+require_recruiter()
+st.title("📊 Recruiter Analytics")
+data = load_aggregates(TOP_N)
+if st.button("🔄 Refresh"):
+    load_aggregates.clear()
+    load_scores.clear()
+    st.rerun()
+
+if not data["total"]:
+    st.info("No candidates aggregated yet. After importing existing data, run "
+            "`python candidate_aggregates.py rebuild`.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Candidates", data["total"])
+col2.metric("Distinct skills", data["distinct"]["skill"])
+col3.metric("Positions", data["distinct"]["position"])
+col4.metric("Locations", data["distinct"]["location"])
+
+st.subheader(f"Top {TOP_N} skills")
+bar_chart(data["skill"], "Skill")
+
+st.subheader("Years of experience")
+experience = data["experience"]
+st.bar_chart({"Years": [r[0] for r in experience], "Candidates": [r[1] for r in experience]},
+             x="Years", y="Candidates", sort=False)
+
+left, right = st.columns(2)
+with left:
+    st.subheader("Candidates per position")
+    bar_chart(data["position"], "Position")
+with right:
+    st.subheader("Candidates per location")
+    bar_chart(data["location"], "Location")
+
+st.subheader("Most reused questions")
+st.caption(f"{data['distinct']['question']} distinct questions asked. Exact matches only; "
+           "`python question_diversity.py` also groups near-duplicates.")
+st.dataframe({"Times asked": [r[1] for r in data["question"]], "Question": [r[0] for r in data["question"]]},
+             hide_index=True, width="stretch")
+
+st.subheader("Answer scores")
+scored = load_scores(SCORED_N)
+if not scored:
+    st.info("No answers scored yet.")
+else:
+    st.caption(f"Rubric scores (1-5) from the answer evaluator for the {len(scored)} most recently scored candidates.")
+    st.dataframe({
+        "Candidate": [c["name"] for c in scored],
+        "Position": [c["position"] for c in scored],
+        "Overall": [c["overall"] for c in scored],
+        "Per question": [" · ".join(f"{s['id']}: {s['score']}" for s in c["scores"]) for c in scored],
+    }, hide_index=True, width="stretch")
+    chosen = st.selectbox("Candidate", range(len(scored)), format_func=lambda i: scored[i]["name"])
+    st.dataframe({
+        "#": [s["id"] for s in scored[chosen]["scores"]],
+        "Score": [s["score"] for s in scored[chosen]["scores"]],
+        "Question": [s["question"] for s in scored[chosen]["scores"]],
+        "Answer": [s["answer"] for s in scored[chosen]["scores"]],
+        "Rationale": [s["rationale"] for s in scored[chosen]["scores"]],
+    }, hide_index=True, width="stretch")
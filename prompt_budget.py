@@ -0,0 +1,185 @@
+"""Keeps the question-generation prompt small however many skills a candidate pastes in.
+
+plan_prompt() normalizes and de-duplicates the stack, groups related skills
+into one cluster ("Python web frameworks (Django, Flask)") and keeps the
+`max_skills` skills or clusters most relevant to the position. max_output_tokens() sizes the reply
+budget from the number of questions requested. Run directly to see the savings:
+
+    python prompt_budget.py --position "Frontend Engineer" "React, Vue.js, reactjs, CSS, Django, Flask, Go, ..."
+"""
+import argparse
+import os
+import re
+from dataclasses import dataclass
+
+from candidate_store import normalize_skill
+from metrics import metrics
+
+# Skills (or clusters of related skills) named in the prompt, and members named per cluster
+MAX_SKILLS = int(os.getenv("QUESTION_MAX_SKILLS", "6"))
+MAX_PER_CLUSTER = 3
+
+# Canonical skill (see candidate_store.SKILL_ALIASES) -> cluster it is rendered under
+SKILL_CLUSTERS = {
+    **dict.fromkeys(["django", "flask", "fastapi", "pyramid", "tornado"], "Python web frameworks"),
+    **dict.fromkeys(["react", "vue", "angular", "svelte", "next.js", "nextjs"], "frontend frameworks"),
+    **dict.fromkeys(["html", "css", "sass", "tailwind", "bootstrap"], "web markup and styling"),
+    **dict.fromkeys(["express", "nestjs", "koa"], "Node.js web frameworks"),
+    **dict.fromkeys(["spring", "spring boot", "hibernate"], "Java backend frameworks"),
+    **dict.fromkeys(["aws", "google cloud", "azure"], "cloud platforms"),
+    **dict.fromkeys(["postgresql", "mysql", "sqlite", "oracle", "sql server", "mariadb"], "SQL databases"),
+    **dict.fromkeys(["mongodb", "cassandra", "dynamodb", "redis", "couchdb"], "NoSQL databases"),
+    **dict.fromkeys(["docker", "kubernetes", "helm", "openshift"], "containers and orchestration"),
+    **dict.fromkeys(["jenkins", "github actions", "gitlab ci", "circleci"], "CI/CD"),
+    **dict.fromkeys(["terraform", "ansible", "pulumi", "cloudformation"], "infrastructure as code"),
+    **dict.fromkeys(["pytorch", "tensorflow", "keras", "scikit-learn", "sklearn"], "ML frameworks"),
+    **dict.fromkeys(["pandas", "numpy", "scipy", "polars"], "Python data libraries"),
+    **dict.fromkeys(["kafka", "rabbitmq", "sqs", "pulsar"], "message brokers"),
+    **dict.fromkeys(["android", "ios", "swift", "kotlin", "flutter", "react native"], "mobile development"),
+}
+
+# Words in the position field -> skills and clusters that make a skill relevant to it
+POSITION_SKILLS = {
+    ("frontend", "front-end", "front end", "ui", "web"): {
+        "javascript", "typescript", "frontend frameworks", "web markup and styling"},
+    ("backend", "back-end", "back end", "api", "server"): {
+        "python", "java", "go", "node", "c#", "rust", "Python web frameworks", "Node.js web frameworks",
+        "Java backend frameworks", "SQL databases", "NoSQL databases", "message brokers"},
+    ("full stack", "fullstack", "full-stack"): {
+        "javascript", "typescript", "python", "node", "frontend frameworks", "Python web frameworks",
+        "Node.js web frameworks", "SQL databases"},
+    ("data", "machine learning", "ml", "ai", "analyst", "scientist"): {
+        "python", "sql", "r", "spark", "machine learning", "generative ai", "ML frameworks",
+        "Python data libraries", "SQL databases"},
+    ("devops", "sre", "platform", "infrastructure", "cloud", "reliability"): {
+        "linux", "bash", "go", "python", "cloud platforms", "containers and orchestration", "CI/CD",
+        "infrastructure as code"},
+    ("mobile", "android", "ios"): {"java", "kotlin", "swift", "dart", "mobile development"},
+}
+
+# Reply budget per question: ~35 tokens of question text, plus topic/difficulty fields in JSON mode
+TOKENS_PER_QUESTION = {"json": 80, "text": 50}
+REPLY_OVERHEAD_TOKENS = 64
+# Gemini 2.5 models ("-latest") think before answering and their thinking tokens count against
+# max_output_tokens. google-generativeai cannot set a thinking budget, so the cap leaves room for it.
+THINKING_HEADROOM_TOKENS = int(os.getenv("QUESTION_THINKING_TOKENS", "2048"))
+
+
+def estimate_tokens(text):
+    """Rough Gemini token estimate (about four characters per token) with no API call."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def max_output_tokens(question_count, output_mode="json", thinking_tokens=None):
+    """Output cap for a reply of `question_count` questions, plus headroom for the model's thinking."""
+    if thinking_tokens is None:
+        thinking_tokens = THINKING_HEADROOM_TOKENS
+    return question_count * TOKENS_PER_QUESTION.get(output_mode, 80) + REPLY_OVERHEAD_TOKENS + thinking_tokens
+
+
+@dataclass
+class PromptPlan:
+    skills: list          # kept skills, most relevant first, as the candidate spelled them
+    dropped: list         # skills over the budget, least relevant last
+    skills_text: str      # what goes into the prompt, with related skills clustered
+    tokens_before: int    # estimated tokens of the naive ", ".join(tech_stack)
+    tokens_after: int
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+
+_POSITION_PATTERNS = [
+    (re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")s?\b"), skills)
+    for keywords, skills in POSITION_SKILLS.items()
+]
+
+
+def _position_targets(position):
+    position = (position or "").casefold()
+    targets = set()
+    for pattern, skills in _POSITION_PATTERNS:
+        if pattern.search(position):
+            targets |= skills
+    return targets
+
+
+def _named_in(skill, text):
+    return len(skill) > 2 and re.search(rf"(?<!\w){re.escape(skill)}(?!\w)", text) is not None
+
+
+def group_skills(tech_stack, position=None):
+    """De-duplicates by canonical name, groups skills by cluster and orders groups by relevance.
+
+    Returns [(cluster_or_skill, [(canonical, display), ...])]. A group ranks first
+    if any member is named in the position or listed for it in POSITION_SKILLS
+    (directly or via its cluster); ties keep the candidate's own order.
+    """
+    seen = {}
+    for skill in tech_stack:
+        if skill and skill.strip():
+            seen.setdefault(normalize_skill(skill), " ".join(skill.split()))
+    groups = {}
+    for canonical, display in seen.items():
+        groups.setdefault(SKILL_CLUSTERS.get(canonical, canonical), []).append((canonical, display))
+
+    targets = _position_targets(position)
+    position_text = (position or "").casefold()
+
+    def relevant(key, members):
+        return key in targets or any(c in targets or _named_in(c, position_text) for c, _ in members)
+
+    ranked = sorted(enumerate(groups.items()), key=lambda item: (not relevant(*item[1]), item[0]))
+    return [group for _, group in ranked]
+
+
+def plan_prompt(tech_stack, position=None, max_skills=MAX_SKILLS, max_per_cluster=MAX_PER_CLUSTER):
+    """Builds the skills part of the prompt within budget and records the estimated token savings.
+
+    A cluster of related skills takes one of the `max_skills` slots and names at
+    most `max_per_cluster` members, so the model treats it as one topic.
+    """
+    kept, dropped, parts = [], [], []
+    for i, (key, members) in enumerate(group_skills(tech_stack, position)):
+        if i >= max_skills:
+            dropped += [display for _, display in members]
+            continue
+        names = [display for _, display in members[:max_per_cluster]]
+        dropped += [display for _, display in members[max_per_cluster:]]
+        kept += names
+        parts.append(f"{key} ({', '.join(names)})" if len(members) > 1 else names[0])
+    plan = PromptPlan(
+        skills=kept,
+        dropped=dropped,
+        skills_text=", ".join(parts),
+        tokens_before=estimate_tokens(", ".join(tech_stack)),
+        tokens_after=0,
+    )
+    plan.tokens_after = estimate_tokens(plan.skills_text)
+    metrics.observe("prompt_skills_dropped", len(dropped), buckets=(0, 1, 2, 5, 10, 20, 50))
+    if plan.tokens_saved > 0:
+        metrics.inc("prompt_tokens_saved_total", plan.tokens_saved)
+    if dropped:
+        print(f"Prompt budget: kept {len(kept)} of {len(kept) + len(dropped)} skills "
+              f"(~{plan.tokens_before} -> ~{plan.tokens_after} skill tokens)")
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show how a tech stack is trimmed for the question prompt.")
+    parser.add_argument("tech_stack", help="Comma-separated skills, as typed into the app.")
+    parser.add_argument("--position", default=None)
+    parser.add_argument("--max-skills", type=int, default=MAX_SKILLS)
+    args = parser.parse_args(argv)
+
+    plan = plan_prompt([s.strip() for s in args.tech_stack.split(",")], args.position, args.max_skills)
+    print(f"Prompt skills: {plan.skills_text}")
+    if plan.dropped:
+        print(f"Dropped: {', '.join(plan.dropped)}")
+    print(f"Skill tokens: ~{plan.tokens_before} -> ~{plan.tokens_after} (saved ~{plan.tokens_saved})")
+    print(f"max_output_tokens: {max_output_tokens(5)} (JSON), {max_output_tokens(5, 'text')} (numbered list)")
+
+
+if __name__ == "__main__":
+    main()
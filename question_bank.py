@@ -0,0 +1,184 @@
+"""Precomputed question bank for common skills.
+
+Build or refresh the bank offline, then generate_technical_questions serves
+covered stacks from it without any network call:
+
+    python question_bank.py --skills skills.txt --mine-candidates --per-skill 12
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from candidate_store import get_candidate_store, normalize_skill
+from gemini_client import generation_config, get_genai
+from question_diversity import select_diverse
+from rate_limit import TokenBucket
+from response_parser import parse_plain
+
+DEFAULT_BANK_PATH = os.path.join("candidate_data", "question_bank.json.gz")
+
+BANK_PROMPT_TEMPLATE = (
+    "Generate {count} distinct, concise technical interview questions about {skill}, "
+    "ranging from fundamentals to advanced topics. "
+    "Format the output as a simple numbered list, with no introductory or concluding sentences, "
+    "just the questions themselves."
+)
+
+
+def bank_skills(tech_stack):
+    """Canonical skill names for a stack (aliases resolved, as in candidate_search), de-duplicated and sorted."""
+    return tuple(sorted({normalize_skill(t) for t in tech_stack if isinstance(t, str) and t.strip()}))
+
+
+class QuestionBank:
+    """In-memory view of the bank file: canonical skill -> list of questions.
+
+    Keys from older bank files (case-folded only, e.g. "k8s") are merged into
+    their canonical skill ("kubernetes") on load.
+    """
+
+    def __init__(self, skills=None):
+        self.skills = {}
+        for skill, questions in (skills or {}).items():
+            merged = self.skills.setdefault(normalize_skill(skill), [])
+            merged.extend(q for q in questions if q not in merged)
+
+    @classmethod
+    def load(cls, path=DEFAULT_BANK_PATH):
+        """Loads a bank file; returns an empty bank if the file does not exist."""
+        if not os.path.exists(path):
+            return cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("skills", {}))
+
+    def save(self, path=DEFAULT_BANK_PATH):
+        """Writes the bank atomically as compact gzip-compressed JSON."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "generated_at": time.time(), "skills": self.skills},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def covers(self, tech_stack):
+        """True if every skill in the stack has questions in the bank."""
+        skills = bank_skills(tech_stack)
+        return bool(skills) and all(self.skills.get(s) for s in skills)
+
+    def build_question_set(self, tech_stack, min_questions=3, max_questions=5, pool_size=15):
+        """Picks a diverse question set from the stack's skills, or None if not covered.
+
+        A pool of up to `pool_size` questions is drawn round-robin across skills,
+        then narrowed to `max_questions` by select_diverse.
+        """
+        if not self.covers(tech_stack):
+            return None
+        pools = [random.sample(self.skills[s], len(self.skills[s])) for s in bank_skills(tech_stack)]
+        random.shuffle(pools)
+        questions = []
+        while len(questions) < pool_size and any(pools):
+            for pool in pools:
+                if pool and len(questions) < pool_size:
+                    q = pool.pop()
+                    if q not in questions:
+                        questions.append(q)
+        questions = select_diverse(questions, k=max_questions)
+        return questions if len(questions) >= min_questions else None
+
+
+def mine_candidate_skills(store=None):
+    """Counts candidates listing each canonical skill, streaming every record in the candidate store."""
+    store = store or get_candidate_store()
+    counts = Counter()
+    for _, record in store.iter_records():
+        tech_stack = record.get("candidate_info", {}).get("tech_stack") or []
+        counts.update(bank_skills([tech_stack] if isinstance(tech_stack, str) else tech_stack))
+    return counts
+
+
+def read_skill_list(path):
+    """Reads one skill per line (or comma-separated), ignoring blanks and # comments."""
+    skills = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            skills.extend(s for s in line.split(","))
+    return list(bank_skills(skills))
+
+
+def generate_skill_questions(skill, count, bucket):
+    """Asks the model router for `count` questions about one skill.
+
+    Replies go through response_parser.parse_plain, so preamble and closing
+    lines are dropped, and a reply with no questions moves on to the next model.
+    """
+    from chatbot_logic import model_router
+
+    bucket.acquire()
+    questions, _ = model_router.generate(
+        BANK_PROMPT_TEMPLATE.format(count=count, skill=skill),
+        validate=lambda response: parse_plain(response.text, max_questions=count),
+        generation_config=generation_config(temperature=0.9),
+    )
+    return [q.text for q in questions]
+
+
+def build_bank(skills, bank_path=DEFAULT_BANK_PATH, per_skill=12, concurrency=4,
+               requests_per_second=1.0, refresh=False):
+    """Generates questions for each skill not yet in the bank and saves the result."""
+    bank = QuestionBank.load(bank_path)
+    todo = [s for s in skills if refresh or len(bank.skills.get(s, [])) < per_skill]
+    print(f"{len(skills)} skills requested, {len(todo)} to generate.")
+    bucket = TokenBucket(requests_per_second, capacity=concurrency)
+    failures = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(generate_skill_questions, s, per_skill, bucket): s for s in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            skill = futures[future]
+            try:
+                bank.skills[skill] = list(dict.fromkeys(future.result()))
+                print(f"[{done}/{len(todo)}] {skill}: {len(bank.skills[skill])} questions")
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(todo)}] {skill}: failed ({e})")
+    bank.save(bank_path)
+    print(f"Saved {len(bank.skills)} skills to {bank_path} in {time.perf_counter() - start:.1f}s "
+          f"({failures} failures).")
+    return bank
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate the technical question bank.")
+    parser.add_argument("--skills", help="File with one skill per line.")
+    parser.add_argument("--mine-candidates", action="store_true",
+                        help="Also include every tech_stack skill in the candidate store.")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="Minimum number of candidates listing a mined skill.")
+    parser.add_argument("--per-skill", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=1.0, help="Maximum requests per second.")
+    parser.add_argument("--out", default=DEFAULT_BANK_PATH)
+    parser.add_argument("--refresh", action="store_true", help="Regenerate skills already in the bank.")
+    args = parser.parse_args(argv)
+
+    skills = read_skill_list(args.skills) if args.skills else []
+    if args.mine_candidates:
+        mined = mine_candidate_skills()
+        skills += [s for s, n in mined.most_common() if n >= args.min_count]
+    skills = list(dict.fromkeys(skills))
+    if not skills:
+        parser.error("No skills given; use --skills and/or --mine-candidates.")
+
+    get_genai()
+    build_bank(skills, args.out, args.per_skill, args.concurrency, args.rps, args.refresh)
+
+
+if __name__ == "__main__":
+    main()
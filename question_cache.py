@@ -0,0 +1,134 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_stack(tech_stack):
+    """Case-folds, de-duplicates and sorts a tech stack so equivalent stacks share a key."""
+    return tuple(sorted({t.strip().casefold() for t in tech_stack if t and t.strip()}))
+
+
+def make_cache_key(tech_stack, prompt_template, temperature):
+    """Builds the cache key from the normalized stack, the prompt template and the temperature."""
+    return json.dumps([list(normalize_stack(tech_stack)), prompt_template, float(temperature)], ensure_ascii=False)
+
+
+class QuestionCache:
+    """Two-tier (in-process LRU + optional SQLite) cache of generated question sets.
+
+    Each key holds up to `max_variants` question sets. Until a key has that many
+    variants a lookup counts as a miss, so the first few candidates with a stack
+    still get fresh questions; after that a random stored variant is served.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=7 * 24 * 3600, max_variants=3,
+                 db_path=None, max_db_rows=10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_variants = max_variants
+        self.max_db_rows = max_db_rows
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._lru = OrderedDict()  # key -> list of (created_at, questions)
+        self._lock = threading.Lock()
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS question_cache ("
+                "cache_key TEXT NOT NULL, created_at REAL NOT NULL, questions TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_question_cache_key ON question_cache (cache_key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_question_cache_created ON question_cache (created_at)")
+            self._conn.commit()
+
+    def _fresh(self, variants, now):
+        return [v for v in variants if now - v[0] < self.ttl_seconds]
+
+    def _load_from_disk(self, key, now):
+        rows = self._conn.execute(
+            "SELECT created_at, questions FROM question_cache WHERE cache_key = ? AND created_at > ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (key, now - self.ttl_seconds, self.max_variants),
+        ).fetchall()
+        return [(created_at, json.loads(questions)) for created_at, questions in rows]
+
+    def _remember(self, key, variants):
+        self._lru[key] = variants
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key):
+        """Returns a cached question list for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            variants = self._fresh(self._lru.get(key, []), now)
+            if not variants and self._conn is not None:
+                variants = self._load_from_disk(key, now)
+                if variants:
+                    self.disk_hits += 1
+            if variants:
+                self._remember(key, variants)
+            else:
+                self._lru.pop(key, None)
+            if len(variants) < self.max_variants:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(random.choice(variants)[1])
+
+    def put(self, key, questions):
+        """Stores a new variant for `key`, evicting the oldest variant once the key is full."""
+        now = time.time()
+        with self._lock:
+            variants = self._fresh(self._lru.get(key, []), now)
+            variants.append((now, list(questions)))
+            self._remember(key, variants[-self.max_variants:])
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO question_cache (cache_key, created_at, questions) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(list(questions), ensure_ascii=False)),
+                )
+                self._evict_disk(key, now)
+                self._conn.commit()
+
+    def _evict_disk(self, key, now):
+        self._conn.execute("DELETE FROM question_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM question_cache WHERE cache_key = ? AND rowid NOT IN ("
+            "SELECT rowid FROM question_cache WHERE cache_key = ? ORDER BY created_at DESC LIMIT ?)",
+            (key, key, self.max_variants),
+        )
+        self._conn.execute(
+            "DELETE FROM question_cache WHERE rowid NOT IN ("
+            "SELECT rowid FROM question_cache ORDER BY created_at DESC LIMIT ?)",
+            (self.max_db_rows,),
+        )
+
+    def clear(self):
+        """Drops every cached entry from both tiers."""
+        with self._lock:
+            self._lru.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM question_cache")
+                self._conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and current size of the in-process tier."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "lru_entries": len(self._lru),
+            }
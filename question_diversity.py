@@ -0,0 +1,233 @@
+"""Local near-duplicate detection and diversity selection for interview questions.
+
+Questions are embedded as L2-normalised word-level TF-IDF vectors with NumPy,
+so cosine similarity for a whole pool is one matrix product. NumPy is imported
+on first use, not with the module, so importing chatbot_logic stays cheap. Stop words are
+dropped, words are crudely stemmed and skill names ("python", "react") are
+down-weighted: almost every question in a set names the stack, so they say
+little about what is being asked. No network access is needed. Run directly
+to list the most reused questions across stored candidates:
+
+    python question_diversity.py --threshold 0.45 --top 20
+"""
+import argparse
+import math
+import re
+
+from candidate_store import SKILL_ALIASES
+from prompt_budget import SKILL_CLUSTERS
+
+DUPLICATE_THRESHOLD = 0.4
+SKILL_WEIGHT = 0.25  # IDF multiplier for skill names
+
+_TOKEN = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+_STOPWORDS = frozenset(
+    "a an and are as at be between by can describe discuss do does explain for from give how in is it its "
+    "of on or over provide should that the their them there these they this to use used using what when "
+    "where which while why with would you your example examples concept difference differences "
+    "purpose typical typically key main illustrate practical particularly briefly simple affect program work".split()
+)
+# Capitalised multi-word names, optionally followed by their acronym: "Global Interpreter Lock (GIL)"
+_NAME = re.compile(r"\b[A-Z][a-z]+(?:[ -][A-Z][a-z]+)+(?:\s*\([A-Z]{2,}\))?")
+_SUFFIXES = ("ing", "ed", "es", "s")
+SKILL_TERMS = frozenset(
+    term for term in (*SKILL_ALIASES, *SKILL_ALIASES.values(), *SKILL_CLUSTERS,
+                      "python", "cpython", "java", "c", "rust", "sql", "html", "css", "php", "ruby")
+    if " " not in term
+)
+
+
+def _stem(word):
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _acronym(match):
+    """Replaces a capitalised name with its initials, so "Global Interpreter Lock" and "GIL" match.
+
+    A capital at the start of a sentence is just sentence case and is left alone.
+    """
+    before = match.string[:match.start()].rstrip()
+    if not before or before[-1] in ".?!:":
+        return match.group()
+    return "".join(word[0] for word in re.findall(r"[A-Z][a-z]+", match.group()))
+
+
+def _tokens(text):
+    """Stemmed content words; hyphenated words are joined, so "multi-threaded" matches "multithreading"."""
+    words = _TOKEN.findall(_NAME.sub(_acronym, text).casefold().replace("-", ""))
+    words = [w if w in SKILL_TERMS else _stem(w) for w in words if w not in _STOPWORDS]
+    return [w for w in words if w not in _STOPWORDS]  # Again after stemming: "programs" -> "program"
+
+
+def _idf(token_lists):
+    """Smoothed IDF per token over `token_lists`, with skill names scaled by SKILL_WEIGHT."""
+    document_frequency = {}
+    for tokens in token_lists:
+        for token in set(tokens):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    n = len(token_lists)
+    return {token: (math.log((1.0 + n) / (1.0 + df)) + 1.0) * (SKILL_WEIGHT if token in SKILL_TERMS else 1.0)
+            for token, df in document_frequency.items()}
+
+
+def tfidf_matrix(questions):
+    """Returns an (n, vocab) float32 matrix of L2-normalised TF-IDF rows."""
+    import numpy as np
+
+    token_lists = [_tokens(q) for q in questions]
+    idf = _idf(token_lists)
+    vocab = {token: i for i, token in enumerate(idf)}
+    rows = [i for i, tokens in enumerate(token_lists) for _ in tokens]
+    cols = [vocab[token] for tokens in token_lists for token in tokens]
+    counts = np.zeros((len(questions), max(1, len(vocab))), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    weights = np.log1p(counts) * np.array([idf[t] for t in vocab] or [0.0], dtype=np.float32)
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1.0, norms)
+
+
+def similarity_matrix(questions):
+    """Pairwise cosine similarity of all questions, as one matrix product."""
+    vectors = tfidf_matrix(questions)
+    return vectors @ vectors.T
+
+
+def select_diverse(questions, k=5, threshold=DUPLICATE_THRESHOLD, diversity=0.5):
+    """Picks up to `k` questions by maximal marginal relevance, rejecting near-duplicates.
+
+    Relevance favours questions earlier in the pool (the model's own ordering);
+    each pick is penalised by its highest similarity to those already chosen,
+    and any question at or above `threshold` similarity to a chosen one is
+    dropped. The loop runs at most `k` times; each pass is vectorised over the pool.
+    """
+    n = len(questions)
+    if n == 0:
+        return []
+    import numpy as np
+
+    sim = similarity_matrix(questions)
+    relevance = 1.0 - np.arange(n, dtype=np.float32) / n
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    chosen = []
+    while len(chosen) < k and available.any():
+        score = (1.0 - diversity) * relevance - diversity * max_sim
+        pick = int(np.argmax(np.where(available, score, -np.inf)))
+        chosen.append(pick)
+        max_sim = np.maximum(max_sim, sim[pick])
+        available &= max_sim < threshold
+        available[pick] = False
+    return [questions[i] for i in chosen]
+
+
+def is_near_duplicate(question, previous, threshold=DUPLICATE_THRESHOLD):
+    """True if `question` is at or above `threshold` similarity to any of `previous`."""
+    if not previous:
+        return False
+    # A handful of short vectors, checked per streamed line: plain dicts beat building a matrix
+    *others, vector = _sparse_vectors(list(previous) + [question])
+    return any(sum(w * other.get(token, 0.0) for token, w in vector.items()) >= threshold for other in others)
+
+
+def _sparse_vectors(questions):
+    """L2-normalised TF-IDF vectors as {token: weight} dicts, for pools too large for tfidf_matrix."""
+    token_lists = [_tokens(q) for q in questions]
+    idf = _idf(token_lists)
+    vectors = []
+    for tokens in token_lists:
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        weights = {token: math.log1p(count) * idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vectors.append({token: w / norm for token, w in weights.items()})
+    return vectors
+
+
+def _block_similarities(vectors, members):
+    """Dense cosine similarity of `members` over just the tokens they use."""
+    import numpy as np
+
+    vocab = {}
+    for i in members:
+        for token in vectors[i]:
+            vocab.setdefault(token, len(vocab))
+    block = np.zeros((len(members), len(vocab)), dtype=np.float32)
+    for row, i in enumerate(members):
+        for token, weight in vectors[i].items():
+            block[row, vocab[token]] = weight
+    return block @ block.T
+
+
+def overused_questions(questions, threshold=DUPLICATE_THRESHOLD, top=20, block_keys=2, max_block=2000):
+    """Groups near-duplicate questions across candidates; returns [(count, example)] most used first.
+
+    Exact repeats are counted first, so only distinct texts are compared. Two
+    near-duplicates almost always share one of their `block_keys` heaviest
+    tokens, so distinct texts are blocked by those tokens and compared only
+    within a block (at most `max_block` texts, the most asked first), never
+    all against all. Matches are merged transitively; each group is shown by
+    its most asked text.
+    """
+    import numpy as np
+
+    exact = {}
+    for question in questions:
+        question = question.strip()
+        if question:
+            exact[question] = exact.get(question, 0) + 1
+    texts = sorted(exact, key=lambda q: -exact[q])
+    vectors = _sparse_vectors(texts)
+
+    blocks = {}
+    for i, vector in enumerate(vectors):
+        for token in sorted(vector, key=lambda t: (-vector[t], t))[:block_keys]:
+            blocks.setdefault(token, []).append(i)
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for members in blocks.values():
+        members = members[:max_block]
+        if len(members) < 2:
+            continue
+        sim = _block_similarities(vectors, members)
+        for a, b in zip(*np.nonzero(np.triu(sim >= threshold, 1))):
+            root_a, root_b = find(members[a]), find(members[b])
+            if root_a != root_b:
+                # The lower index is the more asked text, which represents the group
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    counts = {}
+    for i, text in enumerate(texts):
+        root = find(i)
+        counts[root] = counts.get(root, 0) + exact[text]
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+    return [(count, texts[root]) for root, count in ranked]
+
+
+def main(argv=None):
+    from candidate_store import get_candidate_store
+
+    parser = argparse.ArgumentParser(description="List the most reused questions across stored candidates.")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    questions = [q for _, record in get_candidate_store().iter_records()
+                 for q in record.get("technical_questions", [])]
+    print(f"{len(questions)} questions asked in total.")
+    for count, example in overused_questions(questions, args.threshold, args.top):
+        print(f"{count:>6}  {example}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import json
+import re
+from typing import NamedTuple, Optional
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Optional ```json fences around a structured reply
+_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.S)
+# Leading list markers: "1.", "2)", "Q3:", "-", "*", "•", and markdown bold around them
+_LIST_MARKER = re.compile(r"^\s*(?:\*\*)?(?:Q?\d+\s*[.):]|[-*•])(?:\*\*)?\s+", re.I)
+# A numbered marker only ("1.", "Q2)"), which may head a group of nested bullets
+_NUMBERED = re.compile(r"^\s*(?:\*\*)?Q?\d+\s*[.):]", re.I)
+# A marker-less line still counts as a question if it ends with "?"
+_QUESTION_END = re.compile(r"\?[\s*_`)\"']*$")
+
+
+class ResponseParseError(ValueError):
+    """The model's reply could not be turned into questions."""
+
+
+def looks_like_json(text):
+    """True if the reply is (or starts like) a JSON document, even a truncated one."""
+    stripped = (text or "").lstrip()
+    return stripped.startswith(("{", "[", "```"))
+
+
+class Question(NamedTuple):
+    text: str
+    topic: Optional[str] = None
+    difficulty: Optional[str] = None
+
+
+def parse_structured(text, max_questions=5):
+    """Validates a JSON reply of the form {"questions": [{"question", "topic", "difficulty"}]}.
+
+    Fails on the first invalid element so a bad reply is rejected before any
+    further work is done on it.
+    """
+    match = _FENCE.match(text or "")
+    try:
+        data = json.loads(match.group(1) if match else text)
+    except (TypeError, ValueError) as e:
+        raise ResponseParseError(f"Reply is not valid JSON: {e}") from None
+    items = data.get("questions") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ResponseParseError("Reply has no 'questions' list.")
+    questions = []
+    for i, item in enumerate(items[:max_questions]):
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict):
+            raise ResponseParseError(f"Question {i + 1} is not an object.")
+        question = item.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise ResponseParseError(f"Question {i + 1} has no text.")
+        topic = item.get("topic")
+        difficulty = str(item.get("difficulty", "")).strip().lower()
+        questions.append(Question(
+            _LIST_MARKER.sub("", question.strip(), count=1),
+            topic.strip() if isinstance(topic, str) and topic.strip() else None,
+            difficulty if difficulty in DIFFICULTIES else None,
+        ))
+    return questions
+
+
+def _strip_emphasis(text):
+    """Unwraps "**What is X?**" and drops a closing "**" or "__" whose opener went with the list marker."""
+    for mark in ("**", "__"):
+        inner = text[len(mark):-len(mark)]
+        if len(text) > 2 * len(mark) and text.startswith(mark) and text.endswith(mark) and mark not in inner:
+            return inner.strip()
+        if text.endswith(mark) and text.count(mark) % 2 == 1:
+            return text[:-len(mark)].rstrip()
+    return text
+
+
+def parse_plain_line(line):
+    """Returns the question on one plain-text line, or None for blank, preamble or closing lines."""
+    line = line.strip()
+    if not line:
+        return None
+    marker = _LIST_MARKER.match(line)
+    if marker:
+        return _strip_emphasis(line[marker.end():].strip()) or None
+    return line if _QUESTION_END.search(line) else None
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+
+def iter_plain_questions(lines):
+    """Yields the question on each line of `lines`, skipping section headings.
+
+    A numbered line without "?" followed by indented or bulleted items
+    ("1. Python" over "   - What is X?") is a heading, not a question; such a
+    line is held back until the next non-blank line shows which it is.
+    """
+    heading = None  # (question, indent) of a numbered line that may head nested bullets
+    for line in lines:
+        if not line.strip():
+            continue
+        if heading:
+            marker = _LIST_MARKER.match(line)
+            nested = marker and (not _NUMBERED.match(line) or _indent(line) > heading[1])
+            if not nested:
+                yield heading[0]
+            heading = None
+        question = parse_plain_line(line)
+        if question and _NUMBERED.match(line) and "?" not in question:
+            heading = (question, _indent(line))
+        elif question:
+            yield question
+    if heading:
+        yield heading[0]
+
+
+def parse_plain(text, max_questions=5):
+    """Parses a plain-text numbered list; raises ResponseParseError if it holds no questions."""
+    questions = []
+    for question in iter_plain_questions((text or "").splitlines()):
+        questions.append(Question(question))
+        if len(questions) == max_questions:
+            break
+    if not questions:
+        raise ResponseParseError("Reply contains no recognisable questions.")
+    return questions
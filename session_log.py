@@ -0,0 +1,216 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from metrics import metrics
+
+DEFAULT_LOG_DIR = os.path.join("candidate_data", "sessions")
+
+# Session IDs are uuid4().hex; anything else (e.g. "../x" from a crafted ?sid=) is rejected
+SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+EVENT_TYPES = frozenset({"snapshot", "flow", "message", "step", "info", "questions", "answer", "ended", "save"})
+
+
+def is_valid_session_id(session_id):
+    return isinstance(session_id, str) and SESSION_ID_RE.match(session_id) is not None
+
+
+def new_session_state():
+    """Returns the interview state a fresh session starts from."""
+    return {
+        'messages': [],
+        'flow': None, # Interview flow name, pinned when the session starts
+        'current_step': 'greeting',
+        'candidate_info': {
+            'full_name': '', 'email': '', 'phone': '',
+            'experience': '', 'position': '',
+            'location': '', 'tech_stack': []
+        },
+        'tech_questions': [],
+        'conversation_ended': False,
+        'Youtubes': {},
+        'save_status': None, # "pending" once the record is queued for the candidate writer, then "saved"
+    }
+
+
+def apply_event(state, event):
+    """Applies one logged event to an interview state dict in place.
+
+    Returns False, leaving the state alone, for an event with no or an unknown
+    type or with missing fields.
+    """
+    if not isinstance(event, dict) or event.get("type") not in EVENT_TYPES:
+        return False
+    kind = event["type"]
+    try:
+        if kind == "snapshot":
+            snapshot = copy.deepcopy(dict(event["state"]))
+            state.clear()
+            state.update(snapshot)
+        elif kind == "flow":
+            state['flow'] = event["flow"]
+        elif kind == "message":
+            state['messages'].append({"role": event["role"], "content": event["content"]})
+        elif kind == "step":
+            state['current_step'] = event["step"]
+        elif kind == "info":
+            state['candidate_info'][event["field"]] = event["value"]
+        elif kind == "questions":
+            questions = list(event["questions"])
+            state['tech_questions'] = questions
+            state['Youtubes'] = {f"Q{i}": "" for i in range(1, len(questions) + 1)}
+        elif kind == "answer":
+            state['Youtubes'][event["key"]] = event["value"]
+        elif kind == "ended":
+            state['conversation_ended'] = True
+        elif kind == "save":
+            state['save_status'] = event["status"]
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+class SessionLog:
+    """Append-only JSON Lines log of one interview session.
+
+    Every step transition, message and answer edit is appended as it happens.
+    Appends are flushed to the OS immediately but fsync'd in batches (every
+    `fsync_every` events or `fsync_interval` seconds). Once the log holds more
+    than `compact_after` events it is rewritten as a single snapshot.
+
+    `version` counts step transitions. Events staged with stage() are written
+    together with the next append() or transition(). A file log has a single
+    writer, so transition() never conflicts and is_stale() is always False;
+    see session_store.py for the shared multi-process backend.
+    """
+
+    def __init__(self, session_id=None, log_dir=DEFAULT_LOG_DIR, fsync_every=8,
+                 fsync_interval=1.0, compact_after=200):
+        if session_id is not None and not is_valid_session_id(session_id):
+            raise ValueError(f"Invalid session ID: {session_id!r}")
+        self.session_id = session_id or uuid.uuid4().hex
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, f"{self.session_id}.jsonl")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._events = self._count_events()
+        self._staged = []
+        self.version = 0
+
+    def _count_events(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def stage(self, event_type, **fields):
+        """Holds an event back until the next append() or transition(), which writes it first."""
+        with self._lock:
+            self._staged.append({"type": event_type, "t": time.time(), **fields})
+
+    def append(self, event_type, **fields):
+        """Appends the staged events and this one; fsyncs once enough events or time have accumulated."""
+        with self._lock:
+            events, self._staged = self._staged + [{"type": event_type, "t": time.time(), **fields}], []
+            f = self._open()
+            f.write("".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in events))
+            f.flush()
+            self._events += len(events)
+            self._unsynced += len(events)
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+    def _sync_locked(self):
+        if self._file is not None and self._unsynced:
+            with metrics.timer("storage_write_seconds", backend="session_log", op="fsync"):
+                os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Forces pending events to disk."""
+        with self._lock:
+            self._sync_locked()
+
+    def transition(self, step):
+        """Logs a step transition; returns the new version."""
+        self.append("step", step=step)
+        self.version += 1
+        return self.version
+
+    def is_stale(self):
+        return False
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def replay(self):
+        """Rebuilds the interview state by replaying the log.
+
+        A torn final line ends the replay; events of an unknown type or shape are skipped.
+        """
+        state = new_session_state()
+        version = 0
+        with self._lock:
+            self._staged = []
+        if self.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break
+                    if not apply_event(state, event):
+                        continue
+                    if event["type"] == "snapshot":
+                        version = event.get("version", 0)
+                    elif event["type"] == "step":
+                        version += 1
+        self.version = version
+        return state
+
+    def needs_compaction(self):
+        return self._events > self.compact_after
+
+    def compact(self, state=None):
+        """Rewrites the log as one snapshot event (of `state`, or of the replayed log)."""
+        state = copy.deepcopy(state) if state is not None else self.replay()
+        snapshot = json.dumps({"type": "snapshot", "t": time.time(), "version": self.version, "state": state},
+                              ensure_ascii=False, separators=(",", ":"))
+        with self._lock, metrics.timer("storage_write_seconds", backend="session_log", op="compact"):
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.makedirs(self.log_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._events = 1
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,243 @@
+"""Interview session backends that several app.py worker processes can share.
+
+SESSION_BACKEND selects the backend returned by open_session_log():
+
+- "file" (default): one JSON Lines file per session (session_log.SessionLog),
+  for a single process
+- "sqlite": a SQLite database in WAL mode at SESSION_DB, which any number of
+  local worker processes can share
+
+Both have the same interface. Every write uses optimistic concurrency: each
+session row carries a version that every append() and transition() bumps,
+and a write only applies if the worker's version is still current.
+Otherwise StaleSessionError is raised and the worker reloads the session
+instead of overwriting newer progress, so two workers (or two tabs) writing
+to one interview never interleave and sticky sessions are not needed.
+Events staged for a step (stage()) are written in the same transaction, so
+a rejected write leaves none of them behind.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from metrics import metrics
+from session_log import SessionLog, apply_event, is_valid_session_id, new_session_state
+
+DEFAULT_SESSION_DB = os.path.join("candidate_data", "sessions.sqlite")
+
+
+class StaleSessionError(Exception):
+    """The session was advanced by another worker since this one last loaded it."""
+
+
+class SqliteSessionStore:
+    """Process-wide handle on the shared session database (one connection per thread)."""
+
+    def __init__(self, db_path=DEFAULT_SESSION_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                events INTEGER NOT NULL DEFAULT 0,
+                next_seq INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS session_events (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self, op):
+        """BEGIN IMMEDIATE takes the write lock up front, so a version check cannot race another writer."""
+        conn = self._conn()
+        with metrics.timer("storage_write_seconds", backend="session_sqlite", op=op):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _insert_event(self, conn, session_id, event, now):
+        conn.execute(
+            "INSERT INTO sessions (session_id, created_at, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO NOTHING", (session_id, now, now))
+        seq = conn.execute(
+            "UPDATE sessions SET next_seq = next_seq + 1, events = events + 1, updated_at = ? "
+            "WHERE session_id = ? RETURNING next_seq - 1", (now, session_id)).fetchone()[0]
+        conn.execute("INSERT INTO session_events (session_id, seq, event) VALUES (?, ?, ?)",
+                     (session_id, seq, json.dumps(event, ensure_ascii=False, separators=(",", ":"))))
+
+    def append(self, session_id, events, expected_version):
+        """Appends `events` if the session is still at `expected_version`.
+
+        Returns the new version; raises StaleSessionError, writing nothing, otherwise.
+        """
+        return self._versioned_write("append", session_id, events, expected_version)
+
+    def transition(self, session_id, events, expected_version):
+        """Like append(), for `events` ending with a step event."""
+        return self._versioned_write("transition", session_id, events, expected_version)
+
+    def _versioned_write(self, op, session_id, events, expected_version):
+        with self._write(op) as conn:
+            now = time.time()
+            for event in events:
+                self._insert_event(conn, session_id, event, now)
+            row = conn.execute(
+                "UPDATE sessions SET version = version + 1 WHERE session_id = ? AND version = ? "
+                "RETURNING version", (session_id, expected_version)).fetchone()
+            if row is None:
+                raise StaleSessionError(f"Session {session_id} is past version {expected_version}.")
+        return row[0]
+
+    def compact(self, session_id, state, expected_version):
+        """Replaces the session's events with one snapshot, unless another worker has moved it on."""
+        with self._write("compact") as conn:
+            row = conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None or row[0] != expected_version:
+                raise StaleSessionError(f"Session {session_id} is past version {expected_version}.")
+            conn.execute("DELETE FROM session_events WHERE session_id = ?", (session_id,))
+            conn.execute("UPDATE sessions SET events = 0 WHERE session_id = ?", (session_id,))
+            now = time.time()
+            self._insert_event(conn, session_id, {"type": "snapshot", "t": now, "state": state}, now)
+
+    def load(self, session_id):
+        """Returns (state, version, event_count); a read transaction gives a consistent view."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT version, events FROM sessions WHERE session_id = ?",
+                               (session_id,)).fetchone()
+            events = conn.execute("SELECT event FROM session_events WHERE session_id = ? ORDER BY seq",
+                                  (session_id,)).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        state = new_session_state()
+        for (event,) in events:
+            apply_event(state, json.loads(event))  # Skips events of an unknown type or shape
+        version, count = row if row else (0, 0)
+        return state, version, count
+
+    def version(self, session_id):
+        row = self._conn().execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def event_count(self, session_id):
+        row = self._conn().execute("SELECT events FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def exists(self, session_id):
+        return self._conn().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is not None
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SqliteSessionLog:
+    """SessionLog interface over a SqliteSessionStore, for one session."""
+
+    def __init__(self, store, session_id=None, compact_after=200):
+        if session_id is not None and not is_valid_session_id(session_id):
+            raise ValueError(f"Invalid session ID: {session_id!r}")
+        self.store = store
+        self.session_id = session_id or uuid.uuid4().hex
+        self.compact_after = compact_after
+        self.version = 0
+        self._staged = []
+
+    def stage(self, event_type, **fields):
+        """Holds an event back until the next append() or transition(), which writes it first."""
+        self._staged.append({"type": event_type, "t": time.time(), **fields})
+
+    def append(self, event_type, **fields):
+        """Logs the staged events and this one in one version-checked transaction; returns the new version.
+
+        Raises StaleSessionError, and drops the staged events, if another worker got there first.
+        """
+        events, self._staged = self._staged + [{"type": event_type, "t": time.time(), **fields}], []
+        self.version = self.store.append(self.session_id, events, self.version)
+        return self.version
+
+    def transition(self, step):
+        """Logs the staged events and a step transition in one version-checked transaction."""
+        events, self._staged = self._staged + [{"type": "step", "t": time.time(), "step": step}], []
+        self.version = self.store.transition(self.session_id, events, self.version)
+        return self.version
+
+    def is_stale(self):
+        """True if another worker has advanced this session since it was last loaded here."""
+        return self.store.version(self.session_id) != self.version
+
+    def sync(self):
+        pass  # Every append is its own committed transaction
+
+    def exists(self):
+        return self.store.exists(self.session_id)
+
+    def replay(self):
+        self._staged = []
+        state, self.version, _ = self.store.load(self.session_id)
+        return state
+
+    def needs_compaction(self):
+        return self.store.event_count(self.session_id) > self.compact_after
+
+    def compact(self, state=None):
+        state = copy.deepcopy(state) if state is not None else self.replay()
+        self.store.compact(self.session_id, state, self.version)
+
+    def close(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Returns the process-wide SqliteSessionStore at SESSION_DB."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SqliteSessionStore(os.getenv("SESSION_DB", DEFAULT_SESSION_DB))
+        return _store
+
+
+def open_session_log(session_id=None):
+    """Opens the session log for `session_id` on the SESSION_BACKEND backend.
+
+    A new session is started if `session_id` is None or not a valid session ID
+    (it usually comes straight from the URL).
+    """
+    if session_id is not None and not is_valid_session_id(session_id):
+        print(f"Ignoring invalid session ID {session_id!r}; starting a new session.")
+        session_id = None
+    if os.getenv("SESSION_BACKEND", "file") == "sqlite":
+        return SqliteSessionLog(get_session_store(), session_id)
+    return SessionLog(session_id)
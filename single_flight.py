@@ -0,0 +1,191 @@
+"""Single-flight coalescing: concurrent calls for the same key share one in-flight computation.
+
+When a cohort of candidates submits the same stack at once, only the first
+call reaches the LLM; the others wait for its result (or its error) instead
+of starting their own round trip through the model fallback chain.
+
+- do(key, fn, timeout) runs `fn` in the first caller's thread. Later callers
+  with the same key block for at most `timeout` seconds and then get
+  FlightTimeout; the flight itself carries on for everyone else.
+- stream(key, produce, timeout) shares a generator: `produce()` runs in a
+  background thread and every caller, the first included, receives each item
+  as it is published. `timeout` bounds the wait for the next item. When the
+  last caller stops listening (a closed generator, e.g. a Streamlit rerun),
+  the producer is closed after its next item and the flight is dropped.
+
+A key is only shared while its flight is running; the next call after it
+finishes starts a new one (put a cache in front for reuse over time).
+
+A failed flight's exception is raised in every waiting thread, so each
+waiter gets its own copy (same type, arguments and cause) rather than the
+one instance, whose __traceback__ every `raise` would rewrite at once.
+"""
+import copy
+import threading
+
+from metrics import metrics
+
+
+class FlightTimeout(TimeoutError):
+    """Gave up waiting on a flight started by another caller; the flight is still running."""
+
+
+class FlightCancelled(Exception):
+    """Every caller stopped listening before a streamed flight finished."""
+
+
+class FlightFailed(Exception):
+    """Stands in for a flight's exception that could not be copied; the original is the __cause__."""
+
+
+def _own_copy(error):
+    """Returns a copy of `error` for one waiter, with a fresh traceback and the original's cause."""
+    try:
+        fresh = copy.copy(error)
+    except Exception:
+        fresh = FlightFailed(f"{type(error).__name__}: {error}")
+        fresh.__cause__ = error
+        return fresh
+    fresh.__cause__, fresh.__context__ = error.__cause__, error.__context__
+    fresh.__suppress_context__ = error.__suppress_context__
+    return fresh
+
+
+class Flight:
+    """One in-flight computation: the items published so far, then a result or an error."""
+
+    def __init__(self, key):
+        self.key = key
+        self.items = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.listeners = 0
+        self.cancelled = False
+        self._cond = threading.Condition()
+
+    def publish(self, item):
+        with self._cond:
+            self.items.append(item)
+            self._cond.notify_all()
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            self.result, self.error, self.done = result, error, True
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Returns the flight's result or raises its error; raises FlightTimeout after `timeout` seconds."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise FlightTimeout(f"No result for {self.key!r} within {timeout}s.")
+        if self.error is not None:
+            raise _own_copy(self.error)
+        return self.result
+
+    def follow(self, timeout=None):
+        """Yields every published item, from the first; then returns, or raises the flight's error."""
+        seen = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: len(self.items) > seen or self.done, timeout):
+                    raise FlightTimeout(f"No new item for {self.key!r} within {timeout}s.")
+                new, finished = self.items[seen:], self.done
+            if not new and finished:
+                if self.error is not None:
+                    raise _own_copy(self.error)
+                return
+            seen += len(new)
+            yield from new
+
+
+class SingleFlight:
+    """A group of flights keyed by any hashable; `name` labels its metrics and threads."""
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Returns (flight, is_leader), registering this caller as a listener."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight(key)
+            flight.listeners += 1
+        metrics.inc("singleflight_calls_total", group=self.name, role="leader" if leader else "follower")
+        return flight, leader
+
+    def _leave(self, flight):
+        with self._lock:
+            flight.listeners -= 1
+            if flight.listeners == 0 and not flight.done:
+                flight.cancelled = True
+                self._forget(flight)
+
+    def _forget(self, flight):
+        # Called with the lock held; a newer flight for the same key may already have replaced this one
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def do(self, key, fn, timeout=None):
+        """Runs fn() once for all concurrent callers with `key`; each gets its result or exception."""
+        flight, leader = self._join(key)
+        if not leader:
+            try:
+                return flight.wait(timeout)
+            except FlightTimeout:
+                metrics.inc("singleflight_timeouts_total", group=self.name)
+                raise
+            finally:
+                with self._lock:
+                    flight.listeners -= 1
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.finish(error=e)
+            raise
+        else:
+            flight.finish(result)
+            return result
+        finally:
+            with self._lock:
+                flight.listeners -= 1
+                self._forget(flight)
+
+    def stream(self, key, produce, timeout=None):
+        """Yields the items of one shared produce() generator to all concurrent callers with `key`."""
+        flight, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._produce, args=(flight, produce),
+                             name=f"{self.name}-flight", daemon=True).start()
+        try:
+            yield from flight.follow(timeout)
+        except FlightTimeout:
+            metrics.inc("singleflight_timeouts_total", group=self.name)
+            raise
+        finally:
+            self._leave(flight)
+
+    def _produce(self, flight, produce):
+        items = produce()
+        try:
+            for item in items:
+                flight.publish(item)
+                if flight.cancelled:
+                    items.close()
+                    metrics.inc("singleflight_cancelled_total", group=self.name)
+                    raise FlightCancelled(f"Nobody is waiting for {flight.key!r} any more.")
+        except BaseException as e:
+            flight.finish(error=e)
+        else:
+            flight.finish()
+        finally:
+            with self._lock:
+                self._forget(flight)
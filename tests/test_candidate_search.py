@@ -0,0 +1,61 @@
+import random
+
+import candidate_search
+from candidate_search import CandidateIndex, parse_query
+
+
+def record(tech_stack, experience="3", location="Pune"):
+    return {"candidate_info": {"tech_stack": tech_stack, "experience": experience, "location": location}}
+
+
+def test_location_stops_at_connector_words():
+    assert parse_query("machine learning in Hyderabad with 2+ yrs") == (["machine learning"], 2, "Hyderabad")
+    assert parse_query("python in New Delhi who knows django") == (["python", "django"], None, "New Delhi")
+    assert parse_query("java in Pune having 4 yrs experience") == (["java"], 4, "Pune")
+
+
+def test_experience_clause_is_not_a_skill_or_location():
+    assert parse_query("at least 5 years of experience in golang and k8s") == (["go", "kubernetes"], 5, None)
+    assert parse_query("kubernetes, go, 3+ years in Bengaluru") == (["kubernetes", "go"], 3, "Bengaluru")
+
+
+def test_query_filters_on_parsed_location():
+    index = CandidateIndex()
+    index.add("a", record(["ML"], location="Hyderabad"))
+    index.add("b", record(["machine learning"], location="Pune"))
+    assert index.query("machine learning in Hyderabad with 2+ yrs") == [("a", 1.0)]
+
+
+def test_records_saved_during_a_build_are_indexed(monkeypatch):
+    class Store:
+        def iter_records(self):
+            yield "a", record(["go"])
+            # Saved after the build's scan has passed it
+            candidate_search.index_candidate("b", record(["go"]))
+
+    monkeypatch.setattr(candidate_search, "_index", None)
+    monkeypatch.setattr(candidate_search, "get_candidate_store", lambda: Store())
+    index = candidate_search.get_candidate_index()
+    assert sorted(c for c, _ in index.search(["go"])) == ["a", "b"]
+    candidate_search.index_candidate("c", record(["go"]))
+    assert len(index) == 3
+
+
+def test_search_matches_a_full_sort_of_the_filtered_candidates():
+    rng = random.Random(7)
+    skills, cities = ["go", "python", "k8s", "react", "sql"], ["Pune", "Delhi", "Bengaluru"]
+    index, docs = CandidateIndex(), {}
+    for i in range(300):
+        stack = rng.sample(skills, rng.randint(0, 3))
+        experience, location = rng.randint(0, 12), rng.choice(cities)
+        docs[f"c{i:03}"] = (set(map(candidate_search.normalize_skill, stack)), experience, location)
+        index.add(f"c{i:03}", record(stack, str(experience), location))
+
+    for wanted, lo, hi, location in [(["go", "kubernetes"], None, None, None), (["python"], 3, 8, "Pune"),
+                                     ([], 5, None, "Delhi"), (["sql", "react", "go"], None, 2, None)]:
+        expected = sorted(
+            (c for c, (stack, experience, city) in docs.items()
+             if (not wanted or stack & set(wanted)) and (lo is None or experience >= lo)
+             and (hi is None or experience <= hi) and (location is None or city == location)),
+            key=lambda c: (-len(docs[c][0] & set(wanted)), -docs[c][1], c))[:10]
+        assert [c for c, _ in index.search(wanted, lo, hi, location, limit=10)] == expected
@@ -0,0 +1,41 @@
+import json
+import sqlite3
+
+import pytest
+
+from candidate_store import JsonDirCandidateStore, SqliteCandidateStore
+
+
+def record(email, tech_stack):
+    return {"candidate_info": {"email": email, "tech_stack": tech_stack}}
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteCandidateStore(str(tmp_path / "candidates.sqlite"))
+    return JsonDirCandidateStore(str(tmp_path))
+
+
+def test_skill_filter_follows_aliases(store):
+    k8s = store.upsert(record("a@x.com", ["K8s", "Golang"]))
+    kubernetes = store.upsert(record("b@x.com", ["kubernetes"]))
+    assert sorted(store.find(skill="kubernetes")) == sorted([k8s, kubernetes])
+    assert store.find(skill="go") == store.find(skill="GoLang") == [k8s]
+
+
+def test_json_store_ignores_other_files_in_the_data_dir(tmp_path):
+    (tmp_path / "Jane_jane.json").write_text(json.dumps({"name": "Jane", "skills": "go"}))
+    store = JsonDirCandidateStore(str(tmp_path))
+    candidate_id = store.upsert(record("a@x.com", ["go"]))
+    assert store.count() == 1
+    assert [c for c, _ in store.iter_records()] == store.find(skill="go") == [candidate_id]
+
+
+def test_existing_sqlite_skills_are_renormalized(tmp_path):
+    db_path = str(tmp_path / "candidates.sqlite")
+    candidate_id = SqliteCandidateStore(db_path).upsert(record("a@x.com", ["k8s"]))
+    with sqlite3.connect(db_path) as conn:  # As written before skills were alias-normalized
+        conn.execute("UPDATE candidate_skills SET skill = 'k8s'")
+        conn.execute("PRAGMA user_version = 0")
+    assert SqliteCandidateStore(db_path).find(skill="kubernetes") == [candidate_id]
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+
+import pytest
+
+import answer_evaluator
+import candidate_aggregates
+import candidate_search
+from candidate_store import SqliteCandidateStore
+from candidate_writer import CandidateWriter, WriterBusy, update_derived_data
+
+
+def record(email):
+    return {"candidate_info": {"email": email, "full_name": email.split("@")[0], "tech_stack": ["Go"]}}
+
+
+class GatedStore:
+    """Records upsert_many batches; the first one blocks until `release` is set."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.fail = fail
+
+    def upsert_many(self, pairs):
+        self.entered.set()
+        self.release.wait(5)
+        self.batches.append([candidate_id for candidate_id, _ in pairs])
+        if self.fail:
+            raise OSError("disk full")
+
+    def upsert(self, record, candidate_id=None):
+        if self.fail:
+            raise OSError("disk full")
+
+
+def test_concurrent_submits_share_one_transaction():
+    store = GatedStore()
+    writer = CandidateWriter(store, max_wait=0.05)
+    first = writer.submit(record("first@x.com"))
+    assert store.entered.wait(5)  # The writer is now busy with the first batch
+    threads = [threading.Thread(target=writer.submit, args=(record(f"c{i}@x.com"),)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.release.set()
+    assert writer.flush(5)
+    assert first.status == "saved"
+    assert len(store.batches) == 2 and len(store.batches[1]) == 5
+    assert writer.stats["batches"] == 2 and writer.stats["saved"] == 6
+
+
+def test_full_queue_raises_writer_busy():
+    store = GatedStore()
+    writer = CandidateWriter(store, max_queue=1)
+    writer.submit(record("a@x.com"))
+    assert store.entered.wait(5)
+    writer.submit(record("b@x.com"))  # Fills the queue while the writer is stuck
+    with pytest.raises(WriterBusy):
+        writer.submit(record("c@x.com"), timeout=0.05)
+    assert writer.stats["busy"] == 1
+    store.release.set()
+    assert writer.flush(5)
+
+
+def test_failed_batch_fails_every_waiter():
+    store = GatedStore(fail=True)
+    store.release.set()
+    committed = []
+    writer = CandidateWriter(store, max_wait=0.05, after_commit=committed.extend)
+    tickets = [writer.submit(record(f"c{i}@x.com")) for i in range(3)]
+    for ticket in tickets:
+        assert not ticket.wait(5)
+        assert ticket.status == "failed" and isinstance(ticket.error, OSError)
+    assert committed == []
+    assert writer.stats["failed"] == 3
+
+
+def test_derived_data_is_updated_only_after_commit(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "candidates.sqlite")
+    seen = []
+
+    def committed(candidate_id):
+        # A separate connection only sees the record once the writer's transaction has committed
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT 1 FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone()
+
+    class Aggregates:
+        def update_many(self, pairs):
+            seen.extend(("aggregates", candidate_id, bool(committed(candidate_id))) for candidate_id, _ in pairs)
+
+    class Evaluator:
+        def submit(self, candidate_id, record):
+            seen.append(("evaluator", candidate_id, bool(committed(candidate_id))))
+
+    monkeypatch.setattr(candidate_search, "index_candidate",
+                        lambda candidate_id, record: seen.append(("index", candidate_id, bool(committed(candidate_id)))))
+    monkeypatch.setattr(candidate_aggregates, "get_candidate_aggregates", Aggregates)
+    monkeypatch.setattr(answer_evaluator, "get_answer_evaluator", Evaluator)
+
+    writer = CandidateWriter(SqliteCandidateStore(db_path), after_commit=update_derived_data)
+    ticket = writer.submit(record("a@x.com"))
+    assert ticket.wait(5)
+    assert writer.flush(5)
+    assert [(kind, ok) for kind, candidate_id, ok in seen] == [("index", True), ("aggregates", True), ("evaluator", True)]
+    assert {candidate_id for _, candidate_id, _ in seen} == {ticket.candidate_id}
@@ -0,0 +1,59 @@
+import pytest
+
+import conversation_archive
+from conversation_archive import ArchiveReader, ArchiveWriter, write_archive
+from interview_flow import END_MESSAGE, GREETING_MESSAGE, QUESTIONS_INTRO
+
+CODECS = [b"gzip", pytest.param(b"zstd", marks=pytest.mark.skipif(
+    conversation_archive.zstandard is None, reason="zstandard is not installed"))]
+
+
+def conversation(i):
+    return [
+        {"role": "assistant", "content": GREETING_MESSAGE},
+        {"role": "user", "content": f"Candidate {i} ✨"},
+        {"role": "assistant", "content": f"Nice to meet you, **Candidate {i}**! 👋"},
+        {"role": "assistant", "content": QUESTIONS_INTRO + f"\n1. What is Q{i}?"},
+        {"role": "user", "content": ""},
+        {"role": "system", "content": "{value} is literal here"},
+        {"role": "assistant", "content": END_MESSAGE},
+    ]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(tmp_path, codec):
+    path = str(tmp_path / "conversations.cva")
+    conversations = [(f"c{i}", conversation(i)) for i in range(10)] + [("empty", [])]
+    assert write_archive(path, conversations, block_size=4, codec=codec) == 11
+    with ArchiveReader(path) as reader:
+        assert reader.codec == codec and len(reader.blocks) == 3
+        assert list(reader) == conversations
+        assert reader.get("c7") == conversation(7) and reader.get("missing") is None
+
+
+def test_lookup_decodes_only_the_indexed_block(tmp_path):
+    path = str(tmp_path / "conversations.cva")
+    write_archive(path, [(f"c{i}", conversation(i)) for i in range(10)], block_size=4, codec=b"gzip")
+    with ArchiveReader(path) as reader:
+        assert reader.index["c5"] == [1, 1]
+        assert reader.get("c5") == conversation(5)
+        assert list(reader._cache) == [1]
+
+
+def test_without_zstandard_gzip_is_the_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversation_archive, "zstandard", None)
+    path = str(tmp_path / "conversations.cva")
+    write_archive(path, [("c0", conversation(0))])
+    with ArchiveReader(path) as reader:
+        assert reader.codec == b"gzip" and reader.get("c0") == conversation(0)
+    with pytest.raises(RuntimeError):
+        ArchiveWriter(str(tmp_path / "zstd.cva"), codec=b"zstd")
+
+
+def test_failed_build_leaves_no_file(tmp_path):
+    path = tmp_path / "conversations.cva"
+    with pytest.raises(ValueError):
+        with ArchiveWriter(str(path), codec=b"gzip") as writer:
+            writer.add("c0", conversation(0))
+            writer.add("c0", conversation(0))
+    assert list(tmp_path.iterdir()) == []
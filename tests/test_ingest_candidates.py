@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from candidate_store import SqliteCandidateStore, candidate_id_for
+from ingest_candidates import ingest
+
+
+def write(path, name, mtime, email="jane@x.com"):
+    path.write_text(json.dumps({
+        "candidate_info": {"full_name": name, "email": email, "tech_stack": "Go"},
+        "tech_questions": ["What is a goroutine?"],
+        "conversation": [{"role": "user", "content": "**Q1:** What is a goroutine?\n**A:** A green thread."}],
+    }))
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+@pytest.mark.parametrize("batch_size", [1, 10])
+@pytest.mark.parametrize("newest_first", [False, True])
+def test_newest_file_wins_whatever_the_order(tmp_path, batch_size, newest_first):
+    files = [write(tmp_path / f"jane_{i}.json", f"Jane {i}", 1_000_000 + i) for i in range(3)]
+    if newest_first:
+        files.reverse()
+    store = SqliteCandidateStore(str(tmp_path / "candidates.sqlite"))
+    report = ingest(files, store, workers=2, batch_size=batch_size)
+
+    record = store.get(candidate_id_for({"email": "jane@x.com"}))
+    assert record["candidate_info"]["full_name"] == "Jane 2"
+    assert record["candidate_info"]["tech_stack"] == ["Go"]
+    assert record["technical_answers"] == {"Q1": "A green thread."}
+    assert report["imported"] == store.count() == 1
+    assert len(report["collisions"]) == 2
+    assert report["collisions"][-1][1].endswith("jane_2.json")
+
+
+def test_malformed_files_are_reported_and_skipped(tmp_path):
+    (tmp_path / "broken.json").write_text("{")
+    (tmp_path / "other.json").write_text(json.dumps({"name": "no candidate_info"}))
+    write(tmp_path / "ok.json", "Jane", 1_000_000)
+    store = SqliteCandidateStore(str(tmp_path / "db" / "candidates.sqlite"))
+    report = ingest([str(tmp_path)], store, workers=2)
+    assert report["files"] == 3 and report["imported"] == 1
+    assert sorted(os.path.basename(path) for path, _ in report["malformed"]) == ["broken.json", "other.json"]
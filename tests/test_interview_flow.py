@@ -0,0 +1,20 @@
+from interview_flow import get_flow
+from session_log import apply_event, new_session_state
+
+
+def test_first_unfinished_step_follows_the_flow_order():
+    quick = get_flow("quick_screen")
+    assert quick.first_unfinished_step({}, started=False) == "greeting"
+    assert quick.first_unfinished_step({"full_name": "Jane"}, started=True) == "ask_email"
+    info = {"full_name": "Jane", "email": "jane@x.com", "phone": "12345678"}
+    assert quick.first_unfinished_step(info, started=True) == "ask_tech_stack"  # quick_screen has no ask_phone
+    assert get_flow().first_unfinished_step(info, started=True) == "ask_experience"
+    info["tech_stack"] = ["go"]
+    assert quick.first_unfinished_step(info, started=True) == "technical_questions"
+
+
+def test_pinned_flow_is_replayed_from_the_log():
+    state = new_session_state()
+    assert state["flow"] is None
+    assert apply_event(state, {"type": "flow", "flow": "quick_screen"})
+    assert state["flow"] == "quick_screen"
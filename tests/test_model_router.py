@@ -0,0 +1,86 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from model_router import ModelRouter, TruncatedReplyError
+
+
+class FakeModel:
+    """Answers after `latency` seconds, or raises `error`; `finish_reason` mimics the SDK's candidates."""
+
+    def __init__(self, latency=0.0, error=None, text="1. What is a goroutine?", finish_reason="STOP"):
+        self.latency, self.error, self.text, self.finish_reason = latency, error, text, finish_reason
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        reason = SimpleNamespace(name=self.finish_reason)
+        return SimpleNamespace(text=self.text, candidates=[SimpleNamespace(finish_reason=reason)])
+
+
+def router_for(models, **kwargs):
+    return ModelRouter(list(models), models.__getitem__, **kwargs)
+
+
+def test_measured_models_are_ordered_fastest_first():
+    router = router_for({"slow": FakeModel(), "fast": FakeModel(), "untried": FakeModel()}, explore_every=0)
+    router.record_success("slow", 1.0)
+    router.record_success("fast", 0.1)
+    assert router.ordered_models() == ["fast", "slow", "untried"]
+
+
+def test_untried_model_gets_a_probe_request():
+    models = {"first": FakeModel(), "second": FakeModel()}
+    router = router_for(models, explore_every=3)
+    for _ in range(3):
+        router.generate("prompt")
+    assert models["second"].calls == 1  # The third request probed it
+    assert models["first"].calls == 2
+    assert all(h["latency_ewma"] is not None for h in router.snapshot())
+
+
+def test_failure_trips_the_circuit_until_its_cool_down_ends():
+    models = {"flaky": FakeModel(error=RuntimeError("503")), "backup": FakeModel()}
+    router = router_for(models, base_backoff=0.05, explore_every=0)
+    assert router.generate("prompt")[1] == "backup"
+    health = {h["model"]: h for h in router.snapshot()}
+    assert health["flaky"]["circuit_open"] and health["flaky"]["consecutive_failures"] == 1
+    assert router.ordered_models() == ["backup", "flaky"]
+
+    time.sleep(0.06)  # Cool-down over: the circuit closes and the model may be tried again
+    models["flaky"].error = None
+    assert not {h["model"]: h for h in router.snapshot()}["flaky"]["circuit_open"]
+    router.call_model("flaky", "prompt")
+    assert {h["model"]: h for h in router.snapshot()}["flaky"]["consecutive_failures"] == 0
+
+
+def test_quota_errors_back_off_longer():
+    router = router_for({"a": FakeModel(), "b": FakeModel()}, base_backoff=1, quota_backoff=30)
+    router.record_failure("a", RuntimeError("503 unavailable"))
+    router.record_failure("b", RuntimeError("429 quota exceeded"))
+    retry_in = {h["model"]: h["retry_in"] for h in router.snapshot()}
+    assert retry_in["a"] <= 1 < retry_in["b"]
+
+
+def test_repeated_invalid_replies_trip_the_circuit():
+    router = router_for({"garbage": FakeModel(text="not json")}, invalid_reply_limit=2)
+
+    def validate(response):
+        raise ValueError("unparseable")
+
+    for expected_open in (False, True):
+        with pytest.raises(ValueError):
+            router.call_model("garbage", "prompt", validate=validate)
+        assert router.snapshot()[0]["circuit_open"] is expected_open
+
+
+def test_max_tokens_reply_is_a_distinct_failure():
+    models = {"thinking": FakeModel(finish_reason="MAX_TOKENS"), "plain": FakeModel()}
+    router = router_for(models, explore_every=0)
+    with pytest.raises(TruncatedReplyError):
+        router.call_model("thinking", "prompt", validate=lambda response: response.text)
+    assert router.generate("prompt", validate=lambda response: response.text)[1] == "plain"
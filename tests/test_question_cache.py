@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+import question_cache
+from question_cache import QuestionCache, make_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(question_cache, "time", clock)
+    return clock
+
+
+def test_equivalent_stacks_share_a_key():
+    assert make_cache_key([" Go", "python", "go"], "p", 0.7) == make_cache_key(["Python", "GO"], "p", 0.7)
+
+
+def test_key_is_served_only_once_full_and_rotates_its_newest_variants(clock):
+    cache = QuestionCache(max_variants=2)
+    cache.put("k", ["v1"])
+    assert cache.get("k") is None  # One variant: still generate afresh
+    for variant in ("v2", "v3"):
+        clock.now += 1
+        cache.put("k", [variant])
+    served = {cache.get("k")[0] for _ in range(50)}
+    assert served == {"v2", "v3"}  # v1 was evicted as the oldest
+    assert cache.stats()["hits"] == 50 and cache.stats()["misses"] == 1
+
+
+def test_variants_expire_after_the_ttl(clock, tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = QuestionCache(max_variants=1, ttl_seconds=60, db_path=db_path)
+    cache.put("k", ["q"])
+    assert QuestionCache(max_variants=1, ttl_seconds=60, db_path=db_path).get("k") == ["q"]  # From disk
+    clock.now += 60
+    assert cache.get("k") is None
+    cache.put("other", ["q"])  # Writing prunes the expired rows
+    with sqlite3.connect(db_path) as conn:
+        assert [key for key, in conn.execute("SELECT cache_key FROM question_cache")] == ["other"]
+
+
+def test_disk_tier_keeps_the_newest_rows(clock, tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = QuestionCache(max_variants=1, max_db_rows=3, db_path=db_path)
+    for i in range(5):
+        clock.now += 1
+        cache.put(f"k{i}", [f"q{i}"])
+    fresh = QuestionCache(max_variants=1, max_db_rows=3, db_path=db_path)
+    assert [fresh.get(f"k{i}") for i in range(5)] == [None, None, ["q2"], ["q3"], ["q4"]]
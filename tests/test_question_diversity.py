@@ -0,0 +1,44 @@
+from question_diversity import DUPLICATE_THRESHOLD, is_near_duplicate, overused_questions, select_diverse
+
+GIL_QUESTIONS = [
+    "Describe the Global Interpreter Lock (GIL) in CPython and its implications for multithreading.",
+    "How does the Global Interpreter Lock (GIL) affect CPU-bound multi-threaded programs in Python?",
+    "What is the GIL in Python and its implications for threads?",
+]
+
+
+def test_gil_paraphrases_are_near_duplicates():
+    for question in GIL_QUESTIONS[1:]:
+        assert is_near_duplicate(question, [GIL_QUESTIONS[0]]), question
+
+
+def test_acronym_matches_its_expansion():
+    assert is_near_duplicate("How does the Global Interpreter Lock limit multithreading in CPython?",
+                             ["Explain the GIL in Python."])
+
+
+def test_shared_skill_name_is_not_a_duplicate():
+    assert not is_near_duplicate("What is a Python generator?", ["What is a Python decorator?"])
+    assert not is_near_duplicate("What is the virtual DOM in React?", ["What are React hooks?"])
+
+
+def test_select_diverse_keeps_one_gil_question():
+    pool = [
+        GIL_QUESTIONS[0],
+        "Explain the difference between `list` and `tuple` in Python.",
+        GIL_QUESTIONS[1],
+        "What is a Python decorator, and how are they typically implemented using the `@` syntax?",
+        "What are generators in Python and how do they differ from lists?",
+        "How would you handle exceptions in Python to ensure robust code?",
+    ]
+    chosen = select_diverse(pool, k=5)
+    assert len(chosen) == 5
+    assert sum(q in GIL_QUESTIONS for q in chosen) == 1
+
+
+def test_overused_questions_counts_repeats_and_paraphrases():
+    questions = [GIL_QUESTIONS[0]] * 3 + [GIL_QUESTIONS[2]] + ["What is a Python decorator?"] * 2
+    assert overused_questions(questions, DUPLICATE_THRESHOLD) == [
+        (4, GIL_QUESTIONS[0]),
+        (2, "What is a Python decorator?"),
+    ]
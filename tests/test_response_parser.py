@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+import chatbot_logic
+from response_parser import Question, ResponseParseError, parse_plain, parse_plain_line, parse_structured
+
+
+def test_bold_wrapper_is_stripped_after_the_marker():
+    assert parse_plain_line("1. **What is the GIL?**") == "What is the GIL?"
+    assert parse_plain_line("**1. What is the GIL?**") == "What is the GIL?"
+    assert parse_plain_line("2) What does **yield** do?") == "What does **yield** do?"
+
+
+def test_section_heading_over_nested_bullets_is_dropped():
+    assert parse_plain("1. Python\n - What is X?") == [Question("What is X?")]
+    reply = "1. **Python**\n   - What is X?\n\n   - What is Y?\n2. Go\n   1. How do channels work?"
+    assert [q.text for q in parse_plain(reply)] == ["What is X?", "What is Y?", "How do channels work?"]
+
+
+def test_numbered_statements_without_bullets_are_kept():
+    reply = "Here are your questions:\n1. Explain the GIL.\n2. Describe Go's scheduler.\nGood luck!"
+    assert [q.text for q in parse_plain(reply)] == ["Explain the GIL.", "Describe Go's scheduler."]
+
+
+def test_plain_reply_is_capped_and_empty_reply_rejected():
+    assert len(parse_plain("\n".join(f"{i}. Q{i}?" for i in range(1, 9)), max_questions=5)) == 5
+    with pytest.raises(ResponseParseError):
+        parse_plain("Sure! Let me know if you need anything else.")
+
+
+def test_structured_reply_in_fences():
+    reply = '```json\n{"questions": [{"question": "1. What is X?", "topic": "Go", "difficulty": "Hard"}]}\n```'
+    assert parse_structured(reply) == [Question("What is X?", "Go", "hard")]
+
+
+def test_json_mode_falls_back_to_plain_text_only_for_non_json(monkeypatch):
+    monkeypatch.setattr(chatbot_logic, "QUESTION_OUTPUT_MODE", "json")
+    reply = SimpleNamespace(text="1. Python\n  - What is a decorator?")
+    assert chatbot_logic._parse_reply(reply) == [Question("What is a decorator?")]
+    with pytest.raises(ResponseParseError):
+        chatbot_logic._parse_reply(SimpleNamespace(text='{"questions": [{"question": "What is'))
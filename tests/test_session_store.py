@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from session_store import SqliteSessionLog, SqliteSessionStore, StaleSessionError
+
+SID = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqliteSessionStore(str(tmp_path / "sessions.sqlite"))
+
+
+def test_second_writer_on_a_stale_version_is_rejected(store):
+    first, second = SqliteSessionLog(store, SID), SqliteSessionLog(store, SID)
+    first.transition("technical_questions")
+    first.replay(), second.replay()
+
+    first.append("answer", key="Q1", value="from the first tab")
+    second.stage("message", role="user", content="never written")
+    with pytest.raises(StaleSessionError):
+        second.append("answer", key="Q1", value="from the second tab")
+
+    state = second.replay()
+    assert state["Youtubes"] == {"Q1": "from the first tab"}
+    assert state["messages"] == []  # The rejected write's staged events were dropped too
+    second.append("answer", key="Q1", value="from the second tab, after reloading")
+    assert first.is_stale() and not second.is_stale()
+    assert first.replay()["Youtubes"]["Q1"] == "from the second tab, after reloading"
+
+
+def test_racing_writers_never_interleave(store):
+    SqliteSessionLog(store, SID).transition("technical_questions")
+    written = {"a": 0, "b": 0}
+    barrier = threading.Barrier(2)
+
+    def writer(name):
+        log = SqliteSessionLog(store, SID)
+        log.replay()
+        barrier.wait()
+        for i in range(50):
+            try:
+                log.append("answer", key=f"Q{name}", value=str(i))
+                written[name] += 1
+            except StaleSessionError:
+                log.replay()
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in written]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each accepted write moved the version on by exactly one; rejected ones left no events behind
+    state, version, events = store.load(SID)
+    assert version == 1 + sum(written.values())
+    assert events == 1 + sum(written.values())
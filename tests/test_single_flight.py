@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import FlightTimeout, SingleFlight
+
+
+class GenerationFailed(Exception):
+    pass
+
+
+def start_followers(flights, key, fn, count):
+    """Starts `count` threads calling flights.do(key, fn); returns (threads, outcomes)."""
+    outcomes = []
+
+    def follow():
+        try:
+            outcomes.append(flights.do(key, fn, timeout=5))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_for_listeners(flights, key, count):
+    deadline = time.monotonic() + 5
+    while flights._flights[key].listeners < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_leader_failure_reaches_every_follower_as_its_own_exception():
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        try:
+            raise OSError("quota")
+        except OSError as e:
+            raise GenerationFailed("no model answered") from e
+
+    leader_threads, leader_outcome = start_followers(flights, "k", fail, 1)
+    assert started.wait(5)
+    threads, outcomes = start_followers(flights, "k", fail, 3)
+    wait_for_listeners(flights, "k", 4)
+    release.set()
+    for thread in leader_threads + threads:
+        thread.join(5)
+
+    errors = leader_outcome + outcomes
+    assert len(calls) == 1
+    assert all(isinstance(e, GenerationFailed) and e.args == ("no model answered",) for e in errors)
+    assert all(isinstance(e.__cause__, OSError) for e in errors)
+    assert len({id(e) for e in errors}) == 4  # No instance (or traceback) is shared between threads
+
+
+def test_follower_times_out_while_the_flight_carries_on():
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "questions"
+
+    threads, outcomes = start_followers(flights, "k", slow, 1)
+    assert started.wait(5)
+    with pytest.raises(FlightTimeout):
+        flights.do("k", slow, timeout=0.05)
+    release.set()
+    threads[0].join(5)
+    assert outcomes == ["questions"]
+
+
+def test_key_is_released_after_the_flight_completes():
+    flights = SingleFlight("test")
+
+    def fail():
+        raise GenerationFailed("x")
+
+    assert flights.do("k", lambda: 1) == 1
+    assert flights.in_flight() == 0
+    assert flights.do("k", lambda: 2) == 2  # A new flight, not the finished one's result
+    with pytest.raises(GenerationFailed):
+        flights.do("k", fail)
+    assert flights.in_flight() == 0
+
+
+def test_stream_failure_reaches_each_listener_separately():
+    flights = SingleFlight("test")
+    release = threading.Event()
+
+    def produce():
+        yield "Q1"
+        release.wait(5)
+        raise GenerationFailed("stream broke")
+
+    first, second = flights.stream("k", produce, timeout=5), flights.stream("k", produce, timeout=5)
+    assert next(first) == "Q1" and next(second) == "Q1"
+    release.set()
+    with pytest.raises(GenerationFailed) as first_error:
+        next(first)
+    with pytest.raises(GenerationFailed) as second_error:
+        next(second)
+    assert first_error.value is not second_error.value
+    assert flights.in_flight() == 0
+
+
+def test_stream_is_cancelled_when_every_listener_detaches():
+    flights = SingleFlight("test")
+    closed = threading.Event()
+
+    def produce():
+        try:
+            for i in range(1000):
+                yield i
+                time.sleep(0.001)
+        finally:
+            closed.set()
+
+    listener = flights.stream("k", produce, timeout=5)
+    assert next(listener) == 0
+    listener.close()
+    assert flights.in_flight() == 0
+    assert closed.wait(5)